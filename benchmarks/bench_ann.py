@@ -0,0 +1,158 @@
+"""
+Recall-vs-latency benchmark for the pgvector ANN indexes.
+
+Generates a clustered synthetic corpus (1M x 768-d vectors by default) in a
+scratch table inside the configured PostgreSQL database, computes exact
+top-k neighbours for a set of query vectors, then builds HNSW and/or
+IVFFlat indexes and measures latency and recall@k across ef_search / probes.
+The application tables are not touched.
+
+Usage:
+    docker compose up -d
+    python -m benchmarks.bench_ann --rows 1000000 --index hnsw ivfflat --output ann.json
+"""
+import argparse
+import json
+import statistics
+import time
+from sqlalchemy import create_engine, text
+from src.resources import DB_CONNECTION_STRING
+from src.vector_index import ivfflat_lists, HNSW_M, HNSW_EF_CONSTRUCTION
+from benchmarks.common import write_report
+
+TABLE = "bench_ann_vectors"
+QUERIES = "bench_ann_queries"
+CENTROIDS = "bench_ann_centroids"
+
+
+def generate(conn, rows: int, dim: int, clusters: int, queries: int, noise: float, batch: int) -> None:
+    """
+    Fills the scratch tables with points scattered around random centroids,
+    which gives the index realistic neighbourhood structure to work with.
+    """
+    for table in (TABLE, QUERIES, CENTROIDS):
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    # "+ 0 * i" correlates the sub-select with the outer row so it is re-evaluated per row
+    conn.execute(text(
+        f"CREATE TABLE {CENTROIDS} AS SELECT i AS id, "
+        f"ARRAY(SELECT random() * 2 - 1 + 0 * i FROM generate_series(1, {dim})) AS c "
+        f"FROM generate_series(0, {clusters - 1}) i"
+    ))
+    for table in (TABLE, QUERIES):
+        conn.execute(text(f"CREATE TABLE {table} (id BIGSERIAL PRIMARY KEY, embedding vector({dim}))"))
+
+    def fill(table: str, count: int) -> None:
+        for start in range(0, count, batch):
+            end = min(count, start + batch) - 1
+            conn.execute(text(
+                f"INSERT INTO {table} (embedding) "
+                f"SELECT ARRAY(SELECT c.c[d] + (random() - 0.5) * {noise} + 0 * g "
+                f"FROM generate_series(1, {dim}) d)::vector({dim}) "
+                f"FROM generate_series({start}, {end}) g "
+                f"JOIN {CENTROIDS} c ON c.id = (g * 7919) % {clusters}"
+            ))
+            print(f"  {table}: {end + 1}/{count} rows", flush=True)
+
+    fill(TABLE, rows)
+    fill(QUERIES, queries)
+    conn.execute(text(f"ANALYZE {TABLE}"))
+
+
+def search(conn, query_id: int, k: int) -> tuple[list[int], float]:
+    started = time.perf_counter()
+    ids = conn.execute(
+        text(
+            f"SELECT v.id FROM {TABLE} v "
+            f"ORDER BY v.embedding <=> (SELECT embedding FROM {QUERIES} WHERE id = :q) LIMIT :k"
+        ),
+        {"q": query_id, "k": k},
+    ).scalars().all()
+    return ids, time.perf_counter() - started
+
+
+def measure(conn, query_ids: list[int], truth: dict[int, set[int]], k: int) -> dict:
+    latencies, recalls = [], []
+    for q in query_ids:
+        ids, elapsed = search(conn, q, k)
+        latencies.append(elapsed * 1000)
+        recalls.append(len(truth[q] & set(ids)) / k)
+    latencies.sort()
+    return {
+        "recall_at_k": round(statistics.fmean(recalls), 4),
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pgvector ANN recall vs latency")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.5)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--index", nargs="+", default=["hnsw", "ivfflat"], choices=["hnsw", "ivfflat"])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 20, 40, 80, 160, 320])
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 5, 10, 20, 50, 100])
+    parser.add_argument("--maintenance-work-mem", default="2GB")
+    parser.add_argument("--reuse", action="store_true", help="Reuse previously generated tables")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    engine = create_engine(DB_CONNECTION_STRING, isolation_level="AUTOCOMMIT")
+    report = {"benchmark": "ann_recall_latency", "rows": args.rows, "dim": args.dim, "k": args.k, "results": []}
+
+    with engine.connect() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        if not args.reuse:
+            print(f"Generating {args.rows} vectors ({args.dim}-d, {args.clusters} clusters)...")
+            started = time.perf_counter()
+            generate(conn, args.rows, args.dim, args.clusters, args.queries, args.noise, args.batch)
+            report["generate_s"] = round(time.perf_counter() - started, 1)
+        query_ids = conn.execute(text(f"SELECT id FROM {QUERIES} ORDER BY id")).scalars().all()
+
+        print("Computing exact neighbours (sequential scan)...")
+        conn.execute(text(f"DROP INDEX IF EXISTS {TABLE}_ann"))
+        truth = {}
+        exact_latencies = []
+        for q in query_ids:
+            ids, elapsed = search(conn, q, args.k)
+            truth[q] = set(ids)
+            exact_latencies.append(elapsed * 1000)
+        report["exact"] = {"recall_at_k": 1.0, "mean_ms": round(statistics.fmean(exact_latencies), 2)}
+        print(json.dumps(report["exact"]))
+
+        conn.execute(text(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'"))
+        for index_type in args.index:
+            conn.execute(text(f"DROP INDEX IF EXISTS {TABLE}_ann"))
+            if index_type == "hnsw":
+                ddl = (f"CREATE INDEX {TABLE}_ann ON {TABLE} USING hnsw (embedding vector_cosine_ops) "
+                       f"WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})")
+                setting, values = "hnsw.ef_search", args.ef_search
+            else:
+                ddl = (f"CREATE INDEX {TABLE}_ann ON {TABLE} USING ivfflat (embedding vector_cosine_ops) "
+                       f"WITH (lists = {ivfflat_lists(args.rows)})")
+                setting, values = "ivfflat.probes", args.probes
+
+            print(f"Building {index_type} index...")
+            started = time.perf_counter()
+            conn.execute(text(ddl))
+            build_s = round(time.perf_counter() - started, 1)
+            size = conn.execute(text(f"SELECT pg_relation_size('{TABLE}_ann')")).scalar()
+
+            for value in values:
+                conn.execute(text(f"SET {setting} = {value}"))
+                result = {"index": index_type, "build_s": build_s, "index_bytes": size, setting: value}
+                result.update(measure(conn, query_ids, truth, args.k))
+                report["results"].append(result)
+                print(json.dumps(result))
+        conn.execute(text(f"DROP INDEX IF EXISTS {TABLE}_ann"))
+
+    write_report(args.output, report, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Chunking benchmark on multi-hour transcripts.
+
+Compares the original path (join all segments, normalise whitespace with a
+regex, then RecursiveCharacterTextSplitter via chunk_text) with the
+segment-aware chunk_segments, on synthetic transcripts shaped like YouTube
+captions (a segment every ~3 s). Reports time, throughput, peak Python
+memory and chunk counts. No database or Ollama needed.
+
+Usage:
+    python -m benchmarks.bench_chunking --hours 1 3 10 --repeat 3 --output chunking.json
+"""
+import argparse
+import json
+import re
+import time
+import tracemalloc
+from src.chunker import chunk_text, chunk_segments
+from benchmarks.common import write_report
+from benchmarks.fixtures import synthetic_segments
+
+def join_and_split(segments: list[dict], video_id: str):
+    # What ingestion did before: join the segments into one string + chunk_text
+    text = " ".join(seg["text"] for seg in segments)
+    text = re.sub(r"\s+", " ", text).strip()
+    return chunk_text(text, video_id)
+
+
+def measure(func, segments: list[dict], repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        docs = func(segments, "bench")
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    func(segments, "bench")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "best_ms": round(min(timings) * 1000, 1),
+        "peak_mb": round(peak / 1e6, 1),
+        "chunks": len(docs),
+        "avg_chunk_chars": round(sum(len(d.page_content) for d in docs) / len(docs)),
+        "timestamps": "start" in docs[0].metadata,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Segment-aware vs character chunking")
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for hours in args.hours:
+        segments = synthetic_segments(hours)
+        chars = sum(len(seg["text"]) + 1 for seg in segments)
+        for name, func in (("join_and_split", join_and_split), ("chunk_segments", chunk_segments)):
+            result = {"hours": hours, "segments": len(segments), "chars": chars, "chunker": name}
+            result.update(measure(func, segments, args.repeat))
+            result["mb_per_sec"] = round(chars / 1e6 / (max(result["best_ms"], 0.1) / 1000), 2)
+            results.append(result)
+            print(json.dumps(result), flush=True)
+
+    write_report(args.output, {"benchmark": "chunking", "results": results}, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Cold-start benchmark: how long a fresh API process takes to become useful.
+
+Measures, in fresh processes:
+  import       time to `import main` (and to start a bare interpreter, for reference)
+  warmup       the API with the startup warmup on: time until /health answers,
+               until /ready answers 200, then the first and second /ask
+  no_warmup    the same with WARMUP_ENABLED=false, where the first /ask pays
+               for loading the client libraries and the models
+The stub Ollama server is restarted for every run with --load-delay, so each
+run starts with the models "unloaded" like a new Ollama node. Needs a local
+PostgreSQL + pgvector (the fixture transcripts are seeded into it).
+
+Usage:
+    docker compose up -d
+    python -m benchmarks.bench_cold_start --repeat 3 --load-delay 2 --output cold_start.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+from benchmarks.bench_concurrency import seed
+from benchmarks.common import ROOT, free_port, start_stub_ollama, write_report
+from benchmarks.fixtures import fixture_questions
+
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+
+def time_imports(repeat: int) -> dict:
+    imports, interpreters = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], cwd=ROOT, check=True)
+        interpreters.append(time.perf_counter() - started)
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+        imports.append(float(output.strip().splitlines()[-1]))
+    return {
+        "mode": "import",
+        "import_ms": round(statistics.median(imports) * 1000, 1),
+        "interpreter_ms": round(statistics.median(interpreters) * 1000, 1),
+    }
+
+
+def poll(url: str, started: float, timeout: float = 300.0) -> float:
+    """
+    Seconds from `started` until `url` answers 200.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} did not answer 200 within {timeout:g}s")
+
+
+def cold_start(warmup: bool, args, questions: list[dict]) -> dict:
+    env = dict(os.environ, WARMUP_ENABLED="true" if warmup else "false", ANSWER_CACHE_ENABLED="false")
+    stub, _ = start_stub_ollama(chat_delay=args.chat_delay, load_delay=args.load_delay, env=env)
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    api = None
+    try:
+        started = time.perf_counter()
+        api = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        health = poll(f"{base_url}/health", started)
+        ready = poll(f"{base_url}/ready", started)
+        asks = []
+        for question in questions[:2]:
+            ask_started = time.perf_counter()
+            response = httpx.post(f"{base_url}/ask", json=question, timeout=300)
+            response.raise_for_status()
+            asks.append(time.perf_counter() - ask_started)
+        first_answer = time.perf_counter() - started
+    finally:
+        for proc in (api, stub):
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=10)
+    return {"health": health, "ready": ready, "first_ask": asks[0], "second_ask": asks[1], "first_answer": first_answer}
+
+
+def median_ms(runs: list[dict], key: str) -> float:
+    return round(statistics.median(run[key] for run in runs) * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and time to first answer of a fresh API process")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per measurement (medians are reported)")
+    parser.add_argument("--load-delay", type=float, default=2.0, help="Seconds the stub takes to 'load' each model")
+    parser.add_argument("--chat-delay", type=float, default=0.2)
+    parser.add_argument("--videos", type=int, default=3)
+    parser.add_argument("--minutes", type=float, default=10, help="Length of each fixture transcript")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = [time_imports(args.repeat)]
+    print(json.dumps(results[-1]), flush=True)
+
+    stub, _ = start_stub_ollama()
+    try:
+        print(f"Seeding {args.videos} fixture videos of {args.minutes:g} minutes...", flush=True)
+        video_ids = asyncio.run(seed(args.videos, args.minutes))
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+
+    for warmup in (True, False):
+        runs = []
+        for i in range(args.repeat):
+            # Different questions every run, so nothing is served from a cache
+            runs.append(cold_start(warmup, args, fixture_questions(len(video_ids), 2, seed=i * 2 + warmup)))
+        result = {
+            "mode": "warmup" if warmup else "no_warmup",
+            "health_ms": median_ms(runs, "health"),
+            "ready_ms": median_ms(runs, "ready"),
+            "first_ask_ms": median_ms(runs, "first_ask"),
+            "second_ask_ms": median_ms(runs, "second_ask"),
+            "first_answer_ms": median_ms(runs, "first_answer"),
+        }
+        results.append(result)
+        print(json.dumps(result), flush=True)
+
+    report = {
+        "benchmark": "cold_start",
+        "load_delay_s": args.load_delay,
+        "chat_delay_s": args.chat_delay,
+        "results": results,
+    }
+    write_report(args.output, report, args)
+
+
+if __name__ == "__main__":
+    main()
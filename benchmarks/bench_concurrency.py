@@ -0,0 +1,131 @@
+"""
+Concurrency benchmark for /ask.
+
+Starts the stub Ollama server and the API as subprocesses, seeds a local
+PostgreSQL + pgvector database (e.g. the docker-compose one) with the
+fixture transcripts, then measures p50/p99 latency of /ask at several levels
+of concurrent clients. The answer cache is off unless --answer-cache is
+given, so repeated fixture questions still go through retrieval and the LLM.
+
+Usage:
+    docker compose up -d
+    python -m benchmarks.bench_concurrency --concurrency 1 16 64 --chat-delay 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+from benchmarks.common import ROOT, free_port, percentile, start_stub_ollama, wait_for, write_report
+from benchmarks.fixtures import fixture_questions, fixture_transcripts
+
+
+async def seed(videos: int, minutes: float) -> list[str]:
+    """
+    Chunks the fixture transcripts and inserts them through the real store
+    layer (embeddings come from the stub). Returns the video ids.
+    """
+    from src.resources import init_resources, shutdown_resources
+    from src.store import init_schema, sync_video_documents, delete_all_chunks
+    from src.chunker import chunk_segments
+
+    init_resources()
+    await init_schema()
+    await delete_all_chunks()
+    transcripts = fixture_transcripts(videos, minutes)
+    for video_id, segments in transcripts.items():
+        await sync_video_documents(video_id, chunk_segments(segments, video_id))
+    await shutdown_resources()
+    return list(transcripts)
+
+
+async def run_level(base_url: str, concurrency: int, total: int, questions: list[dict]) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        for i in counter:
+            payload = questions[i % len(questions)]
+            start = time.perf_counter()
+            response = await client.post(f"{base_url}/ask", json=payload)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1),
+        "throughput_rps": round(total / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="p50/p99 latency of /ask under concurrent load")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests-per-client", type=int, default=4)
+    parser.add_argument("--videos", type=int, default=20)
+    parser.add_argument("--minutes", type=float, default=30, help="Length of each fixture transcript")
+    parser.add_argument("--embed-delay", type=float, default=0.02)
+    parser.add_argument("--chat-delay", type=float, default=0.5)
+    parser.add_argument("--answer-cache", action="store_true", help="Leave the answer cache on")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if not args.answer_cache:
+        env["ANSWER_CACHE_ENABLED"] = "false"
+    stub, _ = start_stub_ollama(embed_delay=args.embed_delay, chat_delay=args.chat_delay, env=env)
+    api_port = free_port()
+    api = None
+    try:
+        print(f"Seeding {args.videos} fixture videos of {args.minutes:g} minutes...")
+        video_ids = asyncio.run(seed(args.videos, args.minutes))
+
+        api = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(api_port), "--log-level", "warning"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        base_url = f"http://127.0.0.1:{api_port}"
+        # Not /health: the first requests would otherwise time the model loads
+        wait_for(f"{base_url}/ready")
+
+        results = []
+        for level in args.concurrency:
+            total = max(level * args.requests_per_client, 16)
+            questions = fixture_questions(len(video_ids), total, seed=level)
+            result = asyncio.run(run_level(base_url, level, total, questions))
+            results.append(result)
+            print(json.dumps(result))
+
+        report = {
+            "benchmark": "ask_concurrency",
+            "embed_delay_s": args.embed_delay,
+            "chat_delay_s": args.chat_delay,
+            "results": results,
+        }
+        write_report(args.output, report, args)
+    finally:
+        for proc in (api, stub):
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Prompt-size benchmark for context packing.
+
+Chunks a synthetic transcript, simulates top-k retrieval results (relevant
+passages tend to cluster, so each hit is a neighbour of the previous one
+with probability --locality), and compares the answer prompt built from the
+raw concatenation of the chunks with the one built from pack_context().
+Reports prompt tokens before/after, tokens saved and packing time.
+No database or Ollama needed.
+
+Usage:
+    python -m benchmarks.bench_context_packing --top-k 4 8 --budget 1000 1500 3000 --output packing.json
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from src.chunker import chunk_segments, chunk_text
+from src.context_packer import CONTEXT_SEPARATOR, count_tokens, pack_context, _get_encoding
+from src.generator import ANSWER_PROMPT, get_prompt
+from benchmarks.common import write_report
+from benchmarks.fixtures import segments_text, synthetic_segments
+
+QUESTION = "How does the query planner decide when to use the index?"
+
+
+def prompt_tokens(docs) -> int:
+    context = CONTEXT_SEPARATOR.join(doc.page_content for doc in docs)
+    return count_tokens(get_prompt(ANSWER_PROMPT).format_messages(context=context, question=QUESTION)[0].content)
+
+
+def simulated_hits(chunks: list, k: int, locality: float, rng: random.Random) -> list:
+    index = rng.randrange(len(chunks))
+    hits = [index]
+    while len(hits) < k:
+        if rng.random() < locality:
+            index = min(len(chunks) - 1, max(0, hits[-1] + rng.choice((-1, 1))))
+        else:
+            index = rng.randrange(len(chunks))
+        if index not in hits:
+            hits.append(index)
+    return [chunks[i] for i in hits]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens before/after context packing")
+    parser.add_argument("--hours", type=float, default=2)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--budget", type=int, nargs="+", default=[1000, 1500, 3000])
+    parser.add_argument("--locality", type=float, default=0.6, help="Chance a hit neighbours the previous one")
+    parser.add_argument("--chunker", choices=["segments", "text"], default="segments")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    segments = synthetic_segments(args.hours)
+    if args.chunker == "segments":
+        chunks = chunk_segments(segments, "bench")
+    else:
+        chunks = chunk_text(segments_text(segments), "bench")
+    tokenizer = "tiktoken" if _get_encoding() is not None else "estimate (chars / 4)"
+
+    results = []
+    for k in args.top_k:
+        rng = random.Random(k)
+        queries = [simulated_hits(chunks, k, args.locality, rng) for _ in range(args.queries)]
+        for budget in args.budget:
+            before, after, timings = [], [], []
+            for docs in queries:
+                started = time.perf_counter()
+                packed, _ = pack_context(docs, token_budget=budget)
+                timings.append((time.perf_counter() - started) * 1000)
+                before.append(prompt_tokens(docs))
+                after.append(prompt_tokens(packed))
+            result = {
+                "top_k": k,
+                "budget": budget,
+                "chunker": args.chunker,
+                "tokenizer": tokenizer,
+                "prompt_tokens_before": round(statistics.fmean(before)),
+                "prompt_tokens_after": round(statistics.fmean(after)),
+                "max_tokens_after": max(after),
+                "saved_pct": round(100 * (1 - sum(after) / sum(before)), 1),
+                "pack_ms_mean": round(statistics.fmean(timings), 3),
+            }
+            results.append(result)
+            print(json.dumps(result), flush=True)
+
+    write_report(args.output, {"benchmark": "context_packing", "locality": args.locality, "results": results}, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Retrieval latency as the corpus grows.
+
+Grows the chunk table of the configured PostgreSQL + pgvector database
+(which is cleared first, like bench_concurrency) to each --sizes step with
+generated chunks (random 768-d vectors and fixture-vocabulary text, created in
+SQL so 100k+ rows take seconds), lets the ANN index be (re)built the way the
+app would, then times retrieve_context for the fixture questions in vector,
+hybrid and per-video hybrid mode. Question embeddings are passed in, so only
+retrieval is measured and no Ollama server is needed.
+
+Usage:
+    docker compose up -d
+    python -m benchmarks.bench_corpus_scaling --sizes 1000 10000 100000 --queries 200 --output corpus.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import statistics
+import time
+from sqlalchemy import text
+from benchmarks.common import percentile, write_report
+from benchmarks.fixtures import TOPICS, WORDS, fixture_questions
+
+MODES = {
+    "vector": {"lexical_weight": 0.0, "scoped": False},
+    "hybrid": {"lexical_weight": 0.5, "scoped": False},
+    "hybrid_video": {"lexical_weight": 0.5, "scoped": True},
+}
+
+
+async def grow(start: int, end: int, chunks_per_video: int, dim: int, batch: int) -> None:
+    """
+    Inserts chunks start..end-1; chunk g belongs to fixture video g // chunks_per_video.
+    """
+    from src.resources import get_engine
+    from src.store import get_collection_id
+
+    collection_id = await get_collection_id()
+    vocabulary = list(WORDS) + list(TOPICS)
+    for low in range(start, end, batch):
+        high = min(end, low + batch) - 1
+        async with get_engine().begin() as conn:
+            # "+ 0 * g" correlates the sub-selects with the outer row so they are re-evaluated per row
+            await conn.execute(
+                text(
+                    "INSERT INTO langchain_pg_embedding (uuid, collection_id, embedding, document, cmetadata, custom_id) "
+                    "SELECT gen_random_uuid(), :collection_id, "
+                    f"ARRAY(SELECT random() * 2 - 1 + 0 * g FROM generate_series(1, {dim}))::vector, "
+                    "array_to_string(ARRAY(SELECT (CAST(:words AS text[]))[1 + floor(random() * CAST(:n AS int) + 0 * g)::int] "
+                    "FROM generate_series(1, 150)), ' '), "
+                    "jsonb_build_object('video_id', 'fixture' || lpad((g / CAST(:per_video AS int))::text, 4, '0'), "
+                    "'start', (g % CAST(:per_video AS int)) * 60, 'end', (g % CAST(:per_video AS int)) * 60 + 60), "
+                    "md5(g::text) "
+                    "FROM generate_series(CAST(:low AS int), CAST(:high AS int)) g"
+                ),
+                {"collection_id": collection_id, "words": vocabulary, "n": len(vocabulary),
+                 "per_video": chunks_per_video, "low": low, "high": high},
+            )
+        print(f"  {high + 1}/{end} chunks", flush=True)
+    async with get_engine().connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE langchain_pg_embedding"))
+
+
+def query_vector(rng: random.Random, dim: int) -> list[float]:
+    values = [rng.uniform(-1, 1) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+async def measure(mode: str, questions: list[dict], vectors: list[list[float]], top_k: int) -> dict:
+    from src.retriever import retrieve_context
+
+    options = MODES[mode]
+    latencies = []
+    for question, vector in zip(questions, vectors):
+        started = time.perf_counter()
+        await retrieve_context(
+            question["question"], top_k=top_k, query_embedding=vector,
+            video_id=question["video_id"] if options["scoped"] else None,
+            lexical_weight=options["lexical_weight"], rerank=False,
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "mode": mode,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+    }
+
+
+async def run_grid(args) -> list[dict]:
+    from src.resources import init_resources, shutdown_resources, EMBEDDING_DIM
+    from src.store import init_schema, delete_all_chunks
+    from src.vector_index import maintain_vector_index, index_stats
+
+    init_resources()
+    results = []
+    try:
+        await init_schema()
+        await delete_all_chunks()
+        rng = random.Random(0)
+        current = 0
+        for size in sorted(args.sizes):
+            print(f"Growing the corpus to {size} chunks...", flush=True)
+            await grow(current, size, args.chunks_per_video, EMBEDDING_DIM, args.batch)
+            current = size
+            await maintain_vector_index(force=True)
+            stats = await index_stats()
+            index = stats["type"] if stats["built"] else "none"
+
+            videos = max(1, math.ceil(size / args.chunks_per_video))
+            questions = fixture_questions(videos, args.queries, seed=size)
+            vectors = [query_vector(rng, EMBEDDING_DIM) for _ in questions]
+            # Warm the pool, plan cache and index pages
+            await measure("hybrid", questions[:5], vectors[:5], args.top_k)
+            for mode in args.modes:
+                result = {"corpus_size": size, "ann_index": index, **await measure(mode, questions, vectors, args.top_k)}
+                results.append(result)
+                print(json.dumps(result), flush=True)
+    finally:
+        await shutdown_resources()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval latency vs corpus size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--chunks-per-video", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200, help="Questions timed per size and mode")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=5000, help="Rows per INSERT while growing the corpus")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_grid(args))
+    write_report(args.output, {"benchmark": "corpus_scaling", "results": results}, args)
+
+
+if __name__ == "__main__":
+    main()
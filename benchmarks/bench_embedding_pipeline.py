@@ -0,0 +1,98 @@
+"""
+Throughput benchmark for the embedding pipeline.
+
+Runs run_embedding_pipeline over a synthetic transcript against the stub
+Ollama server for a grid of batch sizes and concurrency levels, and reports
+chunks/sec. By default embedded batches are discarded so only the embedding
+stage is measured; pass --with-db to also write them to the staging table
+the way sync_video_documents does (the staged rows are deleted afterwards).
+
+Usage:
+    python -m benchmarks.bench_embedding_pipeline --chunks 2000 --batch-sizes 1 8 32 64 --concurrency 1 2 4 8
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from benchmarks.common import start_stub_ollama, write_report
+
+
+async def run_grid(args) -> list[dict]:
+    from langchain_core.documents import Document
+    from src.resources import init_resources, shutdown_resources, get_engine
+    from src.embedding_pipeline import run_embedding_pipeline
+    from sqlalchemy import text
+    from src.store import init_schema, _stage_documents
+
+    init_resources()
+    docs = [
+        Document(page_content=f"chunk {i} " + "lorem ipsum dolor sit amet " * 35, metadata={"video_id": "bench"})
+        for i in range(args.chunks)
+    ]
+    if args.with_db:
+        await init_schema()
+
+    results = []
+    for batch_size in args.batch_sizes:
+        for concurrency in args.concurrency:
+            started = time.perf_counter()
+            if args.with_db:
+                ingest_id = uuid.uuid4()
+                await run_embedding_pipeline(
+                    docs, lambda b, v: _stage_documents(ingest_id, b, v),
+                    batch_size=batch_size, concurrency=concurrency, use_cache=False,
+                )
+                async with get_engine().begin() as conn:
+                    await conn.execute(
+                        text("DELETE FROM rag_chunk_staging WHERE ingest_id = :ingest_id"), {"ingest_id": ingest_id}
+                    )
+            else:
+                async def discard(batch, vectors):
+                    return None
+                await run_embedding_pipeline(
+                    docs, discard, batch_size=batch_size, concurrency=concurrency, use_cache=False,
+                )
+            elapsed = time.perf_counter() - started
+            result = {
+                "batch_size": batch_size,
+                "concurrency": concurrency,
+                "chunks": len(docs),
+                "seconds": round(elapsed, 3),
+                "chunks_per_sec": round(len(docs) / elapsed, 1),
+            }
+            results.append(result)
+            print(json.dumps(result), flush=True)
+    await shutdown_resources()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding pipeline chunks/sec")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--embed-delay", type=float, default=0.01, help="Stub latency per embed call (s)")
+    parser.add_argument("--embed-delay-per-input", type=float, default=0.002, help="Stub latency per text (s)")
+    parser.add_argument("--with-db", action="store_true", help="Also write batches to the PostgreSQL staging table")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    stub, _ = start_stub_ollama(embed_delay=args.embed_delay, embed_delay_per_input=args.embed_delay_per_input)
+    try:
+        results = asyncio.run(run_grid(args))
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+
+    write_report(args.output, {
+        "benchmark": "embedding_pipeline",
+        "embed_delay_s": args.embed_delay,
+        "embed_delay_per_input_s": args.embed_delay_per_input,
+        "with_db": args.with_db,
+        "results": results,
+    }, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+End-to-end ingestion benchmark.
+
+Saves fixture transcripts in the raw-transcript store and runs the real
+ingest_video (transcript store -> chunking -> embedding cache -> embed ->
+insert -> title/questions) against the stub Ollama server and a local
+PostgreSQL + pgvector, so nothing is fetched from YouTube. Reports chunks/sec
+and where the time went (summed rag_stage_seconds per stage) for several
+transcript lengths. The embedding cache is a fresh temporary file, so every
+chunk is embedded.
+
+Usage:
+    docker compose up -d
+    python -m benchmarks.bench_ingest --minutes 10 60 180 --videos 8 --concurrency 2 --output ingest.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from benchmarks.common import start_stub_ollama, write_report
+from benchmarks.fixtures import fixture_transcripts, seed_transcript_store
+
+STAGES = ("transcript_store", "chunk", "embedding_cache", "embed", "db_insert", "store", "summarize_section", "summarize")
+
+
+def stage_seconds() -> dict[str, float]:
+    from prometheus_client import REGISTRY
+
+    return {
+        stage: REGISTRY.get_sample_value("rag_stage_seconds_sum", {"operation": "ingest", "stage": stage}) or 0.0
+        for stage in STAGES
+    }
+
+
+async def run_grid(args) -> list[dict]:
+    from src.resources import init_resources, shutdown_resources
+    from src.store import init_schema, delete_video_chunks
+    from src.pipeline import ingest_video
+    from src.embedding_cache import close_embedding_cache
+
+    init_resources()
+    await init_schema()
+    results = []
+    try:
+        for minutes in args.minutes:
+            transcripts = fixture_transcripts(args.videos, minutes, seed=int(minutes * 10))
+            await seed_transcript_store(transcripts)
+            for video_id in transcripts:
+                await delete_video_chunks(video_id)
+
+            semaphore = asyncio.Semaphore(args.concurrency)
+            chunks = 0
+
+            async def ingest(video_id: str):
+                nonlocal chunks
+                async with semaphore:
+                    result = await ingest_video(video_id)
+                chunks += result["chunks_created"]
+
+            before = stage_seconds()
+            started = time.perf_counter()
+            await asyncio.gather(*(ingest(video_id) for video_id in transcripts))
+            elapsed = time.perf_counter() - started
+            after = stage_seconds()
+
+            result = {
+                "minutes": minutes,
+                "videos": args.videos,
+                "concurrency": args.concurrency,
+                "chunks": chunks,
+                "total_s": round(elapsed, 3),
+                "chunks_per_sec": round(chunks / elapsed, 1),
+                "videos_per_min": round(args.videos / elapsed * 60, 1),
+                "stage_s": {stage: round(after[stage] - before[stage], 3) for stage in STAGES},
+            }
+            results.append(result)
+            print(json.dumps(result), flush=True)
+    finally:
+        close_embedding_cache()
+        await shutdown_resources()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end ingestion chunks/sec on fixture transcripts")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[10, 60, 180], help="Transcript lengths")
+    parser.add_argument("--videos", type=int, default=8, help="Videos ingested per transcript length")
+    parser.add_argument("--concurrency", type=int, default=2, help="Videos ingested at the same time")
+    parser.add_argument("--embed-delay", type=float, default=0.01, help="Stub latency per embed call (s)")
+    parser.add_argument("--embed-delay-per-input", type=float, default=0.002, help="Stub latency per text (s)")
+    parser.add_argument("--chat-delay", type=float, default=0.2, help="Stub latency of the summary call (s)")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    os.environ["PRECOMPUTE_SUGGESTED_ANSWERS"] = "false"
+    stub, _ = start_stub_ollama(
+        embed_delay=args.embed_delay, embed_delay_per_input=args.embed_delay_per_input, chat_delay=args.chat_delay,
+    )
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-ingest-") as cache_dir:
+            os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(cache_dir, "embeddings.sqlite3")
+            results = asyncio.run(run_grid(args))
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+
+    write_report(args.output, {
+        "benchmark": "ingest",
+        "embed_delay_s": args.embed_delay,
+        "embed_delay_per_input_s": args.embed_delay_per_input,
+        "results": results,
+    }, args)
+
+
+if __name__ == "__main__":
+    main()
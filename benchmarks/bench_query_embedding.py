@@ -0,0 +1,123 @@
+"""
+Embed-stage latency of /ask under concurrent load.
+
+Fires --requests question embeddings from N concurrent clients against the
+stub Ollama server and compares:
+  direct   one aembed_query round trip per question (the previous behaviour)
+  batched  the micro-batcher without the cache
+  cached   micro-batcher + LRU cache
+Questions are drawn from a pool of --distinct questions with a Zipf-like
+skew (popular and suggested questions repeat), so the cache hit rate is
+realistic rather than 0 or 100%. Reports p50/p95 embed latency, Ollama
+calls, average batch size and hit rate. No database needed.
+
+Usage:
+    python -m benchmarks.bench_query_embedding --concurrency 1 16 64 --requests 2000 --output query_embedding.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import httpx
+from benchmarks.common import start_stub_ollama, write_report
+
+
+def question_stream(count: int, distinct: int, skew: float, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** skew for rank in range(distinct)]
+    picks = rng.choices(range(distinct), weights=weights, k=count)
+    return [f"What does the speaker say about topic number {i}?" for i in picks]
+
+
+async def run_mode(mode: str, questions: list[str], concurrency: int, args, stub_url: str) -> dict:
+    from src.resources import get_embeddings
+    from src.query_embeddings import QueryEmbedder
+
+    embedder = QueryEmbedder(
+        batch_window_ms=args.window_ms, max_batch=args.max_batch, cache_enabled=(mode == "cached"),
+    )
+    queue = list(reversed(questions))
+    latencies = []
+
+    async def client():
+        while queue:
+            question = queue.pop()
+            started = time.perf_counter()
+            if mode == "direct":
+                await get_embeddings().aembed_query(question)
+            else:
+                await embedder.embed(question)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    calls_before = httpx.get(f"{stub_url}/stats").json()["embed_calls"]
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    calls = httpx.get(f"{stub_url}/stats").json()["embed_calls"] - calls_before
+
+    latencies.sort()
+    stats = embedder.stats()
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": len(questions),
+        "ollama_calls": calls,
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "embeds_per_sec": round(len(questions) / elapsed, 1),
+        "avg_batch_size": stats["avg_batch_size"] if mode != "direct" else 1.0,
+        "max_batch_size": stats["max_batch_size"] if mode != "direct" else 1,
+        "hit_rate": stats["hit_rate"],
+    }
+
+
+async def run_grid(args, stub_url: str) -> list[dict]:
+    from src.resources import init_resources, shutdown_resources
+
+    init_resources()
+    results = []
+    for concurrency in args.concurrency:
+        questions = question_stream(args.requests, args.distinct, args.skew, seed=concurrency)
+        for mode in args.modes:
+            result = await run_mode(mode, questions, concurrency, args, stub_url)
+            results.append(result)
+            print(json.dumps(result), flush=True)
+    await shutdown_resources()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query embedding latency: direct vs batched vs cached")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=500, help="Distinct questions in the pool")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of question popularity")
+    parser.add_argument("--modes", nargs="+", default=["direct", "batched", "cached"])
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--embed-delay", type=float, default=0.02, help="Stub latency per embed call (s)")
+    parser.add_argument("--embed-delay-per-input", type=float, default=0.001, help="Stub latency per text (s)")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    stub, stub_url = start_stub_ollama(embed_delay=args.embed_delay, embed_delay_per_input=args.embed_delay_per_input)
+    try:
+        results = asyncio.run(run_grid(args, stub_url))
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+
+    write_report(args.output, {
+        "benchmark": "query_embedding",
+        "embed_delay_s": args.embed_delay,
+        "embed_delay_per_input_s": args.embed_delay_per_input,
+        "window_ms": args.window_ms,
+        "results": results,
+    }, args)
+
+
+if __name__ == "__main__":
+    main()
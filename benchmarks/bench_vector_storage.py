@@ -0,0 +1,171 @@
+"""
+Memory footprint, latency and recall of each vector storage.
+
+Fills the chunk table of the configured PostgreSQL + pgvector database (which
+is cleared first, like bench_corpus_scaling) with clustered 768-d vectors,
+the way real embeddings group by topic, then for every --storages entry
+rebuilds the ANN index on full, halfvec or binary vectors and reports the
+index and table size, vector search latency and recall@k against an exact
+full-precision search. Compact storages are measured at every
+--rescore-factors shortlist size. Question embeddings are generated, so no
+Ollama server is needed. halfvec and binary need pgvector 0.7.0+.
+
+Usage:
+    docker compose up -d
+    python -m benchmarks.bench_vector_storage --sizes 10000 100000 --queries 200 --output storage.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from sqlalchemy import text
+from benchmarks.common import percentile, write_report
+
+
+async def fill(size: int, centroids: list[list[float]], noise: float, dim: int, batch: int) -> None:
+    """
+    Inserts `size` chunks; chunk g is a noisy copy of centroid g % len(centroids).
+    """
+    from src.resources import get_engine
+    from src.store import get_collection_id
+
+    collection_id = await get_collection_id()
+    flat = [value for centroid in centroids for value in centroid]
+    async with get_engine().connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        # Reclaim the rows of the previous size so table_mb is comparable
+        await conn.execute(text("VACUUM langchain_pg_embedding"))
+    for low in range(0, size, batch):
+        high = min(size, low + batch) - 1
+        async with get_engine().begin() as conn:
+            await conn.execute(
+                text(
+                    "INSERT INTO langchain_pg_embedding (uuid, collection_id, embedding, document, cmetadata, custom_id) "
+                    "SELECT gen_random_uuid(), :collection_id, "
+                    "ARRAY(SELECT (CAST(:centroids AS float8[]))[(g % CAST(:clusters AS int)) * CAST(:dim AS int) + i] "
+                    "+ CAST(:noise AS float8) * (random() * 2 - 1) "
+                    "FROM generate_series(1, CAST(:dim AS int)) i)::vector, "
+                    "'chunk ' || g, jsonb_build_object('video_id', 'fixture' || lpad((g / 200)::text, 4, '0')), "
+                    "md5(g::text) "
+                    "FROM generate_series(CAST(:low AS int), CAST(:high AS int)) g"
+                ),
+                {"collection_id": collection_id, "centroids": flat, "clusters": len(centroids),
+                 "dim": dim, "noise": noise, "low": low, "high": high},
+            )
+        print(f"  {high + 1}/{size} chunks", flush=True)
+    async with get_engine().connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE langchain_pg_embedding"))
+
+
+async def exact_neighbours(vectors: list[list[float]], top_k: int) -> list[set[str]]:
+    """
+    Ground truth: the top_k chunks by full-precision distance, without the index.
+    """
+    from src.resources import get_engine
+    from src.store import to_pgvector
+
+    truth = []
+    async with get_engine().connect() as conn:
+        for vector in vectors:
+            rows = (await conn.execute(
+                text("SELECT uuid FROM langchain_pg_embedding ORDER BY embedding <=> CAST(:embedding AS vector) LIMIT :k"),
+                {"embedding": to_pgvector(vector), "k": top_k},
+            )).all()
+            truth.append({str(row.uuid) for row in rows})
+    return truth
+
+
+async def measure(vectors: list[list[float]], truth: list[set[str]], top_k: int, rescore_factor: int | None) -> dict:
+    from src.retriever import retrieve_context
+
+    latencies, recalls = [], []
+    for vector, expected in zip(vectors, truth):
+        started = time.perf_counter()
+        docs = await retrieve_context(
+            "", top_k=top_k, query_embedding=vector, lexical_weight=0.0, rerank=False, rescore_factor=rescore_factor,
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(len({doc.id for doc in docs} & expected) / len(expected))
+    return {
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "recall_at_k": round(statistics.fmean(recalls), 4),
+    }
+
+
+def noisy(rng: random.Random, centroid: list[float], noise: float) -> list[float]:
+    return [value + noise * rng.uniform(-1, 1) for value in centroid]
+
+
+async def run_grid(args) -> list[dict]:
+    from src.resources import init_resources, shutdown_resources, EMBEDDING_DIM
+    from src.store import init_schema, delete_all_chunks
+    from src.vector_index import VECTOR_BYTES, index_stats, maintain_vector_index
+
+    init_resources()
+    results = []
+    try:
+        await init_schema()
+        rng = random.Random(0)
+        centroids = [[rng.uniform(-1, 1) for _ in range(EMBEDDING_DIM)] for _ in range(args.clusters)]
+        for size in sorted(args.sizes):
+            await delete_all_chunks()
+            print(f"Filling the corpus with {size} chunks...", flush=True)
+            await fill(size, centroids, args.noise, EMBEDDING_DIM, args.batch)
+            vectors = [noisy(rng, rng.choice(centroids), args.noise) for _ in range(args.queries)]
+            truth = await exact_neighbours(vectors, args.top_k)
+
+            for storage in args.storages:
+                started = time.perf_counter()
+                try:
+                    outcome = await maintain_vector_index(force=True, storage=storage)
+                except Exception as e:
+                    print(f"  {storage}: skipped ({e})", flush=True)
+                    continue
+                build_s = round(time.perf_counter() - started, 2)
+                stats = await index_stats()
+                footprint = {
+                    "corpus_size": size,
+                    "storage": storage,
+                    "ann_index": stats["type"] if stats["built"] else "none",
+                    "bytes_per_vector": VECTOR_BYTES[storage],
+                    "index_mb": round((stats.get("size_bytes") or 0) / 1024 / 1024, 2),
+                    "table_mb": round((stats.get("table_bytes") or 0) / 1024 / 1024, 2),
+                    "build_s": build_s if outcome in ("created", "rebuilt") else 0.0,
+                }
+                factors = [None] if storage == "full" else args.rescore_factors
+                # Warm the pool, plan cache and index pages
+                await measure(vectors[:5], truth[:5], args.top_k, factors[0])
+                for factor in factors:
+                    result = {**footprint, "rescore_factor": factor or 1, **await measure(vectors, truth, args.top_k, factor)}
+                    results.append(result)
+                    print(json.dumps(result), flush=True)
+    finally:
+        await shutdown_resources()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Footprint, latency and recall of full / halfvec / binary vector storage")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--storages", nargs="+", choices=["full", "halfvec", "binary"], default=["full", "halfvec", "binary"])
+    parser.add_argument("--rescore-factors", type=int, nargs="+", default=[1, 2, 4, 10],
+                        help="Shortlist sizes (times the requested rows) for the compact storages")
+    parser.add_argument("--queries", type=int, default=200, help="Questions timed per size, storage and factor")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=100, help="Topics the generated vectors group around")
+    parser.add_argument("--noise", type=float, default=1.0, help="Spread of a chunk around its topic")
+    parser.add_argument("--batch", type=int, default=5000, help="Rows per INSERT while filling the corpus")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_grid(args))
+    write_report(args.output, {"benchmark": "vector_storage", "results": results}, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Helpers shared by the benchmarks: starting the stub Ollama server, waiting
+for services, percentiles and writing JSON reports with enough run metadata
+(commit, machine, arguments) to compare results across runs.
+"""
+import datetime
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def start_stub_ollama(embed_delay: float = 0.0, embed_delay_per_input: float = 0.0,
+                      chat_delay: float = 0.0, token_delay: float = 0.0, tokens: int = 50,
+                      env: dict | None = None, load_delay: float = 0.0) -> tuple[subprocess.Popen, str]:
+    """
+    Starts benchmarks.stub_ollama on a free port, points OLLAMA_BASE_URL at it
+    (for this process and `env`, if given) and waits until it answers.
+    Returns the process and its base URL; terminate the process when done.
+    """
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    os.environ["OLLAMA_BASE_URL"] = url
+    if env is not None:
+        env["OLLAMA_BASE_URL"] = url
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_ollama", "--port", str(port),
+         "--embed-delay", str(embed_delay), "--embed-delay-per-input", str(embed_delay_per_input),
+         "--chat-delay", str(chat_delay), "--token-delay", str(token_delay), "--tokens", str(tokens),
+         "--load-delay", str(load_delay)],
+        cwd=ROOT, env=env,
+    )
+    try:
+        wait_for(f"{url}/api/tags")
+    except Exception:
+        stub.terminate()
+        raise
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    return stub, url
+
+
+def git_revision() -> dict:
+    def git(*args) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=10,
+        ).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except (OSError, subprocess.SubprocessError):
+        return {"commit": None, "dirty": None}
+
+
+def run_metadata(args=None) -> dict:
+    """
+    Describes the run: when, on what code and machine, and with which arguments.
+    """
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        **git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {key: value for key, value in vars(args).items() if key != "output"} if args is not None else {},
+    }
+
+
+def write_report(path: str | None, report: dict, args=None) -> None:
+    """
+    Writes a benchmark report as JSON, with the run metadata added under "run".
+    """
+    if not path:
+        return
+    with open(path, "w") as f:
+        json.dump({**report, "run": run_metadata(args)}, f, indent=2)
@@ -0,0 +1,110 @@
+"""
+Compares two benchmark result files (from run_suite or a single benchmark's
+--output) and prints the change of every latency and throughput metric.
+
+Result rows are matched on their parameters (concurrency, mode, corpus size,
+...). Metrics whose name ends in _ms / _s / _mb are better when lower,
+throughput and quality metrics (_per_sec, _rps, _per_min, recall, hit rate,
+saved_pct) when higher. Changes larger than --threshold percent are flagged.
+
+Usage:
+    python -m benchmarks.compare baseline.json current.json
+    python -m benchmarks.compare baseline.json current.json --threshold 15 --fail-on-regression
+"""
+import argparse
+import json
+
+# Fields that describe a result row rather than measure it
+PARAMETERS = (
+    "mode", "chunker", "hours", "minutes", "videos", "concurrency", "batch_size",
+    "corpus_size", "ann_index", "index", "hnsw.ef_search", "ivfflat.probes", "top_k", "budget",
+    "tokenizer", "weight", "lexical_weight", "k", "storage", "rescore_factor",
+)
+LOWER_IS_BETTER = ("_ms", "_s", "_mb", "_ms_mean")
+HIGHER_IS_BETTER = ("_per_sec", "_rps", "_per_min", "recall_at_k", "hit_rate", "saved_pct", "mrr")
+
+
+def direction(metric: str) -> int:
+    """
+    -1 if lower is better, 1 if higher is better, 0 if the field isn't compared.
+    """
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER) and metric != "wall_s":
+        return -1
+    return 0
+
+
+def load_benchmarks(path: str) -> dict[str, dict]:
+    with open(path) as f:
+        data = json.load(f)
+    if "benchmarks" in data:
+        return data["benchmarks"]
+    return {data.get("benchmark", path): data}
+
+
+def row_key(row: dict) -> tuple:
+    return tuple((name, row[name]) for name in PARAMETERS if name in row)
+
+
+def compare(baseline: dict[str, dict], current: dict[str, dict], threshold: float) -> list[dict]:
+    changes = []
+    for name, report in current.items():
+        if name not in baseline or "error" in report or "error" in baseline[name]:
+            continue
+        before_rows = {row_key(row): row for row in baseline[name].get("results", [])}
+        for row in report.get("results", []):
+            before = before_rows.get(row_key(row))
+            if before is None:
+                continue
+            for metric, value in row.items():
+                sign = direction(metric)
+                old = before.get(metric)
+                if not sign or not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                    continue
+                change_pct = (value - old) / abs(old) * 100
+                changes.append({
+                    "benchmark": name,
+                    "params": ", ".join(f"{k}={v}" for k, v in row_key(row)),
+                    "metric": metric,
+                    "baseline": old,
+                    "current": value,
+                    "change_pct": round(change_pct, 1),
+                    "regression": change_pct * sign < -threshold,
+                    "improvement": change_pct * sign > threshold,
+                })
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change worth flagging")
+    parser.add_argument("--all", action="store_true", help="Also list changes within the threshold")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on any regression")
+    parser.add_argument("--output", help="Write the comparison as JSON to this file")
+    args = parser.parse_args()
+
+    changes = compare(load_benchmarks(args.baseline), load_benchmarks(args.current), args.threshold)
+    for change in changes:
+        if not (args.all or change["regression"] or change["improvement"]):
+            continue
+        flag = "REGRESSION" if change["regression"] else "improved" if change["improvement"] else ""
+        print(
+            f"{change['benchmark']:<20} {change['params']:<45} {change['metric']:<22} "
+            f"{change['baseline']:>10} -> {change['current']:<10} {change['change_pct']:+7.1f}%  {flag}"
+        )
+    regressions = sum(change["regression"] for change in changes)
+    improvements = sum(change["improvement"] for change in changes)
+    print(f"{len(changes)} metrics compared: {regressions} regressions, {improvements} improvements "
+          f"(threshold {args.threshold:g}%).")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"threshold_pct": args.threshold, "changes": changes}, f, indent=2)
+    raise SystemExit(1 if args.fail_on_regression and regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
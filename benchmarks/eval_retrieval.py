@@ -0,0 +1,124 @@
+"""
+Offline retrieval evaluation: recall@k, MRR and latency per lexical/vector mix.
+
+Runs retrieve_context against the chunks already stored in PostgreSQL, for a
+range of lexical_weight values (0 = the previous pure-vector retriever,
+1 = full-text only, in between = hybrid with reciprocal rank fusion).
+
+Queries come from a JSONL file ({"question": ..., "relevant_text": ...,
+optional "video_id"}; a chunk is relevant if it contains relevant_text), or
+are generated as known-item queries: a random run of words taken from a
+stored chunk, whose relevant chunks are the ones containing that run.
+Generated queries favour exact wording, so also evaluate on real questions.
+
+Embeddings come from OLLAMA_BASE_URL: use the real Ollama for meaningful
+vector results; the stub server (random-like vectors) only checks plumbing.
+
+Usage:
+    python -m benchmarks.eval_retrieval --weights 0 0.25 0.5 0.75 1 --k 4 --queries 200
+    python -m benchmarks.eval_retrieval --query-file questions.jsonl --output eval.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from sqlalchemy import text
+from benchmarks.common import write_report
+
+
+async def load_queries(args) -> list[dict]:
+    from src.resources import get_engine
+
+    async with get_engine().connect() as conn:
+        if args.query_file:
+            with open(args.query_file) as f:
+                queries = [json.loads(line) for line in f if line.strip()]
+            for query in queries:
+                query["relevant"] = set((await conn.execute(
+                    text("SELECT CAST(uuid AS text) FROM langchain_pg_embedding WHERE strpos(document, :needle) > 0"),
+                    {"needle": query["relevant_text"]},
+                )).scalars().all())
+            return [q for q in queries if q["relevant"]]
+
+        rows = (await conn.execute(
+            text("SELECT document FROM langchain_pg_embedding ORDER BY md5(CAST(uuid AS text) || :seed) LIMIT :n"),
+            {"seed": str(args.seed), "n": args.queries},
+        )).scalars().all()
+        rng = random.Random(args.seed)
+        queries = []
+        for document in rows:
+            words = document.split()
+            if len(words) < args.query_words:
+                continue
+            start = rng.randrange(len(words) - args.query_words + 1)
+            needle = " ".join(words[start:start + args.query_words])
+            relevant = set((await conn.execute(
+                text("SELECT CAST(uuid AS text) FROM langchain_pg_embedding WHERE strpos(document, :needle) > 0"),
+                {"needle": needle},
+            )).scalars().all())
+            queries.append({"question": needle, "relevant": relevant})
+        return queries
+
+
+async def evaluate(args) -> list[dict]:
+    from src.resources import init_resources, shutdown_resources, get_embeddings
+    from src.retriever import retrieve_context
+
+    init_resources()
+    queries = await load_queries(args)
+    print(f"Evaluating {len(queries)} queries at k={args.k}...", flush=True)
+
+    # Embed once up front so every mix is timed on retrieval alone
+    embeddings = await get_embeddings().aembed_documents([q["question"] for q in queries])
+
+    results = []
+    for weight in args.weights:
+        recalls, hits, reciprocal_ranks, latencies = [], [], [], []
+        for query, embedding in zip(queries, embeddings):
+            started = time.perf_counter()
+            docs = await retrieve_context(
+                query["question"], top_k=args.k, video_id=query.get("video_id"),
+                query_embedding=embedding, lexical_weight=weight,
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            ids = [doc.id for doc in docs]
+            found = [i for i in ids if i in query["relevant"]]
+            recalls.append(len(found) / min(len(query["relevant"]), args.k))
+            hits.append(1.0 if found else 0.0)
+            reciprocal_ranks.append(next((1 / (rank + 1) for rank, i in enumerate(ids) if i in query["relevant"]), 0.0))
+        latencies.sort()
+        result = {
+            "lexical_weight": weight,
+            "k": args.k,
+            "queries": len(queries),
+            "recall_at_k": round(statistics.fmean(recalls), 4),
+            "hit_rate_at_k": round(statistics.fmean(hits), 4),
+            "mrr": round(statistics.fmean(reciprocal_ranks), 4),
+            "p50_ms": round(latencies[len(latencies) // 2], 2),
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        }
+        results.append(result)
+        print(json.dumps(result), flush=True)
+    await shutdown_resources()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid vs vector retrieval evaluation")
+    parser.add_argument("--weights", type=float, nargs="+", default=[0.0, 0.25, 0.5, 0.75, 1.0])
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200, help="Generated queries (without --query-file)")
+    parser.add_argument("--query-words", type=int, default=6, help="Words per generated query")
+    parser.add_argument("--query-file", help="JSONL with question / relevant_text / video_id")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(evaluate(args))
+    write_report(args.output, {"benchmark": "retrieval_eval", "results": results}, args)
+
+
+if __name__ == "__main__":
+    main()
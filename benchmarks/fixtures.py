@@ -0,0 +1,96 @@
+"""
+Deterministic fixture transcripts for the benchmarks.
+
+Transcripts are generated rather than checked in: the same arguments and
+seed always produce the same segments, shaped like YouTube captions (a
+segment every ~3 s, 5-10 words each). Each fixture video mixes common filler
+words with a few topic words of its own, so full-text search and the
+fixture questions have something to match.
+"""
+import random
+
+WORDS = (
+    "so the index the query planner uses a sequential scan when the table is small "
+    "and switches to the index once the selectivity is low enough which we measure here"
+).split()
+
+TOPICS = (
+    "vacuum", "replication", "partitioning", "sharding", "caching", "latency", "throughput",
+    "embedding", "tokenizer", "transformer", "gradient", "overfitting", "regularization",
+    "compiler", "scheduler", "allocator", "kernel", "network", "compression", "encryption",
+    "checkpoint", "consensus", "quantization", "attention",
+)
+
+
+def synthetic_segments(hours: float, seed: int = 0, topics: tuple[str, ...] = (), topic_rate: float = 0.0) -> list[dict]:
+    """
+    Caption segments covering `hours` of video. With `topics`, roughly
+    `topic_rate` of the words are drawn from them instead of the filler words.
+    """
+    rng = random.Random(seed)
+    segments, t = [], 0.0
+    while t < hours * 3600:
+        duration = rng.uniform(2.0, 4.0)
+        words = [
+            rng.choice(topics) if topics and rng.random() < topic_rate else rng.choice(WORDS)
+            for _ in range(rng.randint(5, 10))
+        ]
+        segments.append({"text": " ".join(words), "start": round(t, 2), "duration": round(duration, 2)})
+        t += duration
+    return segments
+
+
+def segments_text(segments: list[dict]) -> str:
+    """
+    The whole transcript as one string, as ingestion built it before chunking by segment.
+    """
+    return " ".join(seg["text"] for seg in segments)
+
+
+def fixture_video_id(index: int) -> str:
+    # 11 characters, like a YouTube id
+    return f"fixture{index:04d}"
+
+
+def video_topics(index: int) -> tuple[str, ...]:
+    return tuple(TOPICS[(index * 3 + offset) % len(TOPICS)] for offset in range(3))
+
+
+def fixture_transcripts(videos: int, minutes: float = 30, seed: int = 0) -> dict[str, list[dict]]:
+    """
+    {video_id: segments} for `videos` fixture videos of `minutes` each.
+    """
+    return {
+        fixture_video_id(i): synthetic_segments(minutes / 60, seed=seed * 100003 + i, topics=video_topics(i), topic_rate=0.15)
+        for i in range(videos)
+    }
+
+
+def fixture_questions(videos: int, count: int, seed: int = 0) -> list[dict]:
+    """
+    `count` questions about the fixture videos, each scoped to the video whose
+    topics it mentions: [{"question": ..., "video_id": ...}].
+    """
+    rng = random.Random(seed)
+    questions = []
+    for _ in range(count):
+        index = rng.randrange(videos)
+        topic = rng.choice(video_topics(index))
+        template = rng.choice((
+            "What does the speaker say about {}?",
+            "How is {} explained in this video?",
+            "Why does {} matter here?",
+        ))
+        questions.append({"question": template.format(topic), "video_id": fixture_video_id(index)})
+    return questions
+
+
+async def seed_transcript_store(transcripts: dict[str, list[dict]], language: str = "en") -> None:
+    """
+    Saves fixture transcripts in the raw-transcript store, so ingest_video
+    reads them from Postgres instead of YouTube.
+    """
+    from src.store import save_transcript
+
+    for video_id, segments in transcripts.items():
+        await save_transcript(video_id, segments, language)
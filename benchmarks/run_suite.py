@@ -0,0 +1,121 @@
+"""
+Runs the benchmark suite and writes every result into one JSON file.
+
+Each benchmark runs as its own process (fresh module-level settings and
+connection pools) with the arguments of the chosen profile:
+  quick  small sizes, a few minutes in total, for checking a change
+  full   the sizes quoted in the README
+Everything runs offline against the stub Ollama server and fixture
+transcripts; the database benchmarks need a local PostgreSQL + pgvector and
+clear its chunk table. The file records the commit and machine, so two runs
+can be compared with benchmarks.compare.
+
+Usage:
+    docker compose up -d
+    python -m benchmarks.run_suite --profile quick
+    python -m benchmarks.run_suite --profile full --skip ask_concurrency --output full.json
+    python -m benchmarks.run_suite --no-db
+"""
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.common import ROOT, git_revision, run_metadata
+
+# name: (module, needs a database, {profile: arguments})
+BENCHMARKS = {
+    "chunking": ("bench_chunking", False, {
+        "quick": ["--hours", "1", "3", "--repeat", "2"],
+        "full": ["--hours", "1", "3", "10", "--repeat", "3"],
+    }),
+    "context_packing": ("bench_context_packing", False, {
+        "quick": ["--top-k", "4", "8", "--budget", "1000", "1500"],
+        "full": ["--top-k", "4", "8", "--budget", "1000", "1500", "3000"],
+    }),
+    "query_embedding": ("bench_query_embedding", False, {
+        "quick": ["--concurrency", "1", "16", "--requests", "500"],
+        "full": ["--concurrency", "1", "16", "64", "--requests", "2000"],
+    }),
+    "embedding_pipeline": ("bench_embedding_pipeline", True, {
+        "quick": ["--chunks", "500", "--batch-sizes", "8", "32", "--concurrency", "1", "4", "--with-db"],
+        "full": ["--chunks", "2000", "--batch-sizes", "1", "8", "32", "64", "--concurrency", "1", "2", "4", "8", "--with-db"],
+    }),
+    "ingest": ("bench_ingest", True, {
+        "quick": ["--minutes", "10", "60", "--videos", "4"],
+        "full": ["--minutes", "10", "60", "180", "--videos", "8"],
+    }),
+    "corpus_scaling": ("bench_corpus_scaling", True, {
+        "quick": ["--sizes", "1000", "10000", "--queries", "50"],
+        "full": ["--sizes", "1000", "10000", "100000", "--queries", "200"],
+    }),
+    "vector_storage": ("bench_vector_storage", True, {
+        "quick": ["--sizes", "10000", "--queries", "50"],
+        "full": ["--sizes", "10000", "100000", "--queries", "200"],
+    }),
+    "ask_concurrency": ("bench_concurrency", True, {
+        "quick": ["--concurrency", "1", "16", "--videos", "5", "--chat-delay", "0.2"],
+        "full": ["--concurrency", "1", "16", "64", "--chat-delay", "0.5"],
+    }),
+    "cold_start": ("bench_cold_start", True, {
+        "quick": ["--repeat", "1", "--load-delay", "1"],
+        "full": ["--repeat", "3", "--load-delay", "2"],
+    }),
+}
+
+
+def run_benchmark(name: str, profile: str, workdir: str) -> dict:
+    module, _, profiles = BENCHMARKS[name]
+    output = os.path.join(workdir, f"{name}.json")
+    command = [sys.executable, "-m", f"benchmarks.{module}", *profiles[profile], "--output", output]
+    print(f"== {name}: {' '.join(command[2:])}", flush=True)
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=ROOT)
+    elapsed = round(time.perf_counter() - started, 1)
+    if completed.returncode != 0 or not os.path.exists(output):
+        return {"benchmark": name, "error": f"exited with status {completed.returncode}", "wall_s": elapsed}
+    with open(output) as f:
+        report = json.load(f)
+    # The suite records the run once; keep only this benchmark's arguments
+    report["args"] = report.pop("run", {}).get("args", {})
+    report["wall_s"] = elapsed
+    return report
+
+
+def default_output() -> str:
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    commit = (git_revision()["commit"] or "unknown")[:10]
+    return os.path.join(ROOT, ".cache", "benchmarks", f"{stamp}-{commit}.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and collect the results as JSON")
+    parser.add_argument("--profile", choices=["quick", "full"], default="quick")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run just these benchmarks")
+    parser.add_argument("--skip", nargs="+", choices=list(BENCHMARKS), default=[])
+    parser.add_argument("--no-db", action="store_true", help="Skip the benchmarks that need PostgreSQL")
+    parser.add_argument("--output", help="Result file (default .cache/benchmarks/<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    names = [
+        name for name, (_, needs_db, _) in BENCHMARKS.items()
+        if (not args.only or name in args.only) and name not in args.skip and not (args.no_db and needs_db)
+    ]
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as workdir:
+        reports = {name: run_benchmark(name, args.profile, workdir) for name in names}
+
+    output = args.output or default_output()
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"suite": args.profile, "run": run_metadata(args), "benchmarks": reports}, f, indent=2)
+
+    failed = [name for name, report in reports.items() if "error" in report]
+    print(f"Wrote {output}" + (f" ({len(failed)} failed: {', '.join(failed)})" if failed else ""))
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
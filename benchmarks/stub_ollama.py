@@ -0,0 +1,154 @@
+"""
+Stub Ollama server for offline benchmarks.
+
+Implements the subset of the Ollama HTTP API the pipeline uses
+(/api/embed, /api/chat, /api/generate, /api/tags) with deterministic
+embeddings and a configurable artificial latency, so benchmarks measure our
+own overhead and concurrency behaviour rather than model speed. With
+--load-delay the first request for each model also waits, like Ollama
+loading the model into memory.
+
+Usage:
+    python -m benchmarks.stub_ollama --port 11435 --embed-delay 0.02 --chat-delay 0.5 --load-delay 3
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+EMBEDDING_DIM = 768
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> list[float]:
+    """
+    Deterministic unit-length embedding derived from a hash of the text.
+    Identical texts always map to identical vectors.
+    """
+    values = []
+    counter = 0
+    while len(values) < dim:
+        digest = hashlib.sha256(f"{counter}:{text}".encode()).digest()
+        values.extend((b - 127.5) / 127.5 for b in digest)
+        counter += 1
+    values = values[:dim]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+def create_app(embed_delay: float = 0.0, chat_delay: float = 0.0, tokens: int = 50,
+               token_delay: float = 0.0, embed_delay_per_input: float = 0.0, load_delay: float = 0.0) -> FastAPI:
+    """
+    Builds the stub app. Delays are in seconds:
+    embed_delay per /api/embed call plus embed_delay_per_input per text in it,
+    chat_delay before the first token, token_delay between streamed tokens,
+    load_delay once per model (concurrent first requests share the wait).
+    """
+    app = FastAPI()
+    state = {"embed_calls": 0, "embed_inputs": 0, "chat_calls": 0, "tokens_streamed": 0, "models_loaded": 0}
+    loading: dict[str, asyncio.Task] = {}
+
+    async def load(model: str) -> None:
+        if not load_delay:
+            return
+        if model not in loading:
+            state["models_loaded"] += 1
+            loading[model] = asyncio.create_task(asyncio.sleep(load_delay))
+        await asyncio.shield(loading[model])
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": []}
+
+    @app.get("/stats")
+    async def stats():
+        return state
+
+    @app.post("/api/embed")
+    async def embed(request: Request):
+        body = await request.json()
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        state["embed_calls"] += 1
+        state["embed_inputs"] += len(inputs)
+        await load(body.get("model"))
+        if embed_delay or embed_delay_per_input:
+            await asyncio.sleep(embed_delay + embed_delay_per_input * len(inputs))
+        return {"model": body.get("model"), "embeddings": [fake_embedding(t) for t in inputs]}
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        state["chat_calls"] += 1
+        model = body.get("model")
+        await load(model)
+        prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+        words = [f"token{i}" for i in range(tokens)]
+        if "JSON format" in prompt:
+            # Summary prompts expect a JSON object back
+            words = json.dumps({
+                "title": "Stub Video Title",
+                "suggested_questions": ["What is covered?", "Why does it matter?", "How does it work?"],
+            }).split(" ")
+
+        def frame(content: str, done: bool) -> dict:
+            message = {
+                "model": model,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "message": {"role": "assistant", "content": content},
+                "done": done,
+            }
+            if done:
+                message.update({"done_reason": "stop", "prompt_eval_count": len(prompt.split()),
+                                "eval_count": len(words)})
+            return message
+
+        if not body.get("stream", True):
+            await asyncio.sleep(chat_delay + token_delay * len(words))
+            return JSONResponse(frame(" ".join(words), True))
+
+        async def stream():
+            await asyncio.sleep(chat_delay)
+            for i, word in enumerate(words):
+                yield json.dumps(frame(word if i == 0 else " " + word, False)) + "\n"
+                state["tokens_streamed"] += 1
+                if token_delay:
+                    await asyncio.sleep(token_delay)
+            yield json.dumps(frame("", True)) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        # Only the empty-prompt form, which loads the model without generating
+        body = await request.json()
+        await load(body.get("model"))
+        return {"model": body.get("model"), "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "response": "", "done": True, "done_reason": "load"}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Ollama server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--embed-delay", type=float, default=0.0)
+    parser.add_argument("--embed-delay-per-input", type=float, default=0.0)
+    parser.add_argument("--chat-delay", type=float, default=0.0)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--load-delay", type=float, default=0.0, help="Seconds to 'load' each model on first use")
+    args = parser.parse_args()
+    app = create_app(args.embed_delay, args.chat_delay, args.tokens, args.token_delay,
+                     args.embed_delay_per_input, args.load_delay)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -76,6 +76,7 @@ export default function ChatPanel({
                     ...updated[idx],
                     content: result.data?.answer ?? result.error ?? "Unknown error occurred.",
                     sources: result.data?.sources,
+                    citations: result.data?.citations,
                     isLoading: false,
                 };
             }
@@ -112,6 +113,15 @@ export default function ChatPanel({
         return date.toLocaleTimeString([], { hour: "2-digit", minute: "2-digit" });
     }
 
+    // Seconds into the video → "m:ss" or "h:mm:ss"
+    function formatOffset(seconds: number) {
+        const total = Math.floor(seconds);
+        const h = Math.floor(total / 3600);
+        const m = Math.floor((total % 3600) / 60);
+        const s = String(total % 60).padStart(2, "0");
+        return h > 0 ? `${h}:${String(m).padStart(2, "0")}:${s}` : `${m}:${s}`;
+    }
+
     // Display name for the banner
     const displayName = selectedVideoTitle ?? selectedVideoId ?? "All videos";
 
@@ -163,7 +173,22 @@ export default function ChatPanel({
                                     msg.content
                                 )}
                             </div>
-                            {msg.sources && msg.sources.length > 0 && (
+                            {msg.citations && msg.citations.length > 0 ? (
+                                <div className="message-sources">
+                                    {msg.citations.map((c) => (
+                                        <a
+                                            className="source-pill"
+                                            key={c.url}
+                                            href={c.url}
+                                            target="_blank"
+                                            rel="noopener noreferrer"
+                                        >
+                                            📹 {c.video_id}
+                                            {c.start != null && ` @ ${formatOffset(c.start)}`}
+                                        </a>
+                                    ))}
+                                </div>
+                            ) : msg.sources && msg.sources.length > 0 && (
                                 <div className="message-sources">
                                     {msg.sources.map((s) => (
                                         <span className="source-pill" key={s}>
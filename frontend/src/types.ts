@@ -17,9 +17,18 @@ export interface AskRequest {
   video_id?: string;
 }
 
+export interface Citation {
+  video_id: string;
+  start?: number | null;
+  end?: number | null;
+  url: string;
+}
+
 export interface AskResponse {
   answer: string;
   sources: string[];
+  citations?: Citation[];
+  cached?: boolean;
 }
 
 export interface HealthResponse {
@@ -47,6 +56,7 @@ export interface ChatMessage {
   role: "user" | "assistant";
   content: string;
   sources?: string[];
+  citations?: Citation[];
   timestamp: Date;
   isLoading?: boolean;
 }
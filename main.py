@@ -1,30 +1,78 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager, aclosing
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional
+from uuid import UUID
+from sqlalchemy import text
 from dotenv import load_dotenv
 import uvicorn
 import logging
+import asyncio
+import json
+import time
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Import our custom modules from the src directory
-from src.ingest import extract_video_id, fetch_youtube_transcript
-from src.chunker import chunk_text
-from src.store import store_documents, check_video_exists, delete_video_chunks, delete_all_chunks
-from src.retriever import retrieve_context
-from src.generator import generate_answer, generate_video_summary
+from src.resources import init_resources, shutdown_resources, get_engine, pool_stats, run_blocking, run_in_background
+from src.ingest import extract_video_id, extract_playlist_id, fetch_playlist_video_ids
+from src.store import (
+    init_schema, delete_all_chunks, get_precomputed_answer, transcript_store_stats, summary_cache_stats,
+    save_video_collection, get_video_collection, list_video_collections, delete_video_collection,
+)
+from src.pipeline import ingest_video as ingest_video_pipeline, IngestionError, TranscriptUnavailableError
+from src.jobs import submit_job, get_job, start_job_workers, stop_job_workers
+from src.embedding_cache import get_embedding_cache, close_embedding_cache
+from src.answer_cache import ANSWER_CACHE_ENABLED, CachedAnswer, get_answer_cache
+from src.query_embeddings import embed_question, get_query_embedder
+from src.retriever import MAX_VIDEOS_PER_QUESTION, retrieve_context, retrieval_settings, build_citations
+from src.vector_index import maintain_index_in_background, index_stats
+from src.generator import generate_answer, stream_answer
+from src.summarizer import summary_stats
+from src.llm_scheduler import LLMOverloadedError, get_llm_scheduler
+from src.telemetry import span, trace
+from src.warmup import WARMUP_ENABLED, warm_up, mark_ready, readiness
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Creates the shared DB pool, Ollama clients and executor once at startup,
+    and releases them cleanly at shutdown.
+    """
+    logger.info("Initialising shared resources...")
+    init_resources()
+    try:
+        await init_schema()
+    except Exception as e:
+        # The database may not be up yet; the schema is created lazily on first use.
+        logger.warning(f"Could not initialise the database schema at startup: {e}")
+    run_in_background(maintain_index_in_background(force=True))
+    start_job_workers()
+    # The server accepts requests (and /health answers) while this runs; /ready waits for it
+    if WARMUP_ENABLED:
+        run_in_background(warm_up())
+    else:
+        mark_ready()
+    yield
+    logger.info("Shutting down shared resources...")
+    await stop_job_workers()
+    await shutdown_resources()
+    close_embedding_cache()
+
 # Initialize the FastAPI application
 app = FastAPI(
     title="YouTube RAG API",
     description="Backend for ingesting YouTube transcripts and answering queries using RAG.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # ---------------------------------------------------------
@@ -44,6 +92,19 @@ app.add_middleware(
 
 class IngestRequest(BaseModel):
     youtube_url: HttpUrl
+    # Download the transcript again even if a fresh copy is stored
+    refresh_transcript: bool = False
+
+class EmbeddingStats(BaseModel):
+    chunks_total: int
+    chunks_added: int
+    chunks_removed: int
+    chunks_unchanged: int
+    cache_hits: int
+    cache_misses: int
+    cache_hit_rate: float
+    embed_seconds: float
+    time_saved_seconds: float
 
 class IngestResponse(BaseModel):
     message: str
@@ -51,14 +112,80 @@ class IngestResponse(BaseModel):
     chunks_created: int
     title: str = "Untitled Video"
     suggested_questions: list[str] = []
+    embedding_stats: Optional[EmbeddingStats] = None
+    # "store" if the transcript came from the raw-transcript store, "youtube" if it was downloaded
+    transcript_source: Optional[str] = None
+
+class BatchIngestRequest(BaseModel):
+    youtube_urls: list[HttpUrl] = []
+    playlist_url: Optional[HttpUrl] = None
+
+class BatchIngestResponse(BaseModel):
+    message: str
+    job_id: str
+    videos_queued: int
+    invalid_urls: list[str] = []
+
+class JobVideoStatus(BaseModel):
+    video_id: str
+    status: str
+    stage: Optional[str] = None
+    attempts: int
+    error: Optional[str] = None
+    chunks_created: Optional[int] = None
+    title: Optional[str] = None
+    suggested_questions: list[str] = []
+    next_attempt_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+class JobResponse(BaseModel):
+    job_id: str
+    playlist_id: Optional[str] = None
+    created_at: str
+    status: str
+    total: int
+    pending: int
+    running: int
+    done: int
+    failed: int
+    videos: list[JobVideoStatus] = []
 
 class AskRequest(BaseModel):
     question: str
     video_id: Optional[str] = None
+    # Ask across several videos at once: explicit ids and/or a named collection
+    video_ids: list[str] = []
+    collection: Optional[str] = None
+    # Optional ANN recall knobs for this query (HNSW ef_search / IVFFlat probes)
+    ef_search: Optional[int] = None
+    probes: Optional[int] = None
+    # Mix of full-text vs vector ranking for this query (0 = vector only, 1 = full-text only)
+    lexical_weight: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+    # Over-retrieve and rerank on CPU before generation (default RERANK_ENABLED)
+    rerank: Optional[bool] = None
+
+class Citation(BaseModel):
+    video_id: str
+    start: Optional[float] = None
+    end: Optional[float] = None
+    url: str
 
 class AskResponse(BaseModel):
     answer: str
     sources: list[str] = []
+    # Deep links (?t=) to the moments in the videos the answer was built from
+    citations: list[Citation] = []
+    # The same citations grouped per video, for questions spanning several videos
+    sources_by_video: dict[str, list[Citation]] = {}
+    cached: bool = False
+
+class CollectionRequest(BaseModel):
+    video_ids: list[str]
+
+class CollectionResponse(BaseModel):
+    name: str
+    video_ids: list[str]
 
 class DeleteResponse(BaseModel):
     message: str
@@ -69,6 +196,26 @@ class HealthResponse(BaseModel):
     database: str
     message: str
 
+class ReadyResponse(BaseModel):
+    ready: bool
+    # "starting", "warming_up" or "ready"
+    status: str
+    warmup_enabled: bool
+    attempts: int
+    elapsed_ms: Optional[float] = None
+    # Duration (and error, if it failed) of each warmup step
+    steps: dict = {}
+
+class StatsResponse(BaseModel):
+    pool: dict
+    vector_index: dict = {}
+    embedding_cache: dict = {}
+    answer_cache: dict = {}
+    transcript_store: dict = {}
+    query_embeddings: dict = {}
+    video_summaries: dict = {}
+    llm_scheduler: dict = {}
+
 # ---------------------------------------------------------
 # API Endpoints
 # ---------------------------------------------------------
@@ -89,16 +236,64 @@ async def health_check():
     Health check endpoint to verify the API and database are operational.
     """
     try:
-        from sqlalchemy import create_engine, text
-        from src.store import DB_CONNECTION_STRING
-        engine = create_engine(DB_CONNECTION_STRING)
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+        async with get_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
         return HealthResponse(status="healthy", database="connected", message="All systems operational.")
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return HealthResponse(status="unhealthy", database="disconnected", message=f"Database error: {str(e)}")
 
+@app.get("/ready", response_model=ReadyResponse)
+async def ready_check(response: Response):
+    """
+    Readiness probe, separate from the /health liveness check: 503 until the
+    startup warmup (models loaded in Ollama, DB connections open) has finished,
+    so a new replica only gets traffic once its first request will be fast.
+    """
+    state = readiness()
+    if not state["ready"]:
+        response.status_code = 503
+    return ReadyResponse(**state)
+
+@app.get("/stats", response_model=StatsResponse)
+async def stats():
+    """
+    Reports usage of the shared database connection pool, the ANN index state,
+    the embedding cache, the answer cache, the raw-transcript store, the
+    query embedding cache / micro-batcher, the video summary cache and the
+    LLM scheduler (slots in use, queue depth, rejections).
+    """
+    try:
+        vector_index = await index_stats()
+    except Exception as e:
+        vector_index = {"error": str(e)}
+    try:
+        transcript_store = await transcript_store_stats()
+    except Exception as e:
+        transcript_store = {"error": str(e)}
+    try:
+        video_summaries = {**summary_stats(), "stored": await summary_cache_stats()}
+    except Exception as e:
+        video_summaries = {**summary_stats(), "error": str(e)}
+    return StatsResponse(
+        pool=pool_stats(),
+        vector_index=vector_index,
+        embedding_cache=get_embedding_cache().stats(),
+        answer_cache=get_answer_cache().stats(),
+        transcript_store=transcript_store,
+        query_embeddings=get_query_embedder().stats(),
+        video_summaries=video_summaries,
+        llm_scheduler=get_llm_scheduler().stats(),
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics: per-stage and end-to-end latency histograms for ingest
+    and ask, LLM token counts, DB pool usage and cache hit counts.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.post("/ingest", response_model=IngestResponse)
 async def ingest_video(request: IngestRequest):
     """
@@ -112,45 +307,77 @@ async def ingest_video(request: IngestRequest):
     if not video_id:
         raise HTTPException(status_code=400, detail="Invalid YouTube URL provided.")
     
-    # Step 1.5 - Delete old chunks if video was previously ingested
-    if check_video_exists(video_id):
-        logger.info(f"Video {video_id} already exists, deleting old chunks before re-ingest...")
-        delete_video_chunks(video_id)
-        
-    # Step 2 - Download transcript
-    logger.info(f"Fetching transcript for video: {video_id}")
-    transcript_text = fetch_youtube_transcript(video_id)
-    if not transcript_text:
+    # Steps 2-6 - Transcript, chunking, embedding + storage, title and questions
+    try:
+        result = await ingest_video_pipeline(video_id, refresh_transcript=request.refresh_transcript)
+    except TranscriptUnavailableError:
         raise HTTPException(
             status_code=404, 
             detail="Transcript not found or subtitles are disabled for this video."
         )
-        
-    # Step 3 - Chunking
-    chunks = chunk_text(transcript_text, video_id)
-    logger.info(f"Created {len(chunks)} chunks for video {video_id}")
-    
-    # Step 4 & 5 - Generate embeddings and Store (PostgreSQL)
-    try:
-        num_chunks = store_documents(chunks)
-    except Exception as e:
-        logger.error(f"Failed to store embeddings for {video_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to store embeddings: {str(e)}")
-    
-    logger.info(f"Successfully ingested video {video_id} with {num_chunks} chunks.")
-    
-    # Step 6 - Generate title and suggested questions from transcript
-    logger.info(f"Generating title and questions for {video_id}...")
-    summary = generate_video_summary(transcript_text)
+    except IngestionError as e:
+        logger.error(f"Failed to ingest {video_id} during {e.stage}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
     
     return IngestResponse(
         message="Transcript fetched, chunked, embedded, and stored successfully!",
         video_id=video_id,
-        chunks_created=num_chunks,
-        title=summary["title"],
-        suggested_questions=summary["suggested_questions"]
+        chunks_created=result["chunks_created"],
+        title=result["title"],
+        suggested_questions=result["suggested_questions"],
+        embedding_stats=EmbeddingStats(**result["embedding_stats"]),
+        transcript_source=result["transcript_source"],
+    )
+
+@app.post("/ingest/batch", response_model=BatchIngestResponse, status_code=202)
+async def ingest_batch(request: BatchIngestRequest):
+    """
+    Queues many videos (a list of URLs and/or a playlist) for background
+    ingestion and returns immediately with a job id to poll at /jobs/{job_id}.
+    """
+    video_ids = []
+    invalid_urls = []
+    for url in request.youtube_urls:
+        video_id = extract_video_id(str(url))
+        if video_id:
+            video_ids.append(video_id)
+        else:
+            invalid_urls.append(str(url))
+
+    playlist_id = None
+    if request.playlist_url:
+        playlist_id = extract_playlist_id(str(request.playlist_url))
+        if not playlist_id:
+            raise HTTPException(status_code=400, detail="Invalid YouTube playlist URL provided.")
+        playlist_videos = await run_blocking(fetch_playlist_video_ids, playlist_id)
+        if not playlist_videos:
+            raise HTTPException(status_code=404, detail="Playlist not found, private or empty.")
+        video_ids.extend(playlist_videos)
+
+    if not video_ids:
+        raise HTTPException(status_code=400, detail="No valid YouTube URLs provided.")
+
+    job_id = await submit_job(video_ids, playlist_id=playlist_id)
+    videos_queued = len(set(video_ids))
+    logger.info(f"Queued ingestion job {job_id} with {videos_queued} videos.")
+    return BatchIngestResponse(
+        message="Videos queued for ingestion. Poll /jobs/{job_id} for progress.",
+        job_id=str(job_id),
+        videos_queued=videos_queued,
+        invalid_urls=invalid_urls
     )
 
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def job_status(job_id: UUID):
+    """
+    Reports the progress of an ingestion job, per video and per stage
+    (queued, fetching_transcript, chunking, embedding, summarizing, done).
+    """
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return JobResponse(**job)
+
 @app.delete("/videos", response_model=DeleteResponse)
 async def clear_all_videos():
     """
@@ -158,43 +385,283 @@ async def clear_all_videos():
     Use this to start fresh before ingesting new videos.
     """
     logger.info("Clearing all video chunks from the database...")
-    deleted = delete_all_chunks()
+    deleted = await delete_all_chunks()
     logger.info(f"Deleted {deleted} chunks.")
     return DeleteResponse(
         message=f"Successfully deleted all video data ({deleted} chunks removed).",
         deleted_count=deleted
     )
 
+@app.put("/collections/{name}", response_model=CollectionResponse)
+async def put_collection(name: str, request: CollectionRequest):
+    """
+    Creates or replaces a named set of videos (e.g. a lecture series) that
+    can be asked about together with {"collection": name}.
+    """
+    video_ids = list(dict.fromkeys(video_id.strip() for video_id in request.video_ids if video_id.strip()))
+    if not video_ids:
+        raise HTTPException(status_code=400, detail="A collection needs at least one video id.")
+    if len(video_ids) > MAX_VIDEOS_PER_QUESTION:
+        raise HTTPException(status_code=400, detail=f"A collection can have at most {MAX_VIDEOS_PER_QUESTION} videos.")
+    await save_video_collection(name, video_ids)
+    return CollectionResponse(name=name, video_ids=sorted(video_ids))
+
+@app.get("/collections", response_model=list[CollectionResponse])
+async def get_collections():
+    collections = await list_video_collections()
+    return [CollectionResponse(name=name, video_ids=video_ids) for name, video_ids in collections.items()]
+
+@app.get("/collections/{name}", response_model=CollectionResponse)
+async def get_collection(name: str):
+    video_ids = await get_video_collection(name)
+    if video_ids is None:
+        raise HTTPException(status_code=404, detail="Collection not found.")
+    return CollectionResponse(name=name, video_ids=video_ids)
+
+@app.delete("/collections/{name}")
+async def remove_collection(name: str):
+    if not await delete_video_collection(name):
+        raise HTTPException(status_code=404, detail="Collection not found.")
+    return {"message": f"Deleted collection {name}."}
+
+async def resolve_scope(request: AskRequest) -> list[str]:
+    """
+    The videos a question is about: video_id, video_ids and the members of
+    the named collection, combined. Empty means all videos.
+    """
+    scope = ([request.video_id] if request.video_id else []) + list(request.video_ids)
+    if request.collection:
+        members = await get_video_collection(request.collection)
+        if members is None:
+            raise HTTPException(status_code=404, detail=f"Collection '{request.collection}' not found.")
+        scope += members
+    scope = list(dict.fromkeys(scope))
+    if len(scope) > MAX_VIDEOS_PER_QUESTION:
+        raise HTTPException(status_code=400, detail=f"A question can span at most {MAX_VIDEOS_PER_QUESTION} videos.")
+    return scope
+
+def group_citations(citations: list[dict]) -> dict[str, list[dict]]:
+    grouped = {}
+    for citation in citations:
+        grouped.setdefault(citation["video_id"], []).append(citation)
+    return grouped
+
+def request_retrieval_settings(request: AskRequest) -> tuple:
+    return retrieval_settings(request.ef_search, request.probes, request.lexical_weight, request.rerank)
+
+async def lookup_cached_answer(request: AskRequest, scope: list[str]) -> tuple[Optional[CachedAnswer], Optional[list[float]]]:
+    """
+    Looks the question up in the answer cache: exact match first, then the
+    answers precomputed for suggested questions at ingest time, then (in
+    semantic mode) the closest previously answered question of the same scope
+    and retrieval settings.
+    Also returns the question embedding if one was computed, so retrieval
+    doesn't embed the question twice.
+    """
+    settings = request_retrieval_settings(request)
+    if ANSWER_CACHE_ENABLED:
+        cached = get_answer_cache().get(request.question, scope, settings)
+        if cached is not None:
+            return cached, None
+    precomputed = None
+    # Precomputed answers were built from one video's chunks with the default
+    # retrieval settings, so only a question scoped to that video can use them
+    if len(scope) == 1 and settings == retrieval_settings():
+        try:
+            precomputed = await get_precomputed_answer(request.question, scope[0])
+        except Exception as e:
+            logger.warning(f"Could not look up precomputed answers: {e}")
+    if precomputed is not None:
+        logger.info(f"Serving precomputed answer for video {precomputed['video_id']}.")
+        return CachedAnswer(
+            answer=precomputed["answer"], sources=precomputed["sources"],
+            citations=precomputed["citations"], scope=tuple(scope), cost_seconds=0.0,
+        ), None
+    if not ANSWER_CACHE_ENABLED:
+        return None, None
+    cache = get_answer_cache()
+    query_embedding = None
+    if cache.semantic:
+        query_embedding = await embed_question(request.question)
+        cached = cache.get_similar(query_embedding, scope, settings)
+        if cached is not None:
+            return cached, query_embedding
+    cache.record_miss()
+    return None, query_embedding
+
 @app.post("/ask", response_model=AskResponse)
 async def ask_question(request: AskRequest):
     """
     Receives a user question, performs a similarity search in PostgreSQL,
     and generates an answer using the configured LLM.
     """
-    try:
-        # Step 1 & 2 - Generate embedding for the question and perform similarity search
-        logger.info(f"Processing question: {request.question[:80]}...")
-        context_docs = retrieve_context(request.question, video_id=request.video_id)
-        
-        if not context_docs:
-            return AskResponse(
-                answer="No relevant transcripts found in the database. Please ingest some videos first.",
-                sources=[]
+    with trace("ask") as current:
+        try:
+            started = time.perf_counter()
+            logger.info(f"Processing question: {request.question[:80]}...")
+            scope = await resolve_scope(request)
+            with span("cache_lookup"):
+                cached, query_embedding = await lookup_cached_answer(request, scope)
+            if cached is not None:
+                logger.info("Answered from the answer cache.")
+                return AskResponse(
+                    answer=cached.answer, sources=cached.sources, citations=cached.citations,
+                    sources_by_video=group_citations(cached.citations), cached=True,
+                )
+            generation = get_answer_cache().generation
+
+            # Step 1 & 2 - Generate embedding for the question and perform similarity search
+            context_docs = await retrieve_context(
+                request.question, video_ids=scope,
+                ef_search=request.ef_search, probes=request.probes,
+                query_embedding=query_embedding, lexical_weight=request.lexical_weight,
+                rerank=request.rerank,
             )
+        
+            if not context_docs:
+                return AskResponse(
+                    answer="No relevant transcripts found in the database. Please ingest some videos first.",
+                    sources=[]
+                )
             
-        # Extract unique sources (video IDs) from metadata to return to the frontend
-        sources = list(set([doc.metadata.get("video_id", "Unknown") for doc in context_docs]))
+            # Extract unique sources (video IDs) from metadata to return to the frontend
+            sources = list(set([doc.metadata.get("video_id", "Unknown") for doc in context_docs]))
+            citations = build_citations(context_docs)
         
-        # Step 3 - Pass context and question to the LLM via LangChain
-        answer = generate_answer(request.question, context_docs)
+            # Step 3 - Pass context and question to the LLM via LangChain
+            answer = await generate_answer(request.question, context_docs)
+            logger.info(f"Stage latency (ms): {current.breakdown_ms()}")
+            if ANSWER_CACHE_ENABLED:
+                get_answer_cache().put(
+                    request.question, scope, answer, sources,
+                    cost_seconds=time.perf_counter() - started,
+                    embedding=query_embedding, generation=generation, citations=citations,
+                    settings=request_retrieval_settings(request),
+                )
         
-        return AskResponse(
-            answer=answer,
-            sources=sources
-        )
-    except Exception as e:
-        logger.error(f"Failed to process query: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to process query: {str(e)}")
+            return AskResponse(
+                answer=answer,
+                sources=sources,
+                citations=citations,
+                sources_by_video=group_citations(citations),
+            )
+        except HTTPException:
+            raise
+        except LLMOverloadedError as e:
+            logger.warning(f"Rejected question, LLM overloaded: {e}")
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        except Exception as e:
+            logger.error(f"Failed to process query: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to process query: {str(e)}")
+
+def _sse(event: str, data: dict) -> str:
+    """
+    Formats one Server-Sent-Events message.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/ask/stream")
+async def ask_question_stream(request: AskRequest, http_request: Request):
+    """
+    Streaming variant of /ask using Server-Sent Events.
+    Emits a 'sources' event right after retrieval, then 'token' events as the
+    LLM generates the answer, and a final 'done' event with timing metrics.
+    Generation is stopped as soon as the client disconnects.
+    """
+    # Resolved up front so an unknown collection is a plain 404, and an
+    # overloaded LLM queue a plain 503
+    scope = await resolve_scope(request)
+    try:
+        get_llm_scheduler().check_admission()
+    except LLMOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    async def event_stream():
+        with trace("ask_stream") as current:
+            started = time.perf_counter()
+            try:
+                logger.info(f"Streaming answer for question: {request.question[:80]}...")
+                cached, query_embedding = await lookup_cached_answer(request, scope)
+                if cached is not None:
+                    logger.info("Answered from the answer cache.")
+                    yield _sse("sources", {"sources": cached.sources, "citations": cached.citations})
+                    yield _sse("token", {"content": cached.answer})
+                    yield _sse("done", {"tokens": 1, "cached": True, "total_ms": round((time.perf_counter() - started) * 1000, 1)})
+                    return
+                generation = get_answer_cache().generation
+
+                context_docs = await retrieve_context(
+                    request.question, video_ids=scope,
+                    ef_search=request.ef_search, probes=request.probes,
+                    query_embedding=query_embedding, lexical_weight=request.lexical_weight,
+                    rerank=request.rerank,
+                )
+                sources = list(set([doc.metadata.get("video_id", "Unknown") for doc in context_docs]))
+                citations = build_citations(context_docs)
+                yield _sse("sources", {"sources": sources, "citations": citations})
+
+                if not context_docs:
+                    yield _sse("token", {"content": "No relevant transcripts found in the database. Please ingest some videos first."})
+                    yield _sse("done", {"tokens": 0})
+                    return
+
+                retrieval_done = time.perf_counter()
+                first_token_at = None
+                tokens = 0
+                answer_parts = []
+
+                def stream_metrics() -> dict:
+                    finished = time.perf_counter()
+                    generation_time = finished - (first_token_at or finished)
+                    return {
+                        "tokens": tokens,
+                        "retrieval_ms": round((retrieval_done - started) * 1000, 1),
+                        "time_to_first_token_ms": round(((first_token_at or finished) - started) * 1000, 1),
+                        "tokens_per_sec": round(tokens / generation_time, 2) if generation_time > 0 else None,
+                        "total_ms": round((finished - started) * 1000, 1),
+                        "stages_ms": current.breakdown_ms(),
+                    }
+
+                # aclosing() guarantees the Ollama stream is closed (and generation stops)
+                # when we stop early, including when the client goes away.
+                try:
+                    async with aclosing(stream_answer(request.question, context_docs)) as token_stream:
+                        async for token in token_stream:
+                            if await http_request.is_disconnected():
+                                logger.info(f"Client disconnected, stopped generation: {stream_metrics()}")
+                                return
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                            tokens += 1
+                            answer_parts.append(token)
+                            yield _sse("token", {"content": token})
+                except asyncio.CancelledError:
+                    # The server cancels the response task when the client disconnects
+                    logger.info(f"Client disconnected, stopped generation: {stream_metrics()}")
+                    raise
+
+                metrics = stream_metrics()
+                logger.info(f"Streamed answer: {metrics}")
+                if ANSWER_CACHE_ENABLED:
+                    get_answer_cache().put(
+                        request.question, scope, "".join(answer_parts), sources,
+                        cost_seconds=time.perf_counter() - started,
+                        embedding=query_embedding, generation=generation, citations=citations,
+                        settings=request_retrieval_settings(request),
+                    )
+                yield _sse("done", metrics)
+            except LLMOverloadedError as e:
+                logger.warning(f"Rejected streamed question, LLM overloaded: {e}")
+                yield _sse("error", {"detail": str(e), "status": 503, "retry_after": e.retry_after})
+            except Exception as e:
+                logger.error(f"Failed to stream answer: {e}")
+                yield _sse("error", {"detail": f"Failed to process query: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
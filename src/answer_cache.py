@@ -0,0 +1,211 @@
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import numpy as np
+
+# ---------------------------------------------------------
+# Answer cache settings (configurable via .env)
+# ---------------------------------------------------------
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+# Also reuse the answer of a differently-worded question whose embedding is this close
+ANSWER_CACHE_SEMANTIC = os.getenv("ANSWER_CACHE_SEMANTIC", "false").lower() in ("1", "true", "yes")
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+
+
+def normalize_question(question: str) -> str:
+    """
+    Lower-cases the question, collapses whitespace and drops trailing punctuation,
+    so "What is RAG?" and "what is rag" share a cache entry.
+    """
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    sources: list[str]
+    scope: tuple[str, ...]
+    # Seconds the original retrieval + generation took, i.e. what a hit saves
+    cost_seconds: float
+    citations: list[dict] = field(default_factory=list)
+    created_at: float = field(default_factory=time.monotonic)
+    embedding: np.ndarray | None = None
+
+
+class AnswerCache:
+    """
+    In-memory LRU cache of /ask answers with a TTL, keyed on the normalized
+    question, the video scope and the retrieval settings the answer was built
+    with. In semantic mode, a miss on the exact key falls back to the most
+    similar cached question of the same scope and settings.
+
+    Entries are dropped when a video they depend on changes: answers scoped to
+    or sourced from that video, and all unscoped answers (any new or removed
+    video can change them). The cache and its invalidation are per process:
+    another replica's ingestion only reaches it through the TTL. Used from the
+    event loop only, so no locking.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+        semantic: bool = ANSWER_CACHE_SEMANTIC,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self._entries: OrderedDict[tuple, CachedAnswer] = OrderedDict()
+        # Bumped on every invalidation; answers computed before it are not stored
+        self.generation = 0
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.seconds_saved = 0.0
+
+    @staticmethod
+    def _key(question: str, scope: list[str], settings: tuple = ()) -> tuple:
+        return (normalize_question(question), tuple(sorted(scope)), settings)
+
+    def _expired(self, entry: CachedAnswer) -> bool:
+        return time.monotonic() - entry.created_at > self.ttl_seconds
+
+    def _hit(self, key: tuple, entry: CachedAnswer, lookup_started: float) -> CachedAnswer:
+        self._entries.move_to_end(key)
+        self.seconds_saved += max(0.0, entry.cost_seconds - (time.perf_counter() - lookup_started))
+        return entry
+
+    def get(self, question: str, scope: list[str], settings: tuple = ()) -> CachedAnswer | None:
+        """
+        Exact lookup on the normalized question, scope and retrieval settings.
+        """
+        started = time.perf_counter()
+        key = self._key(question, scope, settings)
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry):
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            return None
+        self.exact_hits += 1
+        return self._hit(key, entry, started)
+
+    def get_similar(self, embedding: list[float], scope: list[str], settings: tuple = ()) -> CachedAnswer | None:
+        """
+        Returns the cached answer of the same scope and settings whose question
+        embedding has the highest cosine similarity above the threshold, if any.
+        """
+        started = time.perf_counter()
+        scope_key = tuple(sorted(scope))
+        candidates = [
+            (key, entry) for key, entry in self._entries.items()
+            if key[1:] == (scope_key, settings) and entry.embedding is not None and not self._expired(entry)
+        ]
+        if not candidates:
+            return None
+        query = _unit(embedding)
+        similarities = np.stack([entry.embedding for _, entry in candidates]) @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+        self.semantic_hits += 1
+        key, entry = candidates[best]
+        return self._hit(key, entry, started)
+
+    def record_miss(self) -> None:
+        self.misses += 1
+
+    def put(
+        self,
+        question: str,
+        scope: list[str],
+        answer: str,
+        sources: list[str],
+        cost_seconds: float,
+        embedding: list[float] | None = None,
+        generation: int | None = None,
+        citations: list[dict] | None = None,
+        settings: tuple = (),
+    ) -> None:
+        """
+        Stores an answer. Pass the `generation` read before retrieval: if a video
+        changed in the meantime the answer may be stale and is not cached.
+        """
+        if generation is not None and generation != self.generation:
+            return
+        key = self._key(question, scope, settings)
+        self._entries[key] = CachedAnswer(
+            answer=answer,
+            sources=list(sources),
+            scope=key[1],
+            cost_seconds=cost_seconds,
+            citations=list(citations or []),
+            embedding=_unit(embedding) if embedding is not None and self.semantic else None,
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_video(self, video_id: str) -> int:
+        """
+        Drops every answer that may depend on the video. Returns how many were dropped.
+        """
+        self.generation += 1
+        stale = [
+            key for key, entry in self._entries.items()
+            if not entry.scope or video_id in entry.scope or video_id in entry.sources
+        ]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self) -> int:
+        self.generation += 1
+        dropped = len(self._entries)
+        self._entries.clear()
+        self.invalidations += dropped
+        return dropped
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": ANSWER_CACHE_ENABLED,
+            "semantic": self.semantic,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "seconds_saved": round(self.seconds_saved, 3),
+        }
+
+
+def _unit(vector) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
+
+_cache: AnswerCache | None = None
+
+
+def get_answer_cache() -> AnswerCache:
+    """
+    Returns the process-wide answer cache.
+    """
+    global _cache
+    if _cache is None:
+        _cache = AnswerCache()
+    return _cache
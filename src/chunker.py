@@ -1,4 +1,3 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
 def chunk_text(text: str, video_id: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> list[Document]:
@@ -9,6 +8,9 @@ def chunk_text(text: str, video_id: str, chunk_size: int = 1000, chunk_overlap:
     chunk_size: The maximum number of characters in a chunk.
     chunk_overlap: The number of characters to overlap between chunks to preserve context.
     """
+    # Imported here: langchain_text_splitters is slow to import and only this fallback uses it
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
     # Initialize the LangChain text splitter
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
@@ -21,4 +23,74 @@ def chunk_text(text: str, video_id: str, chunk_size: int = 1000, chunk_overlap:
     metadata = {"video_id": video_id}
     docs = text_splitter.create_documents([text], metadatas=[metadata])
     
-    return docs
\ No newline at end of file
+    return docs
+
+def _split_long_segments(segments: list[dict], chunk_size: int) -> list[dict]:
+    """
+    Splits any segment longer than chunk_size on spaces, spreading its
+    duration over the pieces in proportion to their length.
+    """
+    pieces = []
+    for seg in segments:
+        text = seg["text"]
+        if len(text) <= chunk_size:
+            pieces.append(seg)
+            continue
+        position = 0
+        while position < len(text):
+            end = min(len(text), position + chunk_size)
+            if end < len(text):
+                space = text.rfind(" ", position, end)
+                if space > position:
+                    end = space
+            piece = text[position:end].strip()
+            if piece:
+                pieces.append({
+                    "text": piece,
+                    "start": seg["start"] + seg["duration"] * position / len(text),
+                    "duration": seg["duration"] * (end - position) / len(text),
+                })
+            position = end + 1 if end < len(text) and text[end] == " " else end
+    return pieces
+
+def chunk_segments(segments: list[dict], video_id: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> list[Document]:
+    """
+    Builds overlapping chunks directly from timed transcript segments
+    ({"text", "start", "duration"}), never cutting inside a segment, and keeps
+    where each chunk starts and ends in the video (seconds) in its metadata.
+
+    A window of whole segments grows up to chunk_size characters; the next
+    window starts with the trailing segments of the previous one that fit in
+    chunk_overlap. Each segment is visited a bounded number of times, so this
+    is linear in the transcript length.
+    """
+    pieces = _split_long_segments(segments, chunk_size)
+    docs = []
+    start, count = 0, len(pieces)
+    while start < count:
+        # Grow the window [start, end) while it fits in chunk_size
+        end, length = start + 1, len(pieces[start]["text"])
+        while end < count and length + 1 + len(pieces[end]["text"]) <= chunk_size:
+            length += 1 + len(pieces[end]["text"])
+            end += 1
+
+        first, last = pieces[start], pieces[end - 1]
+        docs.append(Document(
+            page_content=" ".join(piece["text"] for piece in pieces[start:end]),
+            metadata={
+                "video_id": video_id,
+                "start": round(first["start"], 2),
+                "end": round(last["start"] + last["duration"], 2),
+            },
+        ))
+        if end >= count:
+            break
+
+        # Step back over whole segments that fit in the overlap, always moving forward
+        next_start, overlap = end, 0
+        while next_start - 1 > start and overlap + len(pieces[next_start - 1]["text"]) + 1 <= chunk_overlap:
+            next_start -= 1
+            overlap += len(pieces[next_start]["text"]) + 1
+        start = next_start
+
+    return docs
@@ -0,0 +1,219 @@
+import os
+import logging
+import re
+import threading
+from langchain_core.documents import Document
+from src.resources import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# Context packing settings (configurable via .env)
+# ---------------------------------------------------------
+
+# Max tokens of transcript context put into one prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+# tiktoken encoding used to count tokens (an approximation for non-OpenAI models)
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "cl100k_base")
+# Chunks whose word shingles overlap at least this much (Jaccard) count as duplicates
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.8"))
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+# Shortest shared suffix/prefix treated as chunk overlap when merging
+_MIN_OVERLAP_CHARS = 20
+# Don't bother adding a truncated chunk with less room than this left
+_MIN_PARTIAL_TOKENS = 64
+_SHINGLE_WORDS = 5
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """
+    Loads the tiktoken encoding once. tiktoken downloads encodings on first
+    use; if that fails (e.g. offline) token counts fall back to an estimate.
+    """
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        with _encoding_lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(CONTEXT_TOKENIZER)
+                except Exception as e:
+                    _encoding_failed = True
+                    logger.warning(f"tiktoken encoding unavailable ({e}); estimating tokens as chars / 4.")
+    return _encoding
+
+
+async def load_encoding() -> None:
+    """
+    Loads the encoding on a worker thread, so a first-use download never
+    blocks the event loop. Call before counting tokens from async code.
+    """
+    if _encoding is None and not _encoding_failed:
+        await run_blocking(_get_encoding)
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    encoding = _get_encoding()
+    if encoding is None:
+        cut = text[:max_tokens * 4]
+    else:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    # Don't end on half a word
+    space = cut.rfind(" ")
+    return cut[:space] if 0 < space and len(cut) < len(text) else cut
+
+
+def _overlap(a: str, b: str) -> int:
+    """
+    Length of the longest suffix of `a` that is also a prefix of `b`
+    (at least _MIN_OVERLAP_CHARS), or 0.
+    """
+    if len(a) < _MIN_OVERLAP_CHARS or len(b) < _MIN_OVERLAP_CHARS:
+        return 0
+    probe = b[:_MIN_OVERLAP_CHARS]
+    position = a.find(probe, max(0, len(a) - len(b)))
+    while position != -1:
+        if b.startswith(a[position:]):
+            return len(a) - position
+        position = a.find(probe, position + 1)
+    return 0
+
+
+def _try_merge(a: Document, b: Document) -> Document | None:
+    """
+    Merges two chunks of the same video that overlap or touch, in video order.
+    """
+    if a.metadata.get("video_id") != b.metadata.get("video_id"):
+        return None
+    a_start, b_start = a.metadata.get("start"), b.metadata.get("start")
+    if a_start is not None and b_start is not None and b_start < a_start:
+        a, b = b, a
+    for first, second in ((a, b), (b, a)):
+        shared = _overlap(first.page_content, second.page_content)
+        touching = (
+            first.metadata.get("end") is not None
+            and second.metadata.get("start") is not None
+            and 0 <= second.metadata["start"] - first.metadata["end"] <= 1.0
+        )
+        if shared or touching:
+            text = first.page_content + (
+                second.page_content[shared:] if shared else " " + second.page_content
+            )
+            metadata = dict(first.metadata)
+            if second.metadata.get("end") is not None:
+                metadata["end"] = max(second.metadata["end"], first.metadata.get("end") or 0)
+            return Document(page_content=text, metadata=metadata)
+        if a_start is not None and b_start is not None:
+            # With timestamps the order is known; don't try the reverse
+            break
+    return None
+
+
+def _shingles(text: str) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < _SHINGLE_WORDS:
+        return {tuple(words)}
+    return {tuple(words[i:i + _SHINGLE_WORDS]) for i in range(len(words) - _SHINGLE_WORDS + 1)}
+
+
+def _is_near_duplicate(shingles: set, kept: list[set], threshold: float) -> bool:
+    for other in kept:
+        shared = len(shingles & other)
+        if not shared:
+            continue
+        # Containment catches a short chunk fully repeated inside a merged one
+        if shared / len(shingles) >= threshold or shared / len(shingles | other) >= threshold:
+            return True
+    return False
+
+
+def pack_context(
+    docs: list[Document],
+    token_budget: int | None = None,
+    dedup_threshold: float | None = None,
+) -> tuple[list[Document], dict]:
+    """
+    Prepares retrieved chunks (in relevance order) for the prompt:
+    1. merges chunks of the same video that overlap or are adjacent, so the
+       shared chunk_overlap text is sent once (the merge keeps the rank of its
+       best part);
+    2. drops chunks that are near-duplicates of a more relevant one;
+    3. adds chunks in relevance order until the token budget is used up,
+       truncating the last one if a useful amount of room is left.
+    Returns the packed documents and token statistics.
+    """
+    token_budget = token_budget or CONTEXT_TOKEN_BUDGET
+    dedup_threshold = dedup_threshold if dedup_threshold is not None else CONTEXT_DEDUP_THRESHOLD
+    tokens_before = count_tokens(CONTEXT_SEPARATOR.join(doc.page_content for doc in docs)) if docs else 0
+
+    # 1. Merge: each chunk is folded into the first (more relevant) group it overlaps
+    merged: list[Document] = []
+    merges = 0
+    for doc in docs:
+        for i, group in enumerate(merged):
+            combined = _try_merge(group, doc)
+            if combined is not None:
+                merged[i] = combined
+                merges += 1
+                break
+        else:
+            merged.append(doc)
+
+    # 2. Deduplicate against what has been kept so far
+    unique: list[Document] = []
+    kept_shingles: list[set] = []
+    duplicates = 0
+    for doc in merged:
+        shingles = _shingles(doc.page_content)
+        if _is_near_duplicate(shingles, kept_shingles, dedup_threshold):
+            duplicates += 1
+            continue
+        unique.append(doc)
+        kept_shingles.append(shingles)
+
+    # 3. Fill the budget in relevance order
+    packed: list[Document] = []
+    used = 0
+    truncated = 0
+    separator_tokens = count_tokens(CONTEXT_SEPARATOR)
+    for doc in unique:
+        cost = count_tokens(doc.page_content) + (separator_tokens if packed else 0)
+        if used + cost <= token_budget:
+            packed.append(doc)
+            used += cost
+            continue
+        room = token_budget - used - (separator_tokens if packed else 0)
+        if room >= _MIN_PARTIAL_TOKENS or not packed:
+            text = truncate_to_tokens(doc.page_content, max(room, 0))
+            if text:
+                packed.append(Document(page_content=text, metadata=dict(doc.metadata, truncated=True)))
+                used += count_tokens(text) + (separator_tokens if len(packed) > 1 else 0)
+                truncated += 1
+        break
+
+    tokens_after = count_tokens(CONTEXT_SEPARATOR.join(doc.page_content for doc in packed)) if packed else 0
+    stats = {
+        "chunks_in": len(docs),
+        "chunks_out": len(packed),
+        "merged": merges,
+        "duplicates_dropped": duplicates,
+        "truncated": truncated,
+        "dropped_for_budget": len(unique) - len(packed),
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "token_budget": token_budget,
+    }
+    return packed, stats
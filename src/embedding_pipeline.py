@@ -0,0 +1,116 @@
+import os
+import asyncio
+import time
+from langchain_core.documents import Document
+from src.resources import EMBEDDING_MODEL, get_embeddings, run_blocking
+from src.embedding_cache import cache_key, get_embedding_cache
+from src.telemetry import span, record_embedded_texts
+
+# ---------------------------------------------------------
+# Embedding pipeline settings (configurable via .env)
+# ---------------------------------------------------------
+
+# Chunks per Ollama /api/embed call and per INSERT statement
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+# Max Ollama embed calls in flight at once for one ingestion
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+# Max batches waiting between stages; full queues make the upstream stage wait
+EMBED_QUEUE_SIZE = int(os.getenv("EMBED_QUEUE_SIZE", str(EMBED_CONCURRENCY * 2)))
+
+_DONE = None
+
+
+async def run_embedding_pipeline(
+    docs: list[Document],
+    sink,
+    batch_size: int | None = None,
+    concurrency: int | None = None,
+    use_cache: bool = True,
+) -> dict:
+    """
+    Embeds documents in batches and hands each embedded batch to
+    `await sink(docs, vectors)` (e.g. a multi-row INSERT).
+
+    producer -> [bounded queue] -> N embed workers -> [bounded queue] -> sink
+
+    At most `concurrency` embed calls run at once, and the bounded queues
+    apply backpressure so only a handful of batches are held in memory no
+    matter how long the transcript is. Batches reach the sink as they
+    complete, so their order is not guaranteed. With use_cache, each batch
+    is first looked up in the persistent embedding cache and only misses
+    are sent to Ollama.
+
+    Returns cache hits/misses, time spent in Ollama and wall-clock time.
+    """
+    batch_size = batch_size or EMBED_BATCH_SIZE
+    concurrency = concurrency or EMBED_CONCURRENCY
+    embed_queue: asyncio.Queue = asyncio.Queue(maxsize=EMBED_QUEUE_SIZE)
+    sink_queue: asyncio.Queue = asyncio.Queue(maxsize=EMBED_QUEUE_SIZE)
+    stats = {"batches": 0, "cache_hits": 0, "cache_misses": 0, "embed_seconds": 0.0}
+    embeddings = get_embeddings()
+    cache = get_embedding_cache() if use_cache else None
+
+    async def produce():
+        for start in range(0, len(docs), batch_size):
+            await embed_queue.put(docs[start:start + batch_size])
+        for _ in range(concurrency):
+            await embed_queue.put(_DONE)
+
+    remaining_workers = concurrency
+
+    async def embed_worker():
+        nonlocal remaining_workers
+        while (batch := await embed_queue.get()) is not _DONE:
+            texts = [doc.page_content for doc in batch]
+            keys = [cache_key(EMBEDDING_MODEL, t) for t in texts]
+            if cache:
+                with span("embedding_cache"):
+                    found = await run_blocking(cache.get_many, keys)
+            else:
+                found = {}
+            missing = list(dict.fromkeys(k for k in keys if k not in found))
+            if missing:
+                text_by_key = dict(zip(keys, texts))
+                started = time.perf_counter()
+                with span("embed"):
+                    vectors = await embeddings.aembed_documents([text_by_key[k] for k in missing])
+                stats["embed_seconds"] += time.perf_counter() - started
+                record_embedded_texts(len(missing))
+                fresh = dict(zip(missing, vectors))
+                if cache:
+                    with span("embedding_cache"):
+                        await run_blocking(cache.put_many, fresh)
+                found.update(fresh)
+            stats["cache_hits"] += len(texts) - len(missing)
+            stats["cache_misses"] += len(missing)
+            await sink_queue.put((batch, [found[k] for k in keys]))
+        remaining_workers -= 1
+        if not remaining_workers:
+            await sink_queue.put(_DONE)
+
+    async def drain():
+        while (item := await sink_queue.get()) is not _DONE:
+            with span("db_insert"):
+                await sink(*item)
+            stats["batches"] += 1
+
+    started = time.perf_counter()
+    # Every stage is a task of its own, so a failure can cancel all of them
+    tasks = [
+        asyncio.create_task(produce()),
+        *(asyncio.create_task(embed_worker()) for _ in range(concurrency)),
+        asyncio.create_task(drain()),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # One stage failed: stop the others instead of leaving them embedding
+        # or blocked on a full queue
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    stats["embed_seconds"] = round(stats["embed_seconds"], 3)
+    stats["wall_seconds"] = round(time.perf_counter() - started, 3)
+    return stats
@@ -1,22 +1,19 @@
-import os
-from langchain_ollama import ChatOllama
-from langchain_core.prompts import ChatPromptTemplate
+import logging
+import functools
+from typing import TYPE_CHECKING
 from langchain_core.documents import Document
+from src.resources import LLM_MODEL, get_llm, get_ollama_client
+from src.context_packer import CONTEXT_SEPARATOR, load_encoding, pack_context
+from src.telemetry import span, record_llm_tokens
+from src.llm_scheduler import PRIORITY_INGEST, PRIORITY_INTERACTIVE, get_llm_scheduler, prompt_key
 
-# Read model name from environment (configurable via .env)
-LLM_MODEL = os.getenv("LLM_MODEL", "deepseek-v3.1:671b-cloud")
+if TYPE_CHECKING:
+    from langchain_core.prompts import ChatPromptTemplate
 
-def generate_answer(question: str, context_docs: list[Document]) -> str:
-    """
-    Uses DeepSeek (via Ollama) to generate an answer based purely on the retrieved context.
-    """
-    print(f"Generating answer using {LLM_MODEL}...")
-    
-    # Combine the document chunks into a single readable string
-    context_text = "\n\n---\n\n".join([doc.page_content for doc in context_docs])
-    
-    # Define a strict prompt template to prevent hallucination
-    prompt_template = """
+logger = logging.getLogger(__name__)
+
+# Define a strict prompt template to prevent hallucination
+ANSWER_PROMPT = """
     You are an expert assistant. Answer the question based ONLY on the following context from YouTube transcripts.
     If the context does not contain the answer, say "I don't know based on the provided transcripts." Do not make up information.
     
@@ -28,33 +25,101 @@ def generate_answer(question: str, context_docs: list[Document]) -> str:
     
     Answer:
     """
-    
-    prompt = ChatPromptTemplate.from_template(prompt_template)
-    
-    # Initialize the LLM via Ollama using the configured model name
-    llm = ChatOllama(model=LLM_MODEL) 
-    
-    # Create the LCEL (LangChain Expression Language) chain
-    chain = prompt | llm
-    
-    # Execute the chain
-    response = chain.invoke({"context": context_text, "question": question})
-    
-    # Return the text content of the AI's response
-    return response.content
 
+@functools.cache
+def get_prompt(template: str) -> "ChatPromptTemplate":
+    """
+    Returns the chat prompt for one of the templates above, built on first use:
+    langchain_core.prompts imports LangChain's tracing stack, which would
+    otherwise add a few hundred milliseconds to every process start.
+    """
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(template)
+
+def _record_usage(response) -> None:
+    usage = getattr(response, "usage_metadata", None) or {}
+    record_llm_tokens(usage.get("input_tokens"), usage.get("output_tokens"))
 
-def generate_video_summary(transcript_text: str) -> dict:
+async def _complete(template: str, values: dict, priority: int, stage: str) -> str:
     """
-    Analyzes the transcript and generates a short title and 3 suggested questions.
-    Returns {"title": "...", "suggested_questions": ["...", "...", "..."]}
+    Runs a prompt on the shared LLM client through the LLM scheduler (priority
+    queue + concurrency cap); identical prompts in flight share one completion.
     """
-    import json as _json
+    messages = get_prompt(template).format_messages(**values)
+
+    async def call() -> str:
+        with span(stage):
+            response = await get_llm().ainvoke(messages)
+        _record_usage(response)
+        return response.content
+
+    key = prompt_key(LLM_MODEL, "\n".join(str(message.content) for message in messages))
+    return await get_llm_scheduler().run(priority, call, coalesce_key=key)
+
+async def _format_context(context_docs: list[Document]) -> str:
+    """
+    Combines the document chunks into a single readable string, after merging
+    overlapping chunks, dropping duplicates and fitting the token budget.
+    When the chunks come from several videos, each one is labelled with its
+    video so the answer can say which video supports what.
+    """
+    with span("pack_context"):
+        await load_encoding()
+        packed, stats = pack_context(context_docs)
+    logger.info(
+        f"Packed context: {stats['tokens_before']} -> {stats['tokens_after']} tokens "
+        f"(saved {stats['tokens_saved']}; {stats['merged']} merged, "
+        f"{stats['duplicates_dropped']} duplicates, {stats['dropped_for_budget']} over budget)."
+    )
+    if len({doc.metadata.get("video_id") for doc in packed}) > 1:
+        return CONTEXT_SEPARATOR.join(
+            f"[Video {doc.metadata.get('video_id', 'Unknown')}]\n{doc.page_content}" for doc in packed
+        )
+    return CONTEXT_SEPARATOR.join([doc.page_content for doc in packed])
+
+async def generate_answer(question: str, context_docs: list[Document], priority: int = PRIORITY_INTERACTIVE) -> str:
+    """
+    Uses DeepSeek (via Ollama) to generate an answer based purely on the retrieved context.
+    `priority` is the LLM scheduler class (interactive for /ask).
+    """
+    logger.info(f"Generating answer using {LLM_MODEL}...")
+    
+    # Execute the prompt on the async Ollama client so the event loop stays free
+    context = await _format_context(context_docs)
+    return await _complete(ANSWER_PROMPT, {"context": context, "question": question}, priority, "generate")
+
+async def stream_answer(question: str, context_docs: list[Document]):
+    """
+    Same prompt as generate_answer, but yields the answer text piece by piece
+    as Ollama generates it. The HTTP stream to Ollama is closed as soon as the
+    caller stops iterating, which stops the generation.
+    """
+    logger.info(f"Streaming answer using {LLM_MODEL}...")
+    context = await _format_context(context_docs)
+    prompt = get_prompt(ANSWER_PROMPT).format_messages(context=context, question=question)[0].content
 
-    # Use first ~2000 chars for efficiency
-    snippet = transcript_text[:2000]
+    # Talk to the Ollama client directly (as in think_demo.py) so we own the stream.
+    # The LLM slot is held until the stream ends; streams are not coalesced.
+    async with get_llm_scheduler().slot(PRIORITY_INTERACTIVE):
+        with span("generate"):
+            stream = await get_ollama_client().chat(
+                model=LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+            )
+            try:
+                async for part in stream:
+                    if part.get("done"):
+                        # The final message carries Ollama's token counts
+                        record_llm_tokens(part.get("prompt_eval_count"), part.get("eval_count"))
+                    content = part["message"].get("content", "")
+                    if content:
+                        yield content
+            finally:
+                await stream.aclose()
 
-    prompt_template = """You are given a snippet from a YouTube video transcript.
+
+VIDEO_SUMMARY_PROMPT = """You are given a snippet from a YouTube video transcript.
 Based on this content, generate:
 1. A short, descriptive title for the video (maximum 8 words, no quotes)
 2. Exactly 3 interesting questions a viewer might want answered from this video
@@ -65,33 +130,79 @@ You MUST respond in this exact JSON format and nothing else:
 Transcript snippet:
 {snippet}"""
 
-    prompt = ChatPromptTemplate.from_template(prompt_template)
-    llm = ChatOllama(model=LLM_MODEL)
-    chain = prompt | llm
-
-    try:
-        response = chain.invoke({"snippet": snippet})
-        raw = response.content.strip()
-
-        # Try to extract JSON from the response (LLM may wrap it in markdown)
-        if "```" in raw:
-            # Extract content between code fences
-            parts = raw.split("```")
-            for part in parts:
-                cleaned = part.strip()
-                if cleaned.startswith("json"):
-                    cleaned = cleaned[4:].strip()
-                if cleaned.startswith("{"):
-                    raw = cleaned
-                    break
-
-        data = _json.loads(raw)
-        title = str(data.get("title", "Untitled Video"))[:60]
-        questions = data.get("suggested_questions", [])
-        # Ensure exactly 3 questions (strings only)
-        questions = [str(q) for q in questions if isinstance(q, str)][:3]
-
-        return {"title": title, "suggested_questions": questions}
-    except Exception as e:
-        print(f"Warning: could not generate video summary: {e}")
-        return {"title": "Untitled Video", "suggested_questions": []}
\ No newline at end of file
+# Map step of the long-video summary: one call per transcript section
+SECTION_SUMMARY_PROMPT = """You are given one section ({position}) of a YouTube video transcript.
+Summarize what this section covers in 3 to 5 sentences. Keep the key terms, names and numbers.
+Respond with the summary only.
+
+Transcript section:
+{section}"""
+
+# Reduce step: title and questions from the section summaries of the whole video
+REDUCE_SUMMARY_PROMPT = """You are given summaries of consecutive sections of a YouTube video, in order.
+Based on the whole video, generate:
+1. A short, descriptive title for the video (maximum 8 words, no quotes)
+2. Exactly 3 interesting questions a viewer might want answered from this video, drawn from different parts of it
+
+You MUST respond in this exact JSON format and nothing else:
+{{"title": "Your Title Here", "suggested_questions": ["Question 1?", "Question 2?", "Question 3?"]}}
+
+Section summaries:
+{summaries}"""
+
+def parse_video_summary(raw: str) -> dict:
+    """
+    Extracts {"title", "suggested_questions"} from an LLM reply, which may wrap
+    the JSON in markdown code fences. Raises ValueError if there is no valid JSON.
+    """
+    import json as _json
+
+    raw = raw.strip()
+    # Try to extract JSON from the response (LLM may wrap it in markdown)
+    if "```" in raw:
+        # Extract content between code fences
+        parts = raw.split("```")
+        for part in parts:
+            cleaned = part.strip()
+            if cleaned.startswith("json"):
+                cleaned = cleaned[4:].strip()
+            if cleaned.startswith("{"):
+                raw = cleaned
+                break
+
+    data = _json.loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError("summary is not a JSON object")
+    title = str(data.get("title", "Untitled Video"))[:60]
+    questions = data.get("suggested_questions", [])
+    # Ensure exactly 3 questions (strings only)
+    questions = [str(q) for q in questions if isinstance(q, str)][:3]
+
+    return {"title": title, "suggested_questions": questions}
+
+async def summarize_transcript(transcript_text: str) -> dict:
+    """
+    Title and 3 suggested questions from a transcript short enough for one prompt.
+    Raises if the LLM call fails or its reply isn't valid JSON.
+    """
+    raw = await _complete(VIDEO_SUMMARY_PROMPT, {"snippet": transcript_text}, PRIORITY_INGEST, "summarize")
+    return parse_video_summary(raw)
+
+async def summarize_section(section_text: str, position: str) -> str:
+    """
+    Short summary of one section of a long transcript (`position` is e.g.
+    "part 2 of 9, 12:00-24:00").
+    """
+    raw = await _complete(
+        SECTION_SUMMARY_PROMPT, {"section": section_text, "position": position}, PRIORITY_INGEST, "summarize_section",
+    )
+    return raw.strip()
+
+async def reduce_section_summaries(section_summaries: list[str]) -> dict:
+    """
+    Title and 3 suggested questions from the ordered section summaries of a video.
+    Raises if the LLM call fails or its reply isn't valid JSON.
+    """
+    summaries = "\n\n".join(f"{i}. {summary}" for i, summary in enumerate(section_summaries, start=1))
+    raw = await _complete(REDUCE_SUMMARY_PROMPT, {"summaries": summaries}, PRIORITY_INGEST, "summarize")
+    return parse_video_summary(raw)
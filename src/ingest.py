@@ -1,6 +1,11 @@
+import logging
+import re
+import json
+import httpx
 import urllib.parse as urlparse
 from urllib.parse import parse_qs
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
+
+logger = logging.getLogger(__name__)
 
 def extract_video_id(url: str) -> str:
     """
@@ -20,11 +25,71 @@ def extract_video_id(url: str) -> str:
             
     return None
 
-def fetch_youtube_transcript(video_id: str) -> str:
+def extract_playlist_id(url: str) -> str:
     """
-    Fetches the transcript for a given YouTube video ID.
-    Returns the full text as a single string, or None if it fails.
+    Extracts the playlist ID (the 'list' parameter) from a YouTube URL.
     """
+    parsed_url = urlparse.urlparse(url)
+    if parsed_url.hostname in ('www.youtube.com', 'youtube.com', 'm.youtube.com', 'youtu.be'):
+        query_params = parse_qs(parsed_url.query)
+        return query_params.get('list', [None])[0]
+    return None
+
+def _find_video_ids(page: str) -> list[str]:
+    ids = re.findall(r'"playlistVideoRenderer":\{"videoId":"([\w-]{11})"', page)
+    if not ids:
+        # Fall back to any video reference if YouTube changed its renderer names
+        ids = re.findall(r'"videoId":"([\w-]{11})"', page)
+    return ids
+
+def fetch_playlist_video_ids(playlist_id: str, max_videos: int = 500) -> list[str]:
+    """
+    Lists the video IDs of a public YouTube playlist, in playlist order.
+    The playlist page only embeds the first 100 videos; the rest are fetched
+    through the same continuation requests the YouTube web client makes.
+    Returns an empty list if the playlist cannot be read.
+    """
+    headers = {"User-Agent": "Mozilla/5.0", "Accept-Language": "en-US,en;q=0.9"}
+    try:
+        with httpx.Client(headers=headers, timeout=30.0, follow_redirects=True) as client:
+            page = client.get("https://www.youtube.com/playlist", params={"list": playlist_id}).text
+            video_ids = list(dict.fromkeys(_find_video_ids(page)))
+
+            api_key = re.search(r'"INNERTUBE_API_KEY":"([^"]+)"', page)
+            client_version = re.search(r'"INNERTUBE_CLIENT_VERSION":"([^"]+)"', page)
+            token = re.search(r'"continuationCommand":\{"token":"([^"]+)"', page)
+            while token and api_key and client_version and len(video_ids) < max_videos:
+                response = client.post(
+                    "https://www.youtube.com/youtubei/v1/browse",
+                    params={"key": api_key.group(1)},
+                    json={
+                        "context": {"client": {"clientName": "WEB", "clientVersion": client_version.group(1)}},
+                        "continuation": token.group(1),
+                    },
+                )
+                # Re-serialise compactly so the same patterns match as in the HTML page
+                body = json.dumps(response.json(), separators=(",", ":"))
+                new_ids = [v for v in dict.fromkeys(_find_video_ids(body)) if v not in video_ids]
+                if not new_ids:
+                    break
+                video_ids.extend(new_ids)
+                token = re.search(r'"continuationCommand":\{"token":"([^"]+)"', body)
+
+            return video_ids[:max_videos]
+    except Exception as e:
+        logger.warning(f"Could not read playlist {playlist_id}: {e}")
+        return []
+
+def fetch_transcript_segments(video_id: str, language: str = "en") -> list[dict] | None:
+    """
+    Fetches the timed transcript segments for a given YouTube video ID as
+    [{"text", "start", "duration"}, ...] with whitespace cleaned up.
+    Returns None if the video has no transcript. Other errors (network,
+    rate limiting) are raised so callers can retry them.
+    """
+    # Imported on first use, so starting the API doesn't pay for it
+    from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
+
     try:
         # 1. Initialize the modern API object 
         api = YouTubeTranscriptApi()
@@ -32,24 +97,22 @@ def fetch_youtube_transcript(video_id: str) -> str:
         # 2. Fetch the list of transcripts 
         transcript_list = api.list(video_id)
         
-        # 3. Find the English transcript (this safely falls back to auto-generated)
-        transcript = transcript_list.find_transcript(['en'])
-        
-        # 4. Fetch the actual text segments
-        segments = transcript.fetch()
-        
-        # 5. Join all text segments using the updated object attribute (.text)
-        transcript_text = " ".join([seg.text for seg in segments])
+        # 3. Find the transcript in the language (this safely falls back to auto-generated)
+        transcript = transcript_list.find_transcript([language])
         
-        # Clean up the text (optional but recommended for RAG)
-        import re
-        transcript_text = re.sub(r'\s+', ' ', transcript_text).strip()
+        # 4. Fetch the actual text segments, keeping their timing
+        segments = []
+        for seg in transcript.fetch():
+            # Clean up the text (optional but recommended for RAG)
+            text = " ".join(seg.text.split())
+            if text:
+                segments.append({"text": text, "start": seg.start, "duration": seg.duration})
         
-        return transcript_text
+        return segments
         
     except (TranscriptsDisabled, NoTranscriptFound) as e:
-        print(f"Transcript unavailable for video {video_id}: {e}")
+        logger.info(f"Transcript unavailable for video {video_id}: {e}")
         return None
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        return None
\ No newline at end of file
+        logger.error(f"An unexpected error occurred: {e}")
+        raise
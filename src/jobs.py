@@ -0,0 +1,358 @@
+import os
+import logging
+import json
+import uuid
+import random
+import asyncio
+from sqlalchemy import text
+from src.resources import get_engine
+from src.pipeline import ingest_video, IngestionError
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# Background ingestion queue settings (configurable via .env)
+# ---------------------------------------------------------
+
+# Videos ingested at the same time by this process; keep it low so /ask stays responsive
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+# Attempts per video before it is marked as failed
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "4"))
+# Retry delay doubles after every failed attempt: base, 2*base, 4*base... (with jitter)
+INGEST_RETRY_BASE_SECONDS = float(os.getenv("INGEST_RETRY_BASE_SECONDS", "10"))
+INGEST_RETRY_MAX_SECONDS = float(os.getenv("INGEST_RETRY_MAX_SECONDS", "600"))
+# A running video whose worker stopped renewing its lease for this long
+# (crash, restart, lost replica) is picked up again by another worker
+INGEST_LEASE_SECONDS = float(os.getenv("INGEST_LEASE_SECONDS", "300"))
+# How often idle workers look for new or retryable work
+INGEST_POLL_INTERVAL = float(os.getenv("INGEST_POLL_INTERVAL", "5"))
+
+_tables_ready = False
+_tables_lock = asyncio.Lock()
+_workers: list[asyncio.Task] = []
+_wakeup = asyncio.Event()
+
+
+async def init_job_tables() -> None:
+    """
+    Creates the job tables. Job state lives in PostgreSQL so queued and
+    half-finished work survives restarts and can be shared by several replicas.
+    """
+    global _tables_ready
+    if _tables_ready:
+        return
+    async with _tables_lock, get_engine().begin() as conn:
+        if _tables_ready:
+            return
+        # CREATE TABLE IF NOT EXISTS is not safe against concurrent replicas
+        await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('rag_ingest_jobs'))"))
+        await conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS rag_ingest_jobs ("
+            " id UUID PRIMARY KEY,"
+            " playlist_id VARCHAR,"
+            " created_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+        ))
+        await conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS rag_ingest_job_items ("
+            " job_id UUID NOT NULL REFERENCES rag_ingest_jobs (id) ON DELETE CASCADE,"
+            " position INT NOT NULL,"
+            " video_id VARCHAR NOT NULL,"
+            " status VARCHAR NOT NULL DEFAULT 'pending',"
+            " stage VARCHAR,"
+            " attempts INT NOT NULL DEFAULT 0,"
+            " error TEXT,"
+            " chunks_created INT,"
+            " title TEXT,"
+            " suggested_questions JSONB,"
+            " next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now(),"
+            " lease_expires_at TIMESTAMPTZ,"
+            " started_at TIMESTAMPTZ,"
+            " finished_at TIMESTAMPTZ,"
+            " updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),"
+            " PRIMARY KEY (job_id, position))"
+        ))
+        # Set by every claim; a worker only updates an item while it still holds its claim
+        await conn.execute(text(
+            "ALTER TABLE rag_ingest_job_items ADD COLUMN IF NOT EXISTS claim_id UUID"
+        ))
+        # Workers only ever look at unfinished items
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_ingest_job_items_queue "
+            "ON rag_ingest_job_items (next_attempt_at) WHERE status IN ('pending', 'running')"
+        ))
+    _tables_ready = True
+
+
+async def submit_job(video_ids: list[str], playlist_id: str | None = None) -> uuid.UUID:
+    """
+    Queues the videos for ingestion and returns the new job id.
+    """
+    await init_job_tables()
+    job_id = uuid.uuid4()
+    video_ids = list(dict.fromkeys(video_ids))
+    async with get_engine().begin() as conn:
+        await conn.execute(
+            text("INSERT INTO rag_ingest_jobs (id, playlist_id) VALUES (:id, :playlist_id)"),
+            {"id": job_id, "playlist_id": playlist_id},
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO rag_ingest_job_items (job_id, position, video_id) "
+                "SELECT :job_id, t.position, t.video_id "
+                "FROM unnest(CAST(:video_ids AS text[])) WITH ORDINALITY AS t(video_id, position)"
+            ),
+            {"job_id": job_id, "video_ids": video_ids},
+        )
+    _wakeup.set()
+    return job_id
+
+
+def _job_status(counts: dict) -> str:
+    if counts["pending"] + counts["running"]:
+        return "running" if counts["running"] or counts["done"] or counts["failed"] else "queued"
+    if counts["failed"]:
+        return "completed_with_errors" if counts["done"] else "failed"
+    return "completed"
+
+
+async def get_job(job_id: uuid.UUID) -> dict | None:
+    """
+    Returns the job with per-video status and stage, or None if it doesn't exist.
+    """
+    await init_job_tables()
+    async with get_engine().connect() as conn:
+        job = (await conn.execute(
+            text("SELECT id, playlist_id, created_at FROM rag_ingest_jobs WHERE id = :id"),
+            {"id": job_id},
+        )).first()
+        if job is None:
+            return None
+        rows = (await conn.execute(
+            text(
+                "SELECT video_id, status, stage, attempts, error, chunks_created, title, "
+                "suggested_questions, next_attempt_at, started_at, finished_at "
+                "FROM rag_ingest_job_items WHERE job_id = :id ORDER BY position"
+            ),
+            {"id": job_id},
+        )).all()
+
+    counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+    videos = []
+    for row in rows:
+        counts[row.status] += 1
+        videos.append({
+            "video_id": row.video_id,
+            "status": row.status,
+            "stage": row.stage,
+            "attempts": row.attempts,
+            "error": row.error,
+            "chunks_created": row.chunks_created,
+            "title": row.title,
+            "suggested_questions": row.suggested_questions or [],
+            "next_attempt_at": row.next_attempt_at.isoformat() if row.status == "pending" and row.attempts else None,
+            "started_at": row.started_at.isoformat() if row.started_at else None,
+            "finished_at": row.finished_at.isoformat() if row.finished_at else None,
+        })
+    return {
+        "job_id": str(job.id),
+        "playlist_id": job.playlist_id,
+        "created_at": job.created_at.isoformat(),
+        "status": _job_status(counts),
+        "total": len(rows),
+        **counts,
+        "videos": videos,
+    }
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Exponential backoff with jitter for the given number of failed attempts.
+    """
+    delay = min(INGEST_RETRY_MAX_SECONDS, INGEST_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class ClaimLostError(Exception):
+    """
+    The worker's lease on a video expired and another worker claimed it.
+    """
+
+
+async def _claim_item():
+    """
+    Atomically takes the next due video: pending and past its retry time, or
+    running with an expired lease. SKIP LOCKED lets workers in every replica
+    claim different rows without waiting on each other.
+    """
+    async with get_engine().begin() as conn:
+        # A video whose worker keeps dying (OOM, crash in a native library) never
+        # records a failure itself; stop retrying it once its attempts are used up
+        await conn.execute(
+            text(
+                "UPDATE rag_ingest_job_items SET status = 'failed', "
+                "error = 'worker stopped during attempt ' || attempts || ' (lease expired)', "
+                "lease_expires_at = NULL, finished_at = now(), updated_at = now() "
+                "WHERE status = 'running' AND lease_expires_at < now() AND attempts >= :max_attempts"
+            ),
+            {"max_attempts": INGEST_MAX_ATTEMPTS},
+        )
+        return (await conn.execute(
+            text(
+                "WITH next AS ("
+                " SELECT job_id, position FROM rag_ingest_job_items"
+                " WHERE (status = 'pending' AND next_attempt_at <= now())"
+                " OR (status = 'running' AND lease_expires_at < now() AND attempts < :max_attempts)"
+                " ORDER BY next_attempt_at, position"
+                " LIMIT 1 FOR UPDATE SKIP LOCKED) "
+                "UPDATE rag_ingest_job_items i SET status = 'running', stage = 'queued', "
+                "attempts = i.attempts + 1, claim_id = :claim_id, "
+                "lease_expires_at = now() + make_interval(secs => :lease), "
+                "started_at = coalesce(i.started_at, now()), updated_at = now() "
+                "FROM next WHERE i.job_id = next.job_id AND i.position = next.position "
+                "RETURNING i.job_id, i.position, i.video_id, i.attempts, i.claim_id"
+            ),
+            {"lease": INGEST_LEASE_SECONDS, "max_attempts": INGEST_MAX_ATTEMPTS, "claim_id": uuid.uuid4()},
+        )).first()
+
+
+async def _update_item(item, sql: str, params: dict | None = None) -> bool:
+    """
+    Updates the item if this worker still holds its claim; returns whether it did.
+    """
+    async with get_engine().begin() as conn:
+        result = await conn.execute(
+            text(f"UPDATE rag_ingest_job_items SET {sql}, updated_at = now() "
+                 "WHERE job_id = :job_id AND position = :position AND claim_id = :claim_id"),
+            {"job_id": item.job_id, "position": item.position, "claim_id": item.claim_id, **(params or {})},
+        )
+    return result.rowcount > 0
+
+
+async def _renew_lease(item, ingest: asyncio.Task) -> None:
+    """
+    Keeps the claim alive while a long stage (e.g. embedding a 3-hour video) runs.
+    If another worker has taken the claim over, cancels `ingest` at once rather
+    than letting it keep calling Ollama alongside the new owner.
+    """
+    while True:
+        await asyncio.sleep(INGEST_LEASE_SECONDS / 3)
+        try:
+            renewed = await _update_item(item, "lease_expires_at = now() + make_interval(secs => :lease)",
+                                         {"lease": INGEST_LEASE_SECONDS})
+        except Exception as e:
+            logger.warning(f"could not renew lease for video {item.video_id}: {e}")
+            continue
+        if not renewed:
+            ingest.cancel()
+            return
+
+
+async def _process_item(item) -> None:
+    async def on_stage(stage: str):
+        if not await _update_item(item, "stage = :stage", {"stage": stage}):
+            raise ClaimLostError(item.video_id)
+
+    ingest = asyncio.create_task(ingest_video(item.video_id, on_stage=on_stage))
+    heartbeat = asyncio.create_task(_renew_lease(item, ingest))
+    try:
+        result = await ingest
+    except asyncio.CancelledError:
+        if heartbeat.done() and not heartbeat.cancelled():
+            # The heartbeat lost the claim and stopped the ingestion
+            logger.warning(f"Stopped ingesting {item.video_id}: its lease expired and another worker claimed it")
+            return
+        # Shutting down: hand the video back to the queue without using up an attempt
+        await asyncio.shield(_update_item(
+            item,
+            "status = 'pending', stage = NULL, attempts = attempts - 1, "
+            "lease_expires_at = NULL, next_attempt_at = now()",
+        ))
+        raise
+    except ClaimLostError:
+        logger.warning(f"Stopped ingesting {item.video_id}: its lease expired and another worker claimed it")
+        return
+    except Exception as e:
+        retryable = e.retryable if isinstance(e, IngestionError) else True
+        stage = e.stage if isinstance(e, IngestionError) else None
+        if retryable and item.attempts < INGEST_MAX_ATTEMPTS:
+            delay = retry_delay(item.attempts)
+            logger.warning(f"Ingestion of {item.video_id} failed (attempt {item.attempts}), retrying in {delay:.0f}s: {e}")
+            await _update_item(
+                item,
+                "status = 'pending', error = :error, lease_expires_at = NULL, "
+                "next_attempt_at = now() + make_interval(secs => :delay)",
+                {"error": str(e), "delay": delay},
+            )
+        else:
+            logger.warning(f"Ingestion of {item.video_id} failed permanently: {e}")
+            await _update_item(
+                item,
+                "status = 'failed', stage = coalesce(:stage, stage), error = :error, "
+                "lease_expires_at = NULL, finished_at = now()",
+                {"error": str(e), "stage": stage},
+            )
+        return
+    finally:
+        heartbeat.cancel()
+
+    await _update_item(
+        item,
+        "status = 'done', stage = 'done', error = NULL, chunks_created = :chunks, title = :title, "
+        "suggested_questions = CAST(:questions AS jsonb), lease_expires_at = NULL, finished_at = now()",
+        {
+            "chunks": result["chunks_created"],
+            "title": result["title"],
+            "questions": json.dumps(result["suggested_questions"]),
+        },
+    )
+
+
+async def _worker(worker_id: int) -> None:
+    """
+    Claims and ingests one video at a time; sleeps until woken by a new job
+    or the poll interval when the queue is empty.
+    """
+    while True:
+        try:
+            await init_job_tables()
+            item = await _claim_item()
+        except Exception as e:
+            logger.warning(f"Ingest worker {worker_id}: could not read the job queue: {e}")
+            item = None
+        if item is None:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=INGEST_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            _wakeup.clear()
+            continue
+        logger.info(f"Ingest worker {worker_id}: processing {item.video_id} (attempt {item.attempts})")
+        try:
+            await _process_item(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Could not record the outcome; the lease expiry will make the video retry
+            logger.warning(f"Ingest worker {worker_id}: failed to update job state for {item.video_id}: {e}")
+
+
+def start_job_workers(workers: int | None = None) -> None:
+    """
+    Starts the ingestion worker pool on the running event loop.
+    """
+    global _wakeup
+    if _workers:
+        return
+    _wakeup = asyncio.Event()
+    for worker_id in range(workers or INGEST_WORKERS):
+        _workers.append(asyncio.create_task(_worker(worker_id)))
+
+
+async def stop_job_workers() -> None:
+    """
+    Stops the workers; videos they were working on go back to the queue.
+    """
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
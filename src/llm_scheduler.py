@@ -0,0 +1,241 @@
+import os
+import time
+import heapq
+import asyncio
+import hashlib
+import itertools
+from contextlib import asynccontextmanager
+from src.resources import run_in_background
+from src.telemetry import LLM_COALESCED, LLM_QUEUE_WAIT, LLM_REJECTED, span
+
+# ---------------------------------------------------------
+# LLM scheduler settings (configurable via .env)
+# ---------------------------------------------------------
+
+# LLM calls in flight at once, across the whole process; match it to the
+# parallelism of the Ollama server (OLLAMA_NUM_PARALLEL) so requests queue here,
+# in priority order, rather than inside Ollama
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+# Slots that only interactive requests may use, so ingestion bursts can't take them all
+LLM_INTERACTIVE_RESERVED = int(os.getenv("LLM_INTERACTIVE_RESERVED", "4"))
+# Interactive requests allowed to wait for a slot; beyond that they get a 503 at once
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+# Longest an interactive request waits for a slot before giving up with a 503
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "15"))
+# Concurrent calls with an identical prompt share one completion
+LLM_COALESCE_ENABLED = os.getenv("LLM_COALESCE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Priority classes, most urgent first
+PRIORITY_INTERACTIVE = 0  # /ask and /ask/stream
+PRIORITY_INGEST = 1       # title/questions while a video is being ingested
+PRIORITY_BACKGROUND = 2   # precomputed answers to suggested questions
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_INGEST: "ingest", PRIORITY_BACKGROUND: "background"}
+
+
+class LLMOverloadedError(Exception):
+    """
+    No LLM slot is available soon enough: the interactive queue is full or the
+    wait passed LLM_QUEUE_TIMEOUT_SECONDS. Reported to clients as a 503 with
+    `retry_after` seconds.
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    """
+    Admission control in front of every LLM call. At most `max_concurrency`
+    calls run at once; the rest wait in a priority queue (FIFO within a
+    class). Non-interactive calls never use the last `reserved` slots, so
+    /ask always finds capacity soon even during an ingestion burst.
+    Interactive calls are rejected instead of queueing past `max_queue`
+    waiters or `queue_timeout` seconds. Identical prompts in flight share
+    one completion, unless the shared call is less urgent than the new one.
+    Used from the event loop only, so no locking.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        reserved: int = LLM_INTERACTIVE_RESERVED,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT_SECONDS,
+        coalesce: bool = LLM_COALESCE_ENABLED,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.reserved = min(max(0, reserved), self.max_concurrency - 1)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.coalesce = coalesce
+        self._queue: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # Coalesce key -> (priority, task) of the call that followers share
+        self._inflight: dict[str, tuple[int, asyncio.Task]] = {}
+        self.active = {priority: 0 for priority in PRIORITY_NAMES}
+        self.queued = {priority: 0 for priority in PRIORITY_NAMES}
+        self.admitted = 0
+        self.coalesced = 0
+        self.rejected = {"queue_full": 0, "timeout": 0}
+        self.wait_seconds = 0.0
+        self.service_seconds = 0.0
+        self.completed = 0
+
+    def _admissible(self, priority: int) -> bool:
+        running = sum(self.active.values())
+        if priority == PRIORITY_INTERACTIVE:
+            return running < self.max_concurrency
+        return running < self.max_concurrency - self.reserved
+
+    def _retry_after(self) -> int:
+        average = self.service_seconds / self.completed if self.completed else 1.0
+        waiting = sum(self.queued.values()) + 1
+        return max(1, round(average * waiting / self.max_concurrency))
+
+    def _reject(self, priority: int, reason: str, message: str):
+        self.rejected[reason] += 1
+        LLM_REJECTED.labels(PRIORITY_NAMES[priority], reason).inc()
+        raise LLMOverloadedError(message, retry_after=self._retry_after())
+
+    def check_admission(self, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """
+        Raises LLMOverloadedError if a request of this priority would be
+        rejected right now, so a streaming endpoint can answer 503 before it
+        starts the response.
+        """
+        if priority == PRIORITY_INTERACTIVE and self.queued[priority] >= self.max_queue:
+            self._reject(priority, "queue_full", "Too many questions are waiting for the LLM; try again shortly.")
+
+    def _dispatch(self) -> None:
+        # Hand freed slots to the most urgent waiters that may use them
+        while self._queue:
+            priority, _, future = self._queue[0]
+            if future.cancelled():
+                heapq.heappop(self._queue)
+                continue
+            if not self._admissible(priority):
+                break
+            heapq.heappop(self._queue)
+            self.queued[priority] -= 1
+            self.active[priority] += 1
+            future.set_result(None)
+
+    async def _acquire(self, priority: int) -> None:
+        waiting_ahead = any(self.queued[p] for p in PRIORITY_NAMES if p <= priority)
+        if self._admissible(priority) and not waiting_ahead:
+            self.active[priority] += 1
+            LLM_QUEUE_WAIT.labels(PRIORITY_NAMES[priority]).observe(0.0)
+            return
+        self.check_admission(priority)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future))
+        self.queued[priority] += 1
+        started = time.perf_counter()
+        timeout = self.queue_timeout if priority == PRIORITY_INTERACTIVE else None
+        try:
+            with span("llm_queue"):
+                await asyncio.wait({future}, timeout=timeout)
+        except asyncio.CancelledError:
+            if future.done():
+                # Granted just as the caller went away: give the slot back
+                self._release(priority)
+            else:
+                future.cancel()
+                self.queued[priority] -= 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.wait_seconds += waited
+            LLM_QUEUE_WAIT.labels(PRIORITY_NAMES[priority]).observe(waited)
+        if not future.done():
+            future.cancel()
+            self.queued[priority] -= 1
+            self._dispatch()
+            self._reject(priority, "timeout", f"No LLM capacity within {self.queue_timeout:g}s; try again shortly.")
+
+    def _release(self, priority: int) -> None:
+        self.active[priority] -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: int):
+        """
+        Holds one LLM slot for the duration of the block (e.g. a streamed answer).
+        """
+        await self._acquire(priority)
+        self.admitted += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.service_seconds += time.perf_counter() - started
+            self.completed += 1
+            self._release(priority)
+
+    async def run(self, priority: int, call, coalesce_key: str | None = None):
+        """
+        Runs `call()` (a coroutine factory) in an LLM slot and returns its result.
+        With a coalesce_key (e.g. a hash of model + prompt), callers arriving while
+        an identical call is queued or running get that call's result instead,
+        as long as that call is at least as urgent as theirs: an /ask must not
+        wait behind a background call in a slot it could never use itself.
+        A more urgent caller starts its own call, which later callers share.
+        """
+        if coalesce_key is None or not self.coalesce:
+            async with self.slot(priority):
+                return await call()
+
+        inflight = self._inflight.get(coalesce_key)
+        if inflight is not None and inflight[0] <= priority:
+            self.coalesced += 1
+            LLM_COALESCED.labels(PRIORITY_NAMES[priority]).inc()
+            return await asyncio.shield(inflight[1])
+
+        async def leader():
+            try:
+                async with self.slot(priority):
+                    return await call()
+            finally:
+                # A more urgent call with the same key may have taken over the entry
+                if self._inflight.get(coalesce_key, (None, None))[1] is task:
+                    del self._inflight[coalesce_key]
+
+        # A task of its own, so one caller going away doesn't cancel the others' result
+        task = run_in_background(leader())
+        self._inflight[coalesce_key] = (priority, task)
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "interactive_reserved": self.reserved,
+            "active": {PRIORITY_NAMES[p]: n for p, n in self.active.items()},
+            "queued": {PRIORITY_NAMES[p]: n for p, n in self.queued.items()},
+            "admitted": self.admitted,
+            "coalesced": self.coalesced,
+            "rejected": dict(self.rejected),
+            "avg_wait_ms": round(self.wait_seconds * 1000 / self.admitted, 2) if self.admitted else 0.0,
+            "avg_service_ms": round(self.service_seconds * 1000 / self.completed, 2) if self.completed else 0.0,
+        }
+
+
+_scheduler: LLMScheduler | None = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """
+    Returns the process-wide LLM scheduler.
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler()
+    return _scheduler
+
+
+def prompt_key(model: str, prompt: str) -> str:
+    """
+    Coalescing key of a completion request.
+    """
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
@@ -0,0 +1,85 @@
+"""
+Moves an existing collection's ANN index to another vector storage: "full"
+(float32), "halfvec" (float16) or "binary" (1 bit per dimension). The chunk
+table keeps its full-precision vectors, which searches use to re-score the
+shortlist from a compact index, so only the index is rebuilt. The new index is
+built concurrently and swapped in; searches keep using the old one meanwhile.
+
+Set VECTOR_STORAGE in .env first: the app rebuilds the index to match it on
+its next maintenance check, and this tool does that now and reports the size
+before and after. Needs pgvector 0.7.0+ for halfvec and binary.
+
+Usage:
+    VECTOR_STORAGE=halfvec python -m src.migrate_vectors
+    python -m src.migrate_vectors --dry-run
+"""
+import argparse
+import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import text
+from src.resources import init_resources, shutdown_resources, get_engine
+from src.store import init_schema
+from src.vector_index import (
+    ANN_INDEX_TYPE, VECTOR_BYTES, VECTOR_STORAGE, check_storage_support, index_stats, maintain_vector_index,
+)
+
+
+def _mb(size_bytes: int | None) -> str:
+    return f"{(size_bytes or 0) / 1024 / 1024:.1f} MB"
+
+
+def _describe(stats: dict) -> str:
+    if not stats["built"]:
+        return "no ANN index yet"
+    return (
+        f"{stats['type']} index on {stats['storage']} vectors, {_mb(stats['size_bytes'])} "
+        f"(chunk table {_mb(stats['table_bytes'])})"
+    )
+
+
+async def migrate(args) -> int:
+    init_resources()
+    try:
+        await init_schema()
+        async with get_engine().connect() as conn:
+            try:
+                await check_storage_support(conn, VECTOR_STORAGE)
+            except (ValueError, RuntimeError) as e:
+                print(f"Cannot migrate: {e}.")
+                return 1
+            rows = (await conn.execute(text("SELECT count(*) FROM langchain_pg_embedding"))).scalar()
+        before = await index_stats()
+        print(f"{rows} chunks; current: {_describe(before)}.")
+        if before["built"] and before["storage"] == VECTOR_STORAGE and before["type"] == ANN_INDEX_TYPE:
+            print(f"Already on {VECTOR_STORAGE} storage; nothing to do.")
+            return 0
+
+        current = before["storage"] if before["built"] else "full"
+        print(
+            f"Target: {ANN_INDEX_TYPE} index on {VECTOR_STORAGE} vectors, "
+            f"{VECTOR_BYTES[VECTOR_STORAGE]} instead of {VECTOR_BYTES[current]} bytes per vector "
+            f"(~{_mb(rows * VECTOR_BYTES[VECTOR_STORAGE])} of vector data before index overhead)."
+        )
+        if args.dry_run:
+            return 0
+
+        outcome = await maintain_vector_index(force=True)
+        after = await index_stats()
+        print(f"ANN index {outcome}: {_describe(after)}.")
+        return 0 if outcome in ("created", "rebuilt", "up_to_date", "too_small") else 1
+    finally:
+        await shutdown_resources()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the ANN index for VECTOR_STORAGE")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the current and target storage")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(migrate(args)))
+
+
+if __name__ == "__main__":
+    main()
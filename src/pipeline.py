@@ -0,0 +1,224 @@
+import os
+import logging
+import asyncio
+from src.resources import run_blocking, run_in_background
+from src.ingest import fetch_transcript_segments
+from src.chunker import chunk_segments
+from src.store import (
+    sync_video_documents, video_fingerprint, save_precomputed_answers, precomputed_questions, save_transcript,
+    load_transcript,
+)
+from src.retriever import retrieve_context, build_citations
+from src.vector_index import maintain_index_in_background
+from src.generator import generate_answer
+from src.answer_cache import normalize_question
+from src.llm_scheduler import PRIORITY_BACKGROUND
+from src.summarizer import summarize_video
+from src.telemetry import span, trace
+
+logger = logging.getLogger(__name__)
+
+# Transcript language fetched from YouTube (and key of the raw-transcript store)
+TRANSCRIPT_LANGUAGE = os.getenv("TRANSCRIPT_LANGUAGE", "en")
+# Refetch a stored transcript from YouTube once it is older than this (0 = never)
+TRANSCRIPT_TTL_SECONDS = float(os.getenv("TRANSCRIPT_TTL_SECONDS", "0"))
+# Chunking parameters for ingestion and re-chunking
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+
+# Answer the suggested questions in the background after ingestion, so the
+# first clicks on them in the UI are served instantly
+PRECOMPUTE_SUGGESTED_ANSWERS = os.getenv("PRECOMPUTE_SUGGESTED_ANSWERS", "true").lower() in ("1", "true", "yes")
+# Videos whose answers are precomputed at the same time; keeps this
+# low-priority work from crowding out /ask for the LLM
+PRECOMPUTE_CONCURRENCY = int(os.getenv("PRECOMPUTE_CONCURRENCY", "1"))
+
+_precompute_slots = asyncio.Semaphore(PRECOMPUTE_CONCURRENCY)
+
+
+class IngestionError(Exception):
+    """
+    An ingestion step failed. `retryable` tells the job queue whether trying
+    again later can help (e.g. Ollama or the DB was briefly unavailable).
+    """
+
+    def __init__(self, message: str, stage: str, retryable: bool = True):
+        super().__init__(message)
+        self.stage = stage
+        self.retryable = retryable
+
+
+class TranscriptUnavailableError(IngestionError):
+    """
+    The video has no (English) transcript; retrying will not help.
+    """
+
+    def __init__(self, video_id: str):
+        super().__init__(
+            f"Transcript not found or subtitles are disabled for video {video_id}.",
+            stage="fetching_transcript",
+            retryable=False,
+        )
+
+
+async def load_transcript_segments(video_id: str, refresh: bool = False) -> tuple[list[dict] | None, str]:
+    """
+    Returns the transcript segments of a video and where they came from
+    ("store" or "youtube"). The raw-transcript store is read first; YouTube is
+    only asked when there is no stored copy, it is older than
+    TRANSCRIPT_TTL_SECONDS, or `refresh` is set. If revalidation fails the
+    stored copy is used. Fresh downloads are saved to the store.
+    """
+    with span("transcript_store"):
+        stored = await load_transcript(video_id, TRANSCRIPT_LANGUAGE)
+    if stored is not None and not refresh and (
+        TRANSCRIPT_TTL_SECONDS <= 0 or stored["age_seconds"] < TRANSCRIPT_TTL_SECONDS
+    ):
+        logger.info(f"Using stored transcript for video {video_id} ({len(stored['segments'])} segments).")
+        return stored["segments"], "store"
+
+    logger.info(f"Fetching transcript for video: {video_id}")
+    # youtube_transcript_api is synchronous, so it runs in the bounded executor
+    try:
+        with span("fetch_transcript"):
+            segments = await run_blocking(fetch_transcript_segments, video_id, TRANSCRIPT_LANGUAGE)
+    except Exception as e:
+        if stored is None:
+            raise
+        logger.warning(f"could not revalidate transcript for {video_id} ({e}); using the stored copy.")
+        return stored["segments"], "store"
+    if not segments:
+        if stored is not None:
+            logger.info(f"Transcript for {video_id} is no longer available on YouTube; using the stored copy.")
+            return stored["segments"], "store"
+        return None, "youtube"
+    with span("transcript_store"):
+        await save_transcript(video_id, segments, TRANSCRIPT_LANGUAGE)
+    return segments, "youtube"
+
+
+async def ingest_video(video_id: str, on_stage=None, refresh_transcript: bool = False) -> dict:
+    """
+    Runs the full ingestion for one video: transcript (from the raw-transcript
+    store or YouTube), chunking, embedding + storage, then title and suggested
+    questions.
+    `on_stage` is an optional async callback invoked with the name of each
+    stage as it starts, used to report progress.
+    """
+    with trace("ingest", video_id=video_id):
+        async def enter(stage: str):
+            if on_stage is not None:
+                await on_stage(stage)
+
+        # Step 2 - Download transcript, unless we already have it
+        await enter("fetching_transcript")
+        try:
+            segments, transcript_source = await load_transcript_segments(video_id, refresh=refresh_transcript)
+        except Exception as e:
+            raise IngestionError(f"Failed to fetch transcript: {str(e)}", stage="fetching_transcript") from e
+        if not segments:
+            raise TranscriptUnavailableError(video_id)
+
+        # Step 3 - Chunking, segment by segment so each chunk knows its timestamps
+        await enter("chunking")
+        with span("chunk"):
+            chunks = await run_blocking(chunk_segments, segments, video_id, CHUNK_SIZE, CHUNK_OVERLAP)
+        logger.info(f"Created {len(chunks)} chunks for video {video_id}")
+
+        # Step 4 & 5 - Generate embeddings and Store (PostgreSQL)
+        # If the video was ingested before, only new or changed chunks are embedded
+        # (through the embedding cache) and only the difference is written.
+        await enter("embedding")
+        try:
+            with span("store"):
+                sync = await sync_video_documents(video_id, chunks)
+        except Exception as e:
+            raise IngestionError(f"Failed to store embeddings: {str(e)}", stage="embedding") from e
+        logger.info(
+            f"Successfully ingested video {video_id} with {sync['chunks_total']} chunks "
+            f"(+{sync['chunks_added']} / -{sync['chunks_removed']}, "
+            f"cache hit rate {sync['cache_hit_rate']:.0%}, saved ~{sync['time_saved_seconds']}s of embedding)."
+        )
+        run_in_background(maintain_index_in_background())
+
+        # Step 6 - Generate title and suggested questions from transcript
+        await enter("summarizing")
+        logger.info(f"Generating title and questions for {video_id}...")
+        summary = await summarize_video(segments)
+        if PRECOMPUTE_SUGGESTED_ANSWERS and summary["suggested_questions"]:
+            if await precomputed_answers_current(video_id, sync, summary["suggested_questions"]):
+                logger.info(f"Video {video_id} is unchanged; keeping its precomputed answers.")
+            else:
+                run_in_background(precompute_suggested_answers(video_id, summary["suggested_questions"]))
+
+        return {
+            "video_id": video_id,
+            "chunks_created": sync["chunks_total"],
+            "title": summary["title"],
+            "suggested_questions": summary["suggested_questions"],
+            "embedding_stats": sync,
+            "transcript_source": transcript_source,
+        }
+
+
+async def rechunk_video(
+    video_id: str,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    reembed: bool = False,
+) -> dict | None:
+    """
+    Rebuilds a video's chunks from its stored raw transcript, without going
+    to YouTube, and syncs them (only changed chunks are embedded, unless
+    `reembed`). Returns the sync stats, or None if no transcript is stored.
+    """
+    stored = await load_transcript(video_id, TRANSCRIPT_LANGUAGE)
+    if stored is None:
+        return None
+    chunks = await run_blocking(chunk_segments, stored["segments"], video_id, chunk_size, chunk_overlap)
+    return await sync_video_documents(video_id, chunks, reembed=reembed)
+
+
+async def precomputed_answers_current(video_id: str, sync: dict, questions: list[str]) -> bool:
+    """
+    Whether every question already has a precomputed answer built from the
+    video's current chunks. Stored answers are deleted whenever the chunks
+    change, so after a sync that changed nothing, any stored answer is current.
+    """
+    if sync["chunks_added"] or sync["chunks_removed"]:
+        return False
+    stored = await precomputed_questions(video_id)
+    return all(normalize_question(question) in stored for question in questions)
+
+
+async def precompute_suggested_answers(video_id: str, questions: list[str]) -> int:
+    """
+    Generates and stores answers (with sources) to a video's suggested
+    questions so /ask can return them without retrieval or generation.
+    Runs as a background stage after storage. Returns how many were stored.
+    """
+    async with _precompute_slots:
+        with trace("precompute", video_id=video_id):
+            try:
+                fingerprint = await video_fingerprint(video_id)
+                if fingerprint is None:
+                    return 0
+                answers = []
+                for question in questions:
+                    context_docs = await retrieve_context(question, video_id=video_id)
+                    if not context_docs:
+                        continue
+                    answers.append({
+                        "question": question,
+                        "answer": await generate_answer(question, context_docs, priority=PRIORITY_BACKGROUND),
+                        "sources": list(set(doc.metadata.get("video_id", "Unknown") for doc in context_docs)),
+                        "citations": build_citations(context_docs),
+                    })
+                if not await save_precomputed_answers(video_id, answers, fingerprint):
+                    logger.info(f"Video {video_id} changed while precomputing answers; discarded them.")
+                    return 0
+                logger.info(f"Precomputed {len(answers)} suggested answers for video {video_id}.")
+                return len(answers)
+            except Exception as e:
+                logger.warning(f"could not precompute suggested answers for {video_id}: {e}")
+                return 0
@@ -0,0 +1,155 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from src.resources import EMBEDDING_MODEL, get_embeddings, run_in_background
+from src.answer_cache import normalize_question
+from src.telemetry import record_embedded_texts
+
+# ---------------------------------------------------------
+# Query embedding settings (configurable via .env)
+# ---------------------------------------------------------
+
+# LRU cache of question embeddings, keyed by model and normalized question
+QUERY_EMBED_CACHE_ENABLED = os.getenv("QUERY_EMBED_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+QUERY_EMBED_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_EMBED_CACHE_MAX_ENTRIES", "5000"))
+# Questions arriving within this window are embedded in one Ollama call (0 = no batching)
+QUERY_EMBED_BATCH_WINDOW_MS = float(os.getenv("QUERY_EMBED_BATCH_WINDOW_MS", "5"))
+QUERY_EMBED_MAX_BATCH = int(os.getenv("QUERY_EMBED_MAX_BATCH", "32"))
+
+
+class QueryEmbedder:
+    """
+    Embeds questions for retrieval. Repeated questions are served from an
+    in-memory LRU cache; concurrent requests for the same question share one
+    embedding; and different questions arriving within QUERY_EMBED_BATCH_WINDOW_MS
+    of each other are sent to Ollama as a single batch call (a cache miss
+    waits at most that long before its embed call starts).
+    Used from the event loop only, so no locking.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = QUERY_EMBED_CACHE_MAX_ENTRIES,
+        batch_window_ms: float = QUERY_EMBED_BATCH_WINDOW_MS,
+        max_batch: int = QUERY_EMBED_MAX_BATCH,
+        cache_enabled: bool = QUERY_EMBED_CACHE_ENABLED,
+    ):
+        self.max_entries = max_entries
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.cache_enabled = cache_enabled
+        self._cache: OrderedDict[tuple, list[float]] = OrderedDict()
+        # Embeddings being computed, so concurrent identical questions share one
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        # Questions waiting for the batch window to close
+        self._queue: list[tuple[tuple, str]] = []
+        self._timer: asyncio.Task | None = None
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.batches = 0
+        self.batched_texts = 0
+        self.max_batch_seen = 0
+        self.embed_seconds = 0.0
+
+    @staticmethod
+    def _key(question: str) -> tuple:
+        return (EMBEDDING_MODEL, normalize_question(question))
+
+    async def embed(self, question: str) -> list[float]:
+        key = self._key(question)
+        if self.cache_enabled and key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key]
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._queue.append((key, question))
+        if len(self._queue) >= self.max_batch or self.batch_window <= 0:
+            batch, self._queue = self._queue, []
+            run_in_background(self._send(batch))
+        elif self._timer is None:
+            self._timer = run_in_background(self._flush_after_window())
+        # shield: one caller giving up must not cancel the others' embedding
+        return await asyncio.shield(future)
+
+    async def _flush_after_window(self) -> None:
+        try:
+            await asyncio.sleep(self.batch_window)
+        finally:
+            self._timer = None
+        batch, self._queue = self._queue, []
+        if batch:
+            await self._send(batch)
+
+    async def _send(self, batch: list[tuple[tuple, str]]) -> None:
+        """
+        Embeds a batch of questions in one Ollama call and resolves their futures.
+        """
+        self.batches += 1
+        self.batched_texts += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        started = time.perf_counter()
+        try:
+            vectors = await get_embeddings().aembed_documents([question for _, question in batch])
+        except Exception as e:
+            for key, _ in batch:
+                future = self._inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+        self.embed_seconds += time.perf_counter() - started
+        record_embedded_texts(len(batch))
+        for (key, _), vector in zip(batch, vectors):
+            if self.cache_enabled:
+                self._cache[key] = vector
+                self._cache.move_to_end(key)
+            future = self._inflight.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(vector)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "cache_enabled": self.cache_enabled,
+            "entries": len(self._cache),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "batch_window_ms": self.batch_window * 1000,
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_texts / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "avg_batch_ms": round(self.embed_seconds * 1000 / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+_embedder: QueryEmbedder | None = None
+
+
+def get_query_embedder() -> QueryEmbedder:
+    """
+    Returns the process-wide query embedder.
+    """
+    global _embedder
+    if _embedder is None:
+        _embedder = QueryEmbedder()
+    return _embedder
+
+
+async def embed_question(question: str) -> list[float]:
+    """
+    Embedding of a question for retrieval, through the cache and micro-batcher.
+    """
+    return await get_query_embedder().embed(question)
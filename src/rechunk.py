@@ -0,0 +1,64 @@
+"""
+Re-chunks (and optionally re-embeds) ingested videos from the raw-transcript
+store, without contacting YouTube. Use it after changing the chunking
+parameters or EMBEDDING_MODEL. Only chunks that actually change are embedded
+(through the embedding cache) unless --re-embed is given.
+
+Usage:
+    python -m src.rechunk --chunk-size 800 --chunk-overlap 150
+    python -m src.rechunk --video VIDEO_ID --re-embed
+"""
+import argparse
+import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.resources import init_resources, shutdown_resources
+from src.store import init_schema, list_stored_transcripts
+from src.pipeline import CHUNK_SIZE, CHUNK_OVERLAP, TRANSCRIPT_LANGUAGE, rechunk_video
+from src.vector_index import maintain_vector_index
+from src.embedding_cache import close_embedding_cache
+
+
+async def rechunk(args) -> int:
+    init_resources()
+    try:
+        await init_schema()
+        video_ids = args.video or await list_stored_transcripts(TRANSCRIPT_LANGUAGE)
+        print(f"Re-chunking {len(video_ids)} videos (chunk_size={args.chunk_size}, chunk_overlap={args.chunk_overlap}).")
+        failed = 0
+        for video_id in video_ids:
+            try:
+                sync = await rechunk_video(video_id, args.chunk_size, args.chunk_overlap, reembed=args.re_embed)
+            except Exception as e:
+                failed += 1
+                print(f"{video_id}: failed ({e})")
+                continue
+            if sync is None:
+                failed += 1
+                print(f"{video_id}: no stored transcript; ingest it first.")
+                continue
+            print(
+                f"{video_id}: {sync['chunks_total']} chunks "
+                f"(+{sync['chunks_added']} / -{sync['chunks_removed']}, {sync['cache_misses']} embedded)"
+            )
+        print(f"ANN index: {await maintain_vector_index(force=True)}")
+        return 1 if failed else 0
+    finally:
+        close_embedding_cache()
+        await shutdown_resources()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild chunks from stored transcripts")
+    parser.add_argument("--video", action="append", help="Video id to re-chunk (repeatable; default: all stored)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--re-embed", action="store_true", help="Replace every chunk's embedding, not only changed chunks")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(rechunk(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from src.resources import LLM_MODEL
+from src.generator import summarize_transcript, summarize_section, reduce_section_summaries
+from src.store import get_cached_summaries, save_cached_summaries
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# Video summary settings (configurable via .env)
+# ---------------------------------------------------------
+
+# Transcripts up to this many characters are summarized in a single prompt;
+# longer ones are split into sections of about this size (map step)
+SUMMARY_SECTION_CHARS = int(os.getenv("SUMMARY_SECTION_CHARS", "6000"))
+# Most sections per video: longer transcripts get proportionally longer sections,
+# so the map step stays one round of concurrent calls
+SUMMARY_MAX_SECTIONS = int(os.getenv("SUMMARY_MAX_SECTIONS", "12"))
+# Section summaries generated at the same time, across all videos being ingested
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "12"))
+# Reuse section and video summaries of unchanged transcripts (stored in Postgres)
+SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Part of every cache key: bump it when a summary prompt changes
+SUMMARY_PROMPT_VERSION = "1"
+
+FALLBACK_SUMMARY = {"title": "Untitled Video", "suggested_questions": []}
+
+_section_slots = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+
+_stats = {
+    "videos": 0,
+    "video_cache_hits": 0,
+    "sections": 0,
+    "section_cache_hits": 0,
+    "sections_summarized": 0,
+    "sections_failed": 0,
+}
+
+
+def _clock(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def split_sections(
+    segments: list[dict], section_chars: int = SUMMARY_SECTION_CHARS, max_sections: int = SUMMARY_MAX_SECTIONS,
+) -> list[dict]:
+    """
+    Splits a transcript into consecutive sections on segment boundaries:
+    [{"text", "start", "end"}]. Sections are about section_chars long, or
+    longer if that would make more than max_sections of them.
+    """
+    total = sum(len(seg["text"]) + 1 for seg in segments)
+    target = max(section_chars, -(-total // max(1, max_sections)))
+    sections, parts, length, start = [], [], 0, None
+    for seg in segments:
+        if start is None:
+            start = seg.get("start", 0.0)
+        parts.append(seg["text"])
+        length += len(seg["text"]) + 1
+        end = seg.get("start", 0.0) + seg.get("duration", 0.0)
+        if length >= target:
+            sections.append({"text": " ".join(parts), "start": start, "end": end})
+            parts, length, start = [], 0, None
+    if parts:
+        if sections and length < target // 4:
+            # Fold a short tail into the last section rather than summarizing a scrap
+            sections[-1]["text"] += " " + " ".join(parts)
+            sections[-1]["end"] = end
+        else:
+            sections.append({"text": " ".join(parts), "start": start, "end": end})
+    return sections
+
+
+def _cache_key(kind: str, *parts: str) -> str:
+    payload = "\0".join((LLM_MODEL, SUMMARY_PROMPT_VERSION, kind, *parts))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def _load_cached(keys: list[str]) -> dict[str, str]:
+    if not SUMMARY_CACHE_ENABLED:
+        return {}
+    try:
+        return await get_cached_summaries(keys)
+    except Exception as e:
+        logger.warning(f"could not read the summary cache: {e}")
+        return {}
+
+
+async def _save_cached(summaries: dict[str, str]) -> None:
+    if not SUMMARY_CACHE_ENABLED:
+        return
+    try:
+        await save_cached_summaries(summaries)
+    except Exception as e:
+        logger.warning(f"could not write the summary cache: {e}")
+
+
+async def _summarize_one(section: dict, position: str) -> str:
+    async with _section_slots:
+        return await summarize_section(section["text"], position)
+
+
+async def summarize_sections(sections: list[dict]) -> list[str]:
+    """
+    Map step: summarizes every section concurrently (at most SUMMARY_CONCURRENCY
+    LLM calls at once), reusing cached summaries of unchanged sections.
+    Sections whose summary fails are left out; raises if all of them fail.
+    """
+    positions = [
+        f"part {i} of {len(sections)}, {_clock(section['start'])}-{_clock(section['end'])}"
+        for i, section in enumerate(sections, start=1)
+    ]
+    keys = [_cache_key("section", position, section["text"]) for section, position in zip(sections, positions)]
+    cached = await _load_cached(keys)
+    _stats["sections"] += len(sections)
+    _stats["section_cache_hits"] += len(cached)
+
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    results = await asyncio.gather(
+        *(_summarize_one(sections[i], positions[i]) for i in missing), return_exceptions=True,
+    )
+    fresh = {}
+    for i, result in zip(missing, results):
+        if isinstance(result, BaseException) or not result:
+            _stats["sections_failed"] += 1
+            logger.warning(f"could not summarize section {positions[i]}: {result}")
+            continue
+        fresh[keys[i]] = result
+    _stats["sections_summarized"] += len(fresh)
+    await _save_cached(fresh)
+
+    summaries = [cached.get(key) or fresh.get(key) for key in keys]
+    summaries = [summary for summary in summaries if summary]
+    if not summaries:
+        raise RuntimeError("no transcript section could be summarized")
+    return summaries
+
+
+async def _cached_video_summary(key: str, generate) -> dict:
+    cached = (await _load_cached([key])).get(key)
+    if cached is not None:
+        _stats["video_cache_hits"] += 1
+        return json.loads(cached)
+    summary = await generate()
+    await _save_cached({key: json.dumps(summary)})
+    return summary
+
+
+async def summarize_video(segments: list[dict]) -> dict:
+    """
+    Title and 3 suggested questions covering the whole transcript.
+    Short transcripts take a single prompt. Longer ones are map-reduced: the
+    sections are summarized concurrently and the title and questions are
+    generated from those summaries, so wall-clock time is about one section
+    call plus the reduce call. Re-summarizing an unchanged transcript is served
+    from the cache without any LLM call.
+    Returns {"title": "...", "suggested_questions": [...]}, with a placeholder
+    title if the LLM fails.
+    """
+    _stats["videos"] += 1
+    sections = split_sections(segments)
+    if not sections:
+        return dict(FALLBACK_SUMMARY)
+    try:
+        if len(sections) == 1:
+            text = sections[0]["text"]
+            return await _cached_video_summary(_cache_key("video", text), lambda: summarize_transcript(text))
+        summaries = await summarize_sections(sections)
+        return await _cached_video_summary(
+            _cache_key("reduce", *summaries), lambda: reduce_section_summaries(summaries),
+        )
+    except Exception as e:
+        logger.warning(f"could not generate video summary: {e}")
+        return dict(FALLBACK_SUMMARY)
+
+
+def summary_stats() -> dict:
+    section_lookups = _stats["sections"]
+    return {
+        **_stats,
+        "section_cache_hit_rate": round(_stats["section_cache_hits"] / section_lookups, 4) if section_lookups else 0.0,
+        "section_chars": SUMMARY_SECTION_CHARS,
+        "max_sections": SUMMARY_MAX_SECTIONS,
+        "concurrency": SUMMARY_CONCURRENCY,
+        "cache_enabled": SUMMARY_CACHE_ENABLED,
+    }
@@ -0,0 +1,196 @@
+import os
+import time
+import logging
+import contextvars
+from contextlib import contextmanager
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# Telemetry settings (configurable via .env)
+# ---------------------------------------------------------
+
+# Requests slower than this log their per-stage breakdown (0 = log every request)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "3000"))
+
+# Stage latencies range from sub-millisecond cache hits to multi-minute ingestions
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_seconds", "Time spent in one stage of a request", ["operation", "stage"], buckets=_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "rag_request_seconds", "End-to-end time of an ask or ingest request", ["operation", "outcome"], buckets=_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "rag_llm_tokens_total", "Tokens processed by the LLM", ["operation", "kind"],
+)
+EMBEDDED_TEXTS = Counter(
+    "rag_embedded_texts_total", "Texts sent to the Ollama embedding model", ["operation"],
+)
+LLM_QUEUE_WAIT = Histogram(
+    "rag_llm_queue_wait_seconds", "Time an LLM call waited for a scheduler slot", ["priority"], buckets=_BUCKETS,
+)
+LLM_REJECTED = Counter(
+    "rag_llm_rejected_total", "LLM calls rejected by admission control", ["priority", "reason"],
+)
+LLM_COALESCED = Counter(
+    "rag_llm_coalesced_total", "LLM calls that shared an identical in-flight completion", ["priority"],
+)
+
+
+class Trace:
+    """
+    Per-request record of how long each stage took. Stages that run more than
+    once (e.g. embedding batches) or concurrently are summed.
+    """
+
+    def __init__(self, operation: str, **fields):
+        self.operation = operation
+        self.fields = fields
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    def breakdown_ms(self) -> dict[str, float]:
+        return {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()}
+
+
+_current_trace: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("rag_trace", default=None)
+
+
+@contextmanager
+def trace(operation: str, **fields):
+    """
+    Traces one request ("ask", "ingest", ...): spans opened inside it (also in
+    tasks it starts) are added to its breakdown. Records the end-to-end
+    latency and logs the breakdown if the request took longer than SLOW_REQUEST_MS.
+    """
+    current = Trace(operation, **fields)
+    token = _current_trace.set(current)
+    outcome = "ok"
+    try:
+        yield current
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        try:
+            _current_trace.reset(token)
+        except ValueError:
+            # A streaming response's generator can be finalised from another context
+            pass
+        elapsed = time.perf_counter() - current.started
+        REQUEST_SECONDS.labels(operation, outcome).observe(elapsed)
+        if elapsed * 1000 >= SLOW_REQUEST_MS:
+            details = "".join(f" {key}={value}" for key, value in current.fields.items())
+            logger.warning(
+                f"Slow {operation} ({elapsed * 1000:.0f} ms, {outcome}){details} stages_ms={current.breakdown_ms()}"
+            )
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Times one stage into the rag_stage_seconds histogram and the current trace.
+    Cheap enough (a clock read and a histogram observe) to leave on.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        current = _current_trace.get()
+        STAGE_SECONDS.labels(current.operation if current else "background", stage).observe(seconds)
+        if current is not None:
+            current.add(stage, seconds)
+
+
+def record_llm_tokens(prompt_tokens: int | None, completion_tokens: int | None) -> None:
+    current = _current_trace.get()
+    operation = current.operation if current else "background"
+    if prompt_tokens:
+        LLM_TOKENS.labels(operation, "prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(operation, "completion").inc(completion_tokens)
+
+
+def record_embedded_texts(count: int) -> None:
+    current = _current_trace.get()
+    EMBEDDED_TEXTS.labels(current.operation if current else "background").inc(count)
+
+
+class _StatsCollector:
+    """
+    Exports the pool and cache statistics the app already keeps, read at
+    scrape time so nothing is added to the request path.
+    """
+
+    def describe(self):
+        # Without describe() the registry calls collect() on registration, which
+        # would import the cache modules while they are still importing this one
+        return []
+
+    def collect(self):
+        from src.resources import pool_stats
+        from src.answer_cache import get_answer_cache
+        from src.query_embeddings import get_query_embedder
+        from src.llm_scheduler import get_llm_scheduler
+        from src.warmup import readiness
+        from src import embedding_cache
+
+        pool = pool_stats()
+        if pool.get("initialized"):
+            gauge = GaugeMetricFamily("rag_db_pool_connections", "Database pool connections", labels=["state"])
+            gauge.add_metric(["checked_out"], pool["checked_out"])
+            gauge.add_metric(["checked_in"], pool["checked_in"])
+            gauge.add_metric(["overflow"], max(0, pool["overflow"]))
+            yield gauge
+            yield GaugeMetricFamily("rag_db_pool_size", "Configured database pool size", value=pool["size"])
+
+        hits = CounterMetricFamily("rag_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("rag_cache_misses", "Cache misses", labels=["cache"])
+        entries = GaugeMetricFamily("rag_cache_entries", "Entries held in a cache", labels=["cache"])
+        answer = get_answer_cache().stats()
+        hits.add_metric(["answer"], answer["exact_hits"] + answer["semantic_hits"])
+        misses.add_metric(["answer"], answer["misses"])
+        entries.add_metric(["answer"], answer["entries"])
+        query = get_query_embedder().stats()
+        hits.add_metric(["query_embedding"], query["hits"] + query["coalesced"])
+        misses.add_metric(["query_embedding"], query["misses"])
+        entries.add_metric(["query_embedding"], query["entries"])
+        # Only once ingestion has opened it; scraping shouldn't create the SQLite file
+        if embedding_cache._cache is not None:
+            embedding = embedding_cache.get_embedding_cache().stats()
+            hits.add_metric(["chunk_embedding"], embedding["hits"])
+            misses.add_metric(["chunk_embedding"], embedding["misses"])
+            entries.add_metric(["chunk_embedding"], embedding["entries"])
+        yield hits
+        yield misses
+        yield entries
+
+        scheduler = get_llm_scheduler().stats()
+        depth = GaugeMetricFamily("rag_llm_queue_depth", "LLM calls waiting for a slot", labels=["priority"])
+        active = GaugeMetricFamily("rag_llm_active", "LLM calls holding a slot", labels=["priority"])
+        for priority, count in scheduler["queued"].items():
+            depth.add_metric([priority], count)
+        for priority, count in scheduler["active"].items():
+            active.add_metric([priority], count)
+        yield depth
+        yield active
+
+        yield GaugeMetricFamily("rag_ready", "1 once the startup warmup has finished", value=int(readiness()["ready"]))
+        yield GaugeMetricFamily(
+            "rag_query_embed_batch_size_avg", "Average questions per query embedding batch",
+            value=query["avg_batch_size"],
+        )
+
+
+REGISTRY.register(_StatsCollector())
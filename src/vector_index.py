@@ -0,0 +1,312 @@
+import os
+import logging
+import asyncio
+import math
+import time
+from sqlalchemy import text
+from src.resources import EMBEDDING_DIM, get_engine
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# Approximate-nearest-neighbour index settings (configurable via .env)
+# ---------------------------------------------------------
+
+# "hnsw" (default), "ivfflat", or "none" to always scan exactly
+ANN_INDEX_TYPE = os.getenv("ANN_INDEX_TYPE", "hnsw").lower()
+ANN_INDEX_NAME = "ix_embedding_ann"
+
+# Below this many rows a sequential scan is fast enough (IVFFlat also needs data to train on)
+ANN_MIN_ROWS = int(os.getenv("ANN_MIN_ROWS", "1000"))
+# Rebuild once the table has grown by this factor since the last build
+ANN_REBUILD_GROWTH = float(os.getenv("ANN_REBUILD_GROWTH", "2.0"))
+# Minimum seconds between two maintenance checks triggered by ingestion
+ANN_CHECK_INTERVAL = float(os.getenv("ANN_CHECK_INTERVAL", "60"))
+ANN_MAINTENANCE_WORK_MEM = os.getenv("ANN_MAINTENANCE_WORK_MEM", "512MB")
+
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+# Default per-query recall knobs (pgvector defaults are 40 and 1)
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+IVFFLAT_PROBES = int(os.getenv("IVFFLAT_PROBES", "10"))
+# Largest hnsw.ef_search pgvector accepts
+HNSW_MAX_EF_SEARCH = 1000
+
+# What the ANN index stores: "full" (float32 vectors), "halfvec" (float16, half
+# the size) or "binary" (1 bit per dimension, 1/32 of the size). With a compact
+# index, searches shortlist candidates on it and re-score them with the full
+# vectors kept in the table. Needs pgvector 0.7.0+; migrate with src.migrate_vectors
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "full").lower()
+# A compact search shortlists this many times the requested rows for re-scoring
+# (0 = per storage: 2 for halfvec, whose ranking barely changes, 10 for binary)
+VECTOR_RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", "0"))
+_DEFAULT_RESCORE_FACTORS = {"full": 1, "halfvec": 2, "binary": 10}
+
+# storage: (indexed expression, operator class, distance operator, query expression)
+# The ANN index is built on the expression; queries must use the same one to hit it
+VECTOR_STORAGES = {
+    "full": (
+        f"CAST(embedding AS vector({EMBEDDING_DIM}))", "vector_cosine_ops", "<=>",
+        f"CAST(:embedding AS vector({EMBEDDING_DIM}))",
+    ),
+    "halfvec": (
+        f"CAST(embedding AS halfvec({EMBEDDING_DIM}))", "halfvec_cosine_ops", "<=>",
+        f"CAST(:embedding AS halfvec({EMBEDDING_DIM}))",
+    ),
+    "binary": (
+        f"CAST(binary_quantize(embedding) AS bit({EMBEDDING_DIM}))", "bit_hamming_ops", "<~>",
+        f"binary_quantize(CAST(:embedding AS vector({EMBEDDING_DIM})))",
+    ),
+}
+# Bytes one indexed vector takes, per storage (before the index's own overhead)
+VECTOR_BYTES = {"full": 4 * EMBEDDING_DIM, "halfvec": 2 * EMBEDDING_DIM, "binary": -(-EMBEDDING_DIM // 8)}
+
+# Arbitrary constant for the cross-replica advisory lock
+_ADVISORY_LOCK_KEY = 7_264_001
+
+_maintenance_lock = asyncio.Lock()
+_last_check = 0.0
+# Storage of the index searches can use right now; stays on the old one while a
+# migration builds its replacement. Without an index the search is exact anyway.
+# Re-read from the database every ANN_CHECK_INTERVAL, as another replica may migrate
+_serving_storage = "full"
+_serving_storage_read = float("-inf")
+
+
+def ann_distance_expr(storage: str) -> str:
+    """
+    Distance between the chunk `e` and :embedding that the index of this storage serves.
+    """
+    expression, _, operator, query = VECTOR_STORAGES[storage]
+    return f"{expression.replace('embedding', 'e.embedding', 1)} {operator} {query}"
+
+
+def default_rescore_factor(storage: str) -> int:
+    return VECTOR_RESCORE_FACTOR or _DEFAULT_RESCORE_FACTORS[storage]
+
+
+async def _read_serving_storage(conn) -> str:
+    global _serving_storage, _serving_storage_read
+    _serving_storage_read = time.monotonic()
+    if not (await conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": ANN_INDEX_NAME})).scalar():
+        _serving_storage = "full"
+        return _serving_storage
+    state = (await conn.execute(
+        text("SELECT storage FROM rag_vector_index_state WHERE index_name = :name"), {"name": ANN_INDEX_NAME},
+    )).first()
+    _serving_storage = state.storage if state is not None else "full"
+    return _serving_storage
+
+
+async def serving_storage() -> str:
+    """
+    Storage of the ANN index that is currently built ("full" if there is none).
+    Re-read from rag_vector_index_state at most every ANN_CHECK_INTERVAL, so a
+    replica that never builds the index itself follows another one's migration.
+    """
+    if ANN_INDEX_TYPE not in ("hnsw", "ivfflat"):
+        return "full"
+    if time.monotonic() - _serving_storage_read >= ANN_CHECK_INTERVAL:
+        try:
+            async with get_engine().connect() as conn:
+                await _read_serving_storage(conn)
+        except Exception as e:
+            logger.warning(f"Could not read the ANN index state, still assuming {_serving_storage} vectors: {e}")
+    return _serving_storage
+
+
+def ivfflat_lists(rows: int) -> int:
+    """
+    Number of IVFFlat lists recommended by pgvector: rows / 1000 up to 1M rows,
+    sqrt(rows) above that.
+    """
+    if rows <= 1_000_000:
+        return max(10, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+async def apply_search_settings(conn, ef_search: int | None = None, probes: int | None = None) -> None:
+    """
+    Sets the ANN recall/latency knobs for the current transaction only.
+    ef_search is clamped to what pgvector accepts.
+    """
+    await conn.execute(
+        text("SELECT set_config('hnsw.ef_search', :ef, true), set_config('ivfflat.probes', :probes, true)"),
+        {"ef": str(min(ef_search or HNSW_EF_SEARCH, HNSW_MAX_EF_SEARCH)), "probes": str(probes or IVFFLAT_PROBES)},
+    )
+
+
+async def init_index_state(conn) -> None:
+    """
+    Creates the table that remembers when and at what size the ANN index was built.
+    """
+    await conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS rag_vector_index_state ("
+        " index_name VARCHAR PRIMARY KEY,"
+        " index_type VARCHAR NOT NULL,"
+        " rows_at_build BIGINT NOT NULL,"
+        " built_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+    ))
+    # Indexes built before compact storage existed hold full vectors
+    await conn.execute(text(
+        "ALTER TABLE rag_vector_index_state ADD COLUMN IF NOT EXISTS storage VARCHAR NOT NULL DEFAULT 'full'"
+    ))
+
+
+async def check_storage_support(conn, storage: str) -> None:
+    """
+    Raises if the installed pgvector cannot index this storage (halfvec and
+    binary quantization need 0.7.0).
+    """
+    if storage not in VECTOR_STORAGES:
+        raise ValueError(f"unknown VECTOR_STORAGE {storage!r}; use one of {', '.join(VECTOR_STORAGES)}")
+    if storage == "full":
+        return
+    version = (await conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))).scalar()
+    if version is None or tuple(int(part) for part in version.split(".")[:2]) < (0, 7):
+        raise RuntimeError(f"VECTOR_STORAGE={storage} needs pgvector 0.7.0 or newer (installed: {version})")
+
+
+def _index_ddl(name: str, index_type: str, rows: int, storage: str = "full") -> str:
+    expression, opclass, _, _ = VECTOR_STORAGES[storage]
+    if index_type == "ivfflat":
+        return (
+            f"CREATE INDEX CONCURRENTLY {name} ON langchain_pg_embedding "
+            f"USING ivfflat (({expression}) {opclass}) WITH (lists = {ivfflat_lists(rows)})"
+        )
+    return (
+        f"CREATE INDEX CONCURRENTLY {name} ON langchain_pg_embedding "
+        f"USING hnsw (({expression}) {opclass}) "
+        f"WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})"
+    )
+
+
+async def _build_index(conn, index_type: str, rows: int, replace: bool, storage: str) -> None:
+    """
+    Builds the ANN index without blocking writes. A replacement is built under
+    a temporary name and swapped in, so queries keep an index during the rebuild.
+    """
+    global _serving_storage
+    name = f"{ANN_INDEX_NAME}_new" if replace else ANN_INDEX_NAME
+    await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {ANN_INDEX_NAME}_new"))
+    # Session-level (SET LOCAL needs a transaction, which CONCURRENTLY can't run in),
+    # so reset it before the connection goes back to the pool
+    await conn.execute(text(f"SET maintenance_work_mem = '{ANN_MAINTENANCE_WORK_MEM}'"))
+    started = time.perf_counter()
+    try:
+        await conn.execute(text(_index_ddl(name, index_type, rows, storage)))
+        if replace:
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {ANN_INDEX_NAME}"))
+            await conn.execute(text(f"ALTER INDEX {name} RENAME TO {ANN_INDEX_NAME}"))
+    finally:
+        await conn.execute(text("RESET maintenance_work_mem"))
+    await conn.execute(
+        text(
+            "INSERT INTO rag_vector_index_state (index_name, index_type, rows_at_build, built_at, storage) "
+            "VALUES (:name, :type, :rows, now(), :storage) "
+            "ON CONFLICT (index_name) DO UPDATE SET index_type = EXCLUDED.index_type, "
+            "rows_at_build = EXCLUDED.rows_at_build, built_at = EXCLUDED.built_at, storage = EXCLUDED.storage"
+        ),
+        {"name": ANN_INDEX_NAME, "type": index_type, "rows": rows, "storage": storage},
+    )
+    _serving_storage = storage
+    logger.info(
+        f"Built {index_type} index ({storage} vectors) on {rows} embeddings in {time.perf_counter() - started:.1f}s."
+    )
+
+
+async def maintain_vector_index(force: bool = False, storage: str | None = None) -> str:
+    """
+    Creates the ANN index once the table is big enough, and rebuilds it when the
+    table has grown by ANN_REBUILD_GROWTH since the last build (IVFFlat lists
+    are re-sized, HNSW graphs are compacted) or when ANN_INDEX_TYPE or the
+    storage (default VECTOR_STORAGE) changed.
+    Returns what was done. Safe to call often: checks are throttled and a
+    Postgres advisory lock keeps replicas from building at the same time.
+    """
+    global _last_check, _serving_storage
+    storage = storage or VECTOR_STORAGE
+    if ANN_INDEX_TYPE not in ("hnsw", "ivfflat"):
+        _serving_storage = "full"
+        return "disabled"
+    if not force and time.monotonic() - _last_check < ANN_CHECK_INTERVAL:
+        return "throttled"
+    if _maintenance_lock.locked():
+        return "busy"
+
+    async with _maintenance_lock:
+        _last_check = time.monotonic()
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        async with get_engine().connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            # Before the lock: a replica that loses it must still follow a migration
+            await _read_serving_storage(conn)
+            if not (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})).scalar():
+                return "busy"
+            try:
+                await init_index_state(conn)
+                rows = (await conn.execute(text("SELECT count(*) FROM langchain_pg_embedding"))).scalar()
+                exists = (await conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": ANN_INDEX_NAME})).scalar()
+                state = (await conn.execute(
+                    text("SELECT index_type, rows_at_build, storage FROM rag_vector_index_state WHERE index_name = :name"),
+                    {"name": ANN_INDEX_NAME},
+                )).first()
+                await check_storage_support(conn, storage)
+
+                if not exists:
+                    if rows < ANN_MIN_ROWS:
+                        return "too_small"
+                    await _build_index(conn, ANN_INDEX_TYPE, rows, replace=False, storage=storage)
+                    return "created"
+
+                if state is None or state.index_type != ANN_INDEX_TYPE or state.storage != storage:
+                    await _build_index(conn, ANN_INDEX_TYPE, rows, replace=True, storage=storage)
+                    return "rebuilt"
+                if rows >= max(state.rows_at_build, 1) * ANN_REBUILD_GROWTH:
+                    await _build_index(conn, ANN_INDEX_TYPE, rows, replace=True, storage=storage)
+                    return "rebuilt"
+                return "up_to_date"
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+
+async def maintain_index_in_background(force: bool = False) -> None:
+    """
+    Wrapper for maintain_vector_index() meant for run_in_background():
+    reports what happened and never raises.
+    """
+    try:
+        outcome = await maintain_vector_index(force=force)
+        if outcome in ("created", "rebuilt"):
+            logger.info(f"ANN index {outcome}.")
+    except Exception as e:
+        logger.warning(f"ANN index maintenance failed: {e}")
+
+
+async def index_stats() -> dict:
+    """
+    Reports the configured index type and storage, the index size, the row
+    count at last build and the size of the chunk table itself.
+    """
+    async with get_engine().connect() as conn:
+        row = (await conn.execute(
+            text(
+                "SELECT s.index_type, s.rows_at_build, s.built_at, s.storage, "
+                "pg_relation_size(to_regclass(:name)) AS size_bytes, "
+                "pg_table_size('langchain_pg_embedding') AS table_bytes "
+                "FROM rag_vector_index_state s WHERE s.index_name = :name"
+            ),
+            {"name": ANN_INDEX_NAME},
+        )).first()
+    if row is None:
+        return {"type": ANN_INDEX_TYPE, "storage": VECTOR_STORAGE, "built": False}
+    return {
+        "type": row.index_type,
+        "storage": row.storage,
+        "configured_storage": VECTOR_STORAGE,
+        "built": True,
+        "rows_at_build": row.rows_at_build,
+        "built_at": row.built_at.isoformat(),
+        "size_bytes": row.size_bytes,
+        "table_bytes": row.table_bytes,
+    }
@@ -0,0 +1,148 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from sqlalchemy import text
+from src.resources import (
+    DB_POOL_SIZE, EMBEDDING_MODEL, LLM_MODEL, get_embeddings, get_engine, get_llm, get_ollama_client, run_blocking,
+)
+from src.telemetry import span, trace
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# Startup warmup settings (configurable via .env)
+# ---------------------------------------------------------
+
+# Before /ready reports ready: load the embedding and chat models in Ollama, open
+# the database connections and import the client libraries, so the first
+# request after a deploy doesn't pay for them. Disabled: ready as soon as the app starts
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+# Seconds between attempts of warmup steps that failed (e.g. Ollama still starting)
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+
+_state = {
+    "ready": False,
+    "started": None,
+    "finished": None,
+    "attempts": 0,
+    "steps": {},
+}
+
+
+async def _warm_database() -> None:
+    # Hold DB_POOL_SIZE connections at once, so that many are opened rather than one reused
+    async with AsyncExitStack() as stack:
+        connections = [await stack.enter_async_context(get_engine().connect()) for _ in range(DB_POOL_SIZE)]
+        for conn in connections:
+            await conn.execute(text("SELECT 1"))
+
+
+async def _warm_embedding_model() -> None:
+    # The raw ollama client imports in a fraction of the time langchain_ollama
+    # takes, so the model loads while the "libraries" step imports that
+    client = await run_blocking(get_ollama_client)
+    await client.embed(model=EMBEDDING_MODEL, input="warmup")
+
+
+async def _warm_chat_model() -> None:
+    client = await run_blocking(get_ollama_client)
+    # An empty prompt makes Ollama load the model without generating anything
+    await client.generate(model=LLM_MODEL, prompt="")
+
+
+async def _warm_libraries() -> None:
+    from src.generator import ANSWER_PROMPT, get_prompt
+    from src.context_packer import count_tokens
+
+    # One after another: parallel imports of the shared langchain_core modules
+    # only wait on each other's import locks
+    await run_blocking(get_embeddings)
+    await run_blocking(get_llm)
+    await run_blocking(get_prompt, ANSWER_PROMPT)
+    # Loads the tiktoken encoding (downloaded on first use)
+    await run_blocking(count_tokens, "warmup")
+
+
+async def _warm_reranker() -> None:
+    from langchain_core.documents import Document
+    from src.retriever import RERANK_ENABLED, RERANKER, rerank_documents
+
+    if RERANK_ENABLED and RERANKER == "cross-encoder":
+        # Loads the cross-encoder model
+        await rerank_documents("warmup", [Document(page_content="warmup")], 1)
+
+
+WARMUP_STEPS = {
+    "database": _warm_database,
+    "embedding_model": _warm_embedding_model,
+    "chat_model": _warm_chat_model,
+    "libraries": _warm_libraries,
+    "reranker": _warm_reranker,
+}
+
+
+async def _run_step(name: str) -> bool:
+    started = time.perf_counter()
+    try:
+        with span(f"warmup_{name}"):
+            await WARMUP_STEPS[name]()
+    except Exception as e:
+        _state["steps"][name] = {"ok": False, "ms": round((time.perf_counter() - started) * 1000, 1), "error": str(e)}
+        logger.warning(f"Warmup step {name} failed: {e}")
+        return False
+    _state["steps"][name] = {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 1)}
+    return True
+
+
+async def warm_up() -> None:
+    """
+    Runs the warmup steps concurrently and retries the failed ones every
+    WARMUP_RETRY_SECONDS until all succeed; the app is ready after that.
+    Meant for run_in_background() at startup; never raises.
+    """
+    _state["started"] = time.time()
+    pending = list(WARMUP_STEPS)
+    logger.info(f"Warming up ({EMBEDDING_MODEL}, {LLM_MODEL}, {DB_POOL_SIZE} DB connections)...")
+    with trace("warmup"):
+        while pending:
+            _state["attempts"] += 1
+            results = await asyncio.gather(*(_run_step(name) for name in pending))
+            pending = [name for name, ok in zip(pending, results) if not ok]
+            if pending:
+                await asyncio.sleep(WARMUP_RETRY_SECONDS)
+    mark_ready()
+    timings = {name: step["ms"] for name, step in _state["steps"].items()}
+    logger.info(f"Warmup finished in {_state['finished'] - _state['started']:.1f}s (ms per step: {timings}).")
+
+
+def mark_ready() -> None:
+    """
+    Reports the app as ready; called after warmup, or at startup when it is disabled.
+    """
+    _state["ready"] = True
+    _state["finished"] = time.time()
+
+
+def readiness() -> dict:
+    """
+    Whether the app is ready for traffic, with the duration (or error) of each warmup step.
+    """
+    if _state["ready"]:
+        status = "ready"
+    elif _state["started"] is None:
+        status = "starting"
+    else:
+        status = "warming_up"
+    elapsed = None
+    if _state["started"] is not None:
+        elapsed = round(((_state["finished"] or time.time()) - _state["started"]) * 1000, 1)
+    return {
+        "ready": _state["ready"],
+        "status": status,
+        "warmup_enabled": WARMUP_ENABLED,
+        "attempts": _state["attempts"],
+        "elapsed_ms": elapsed,
+        "steps": dict(_state["steps"]),
+    }
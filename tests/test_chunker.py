@@ -0,0 +1,50 @@
+from src.chunker import chunk_segments
+
+
+def segments(texts: list[str], duration: float = 3.0) -> list[dict]:
+    return [{"text": text, "start": i * duration, "duration": duration} for i, text in enumerate(texts)]
+
+
+def test_chunks_are_whole_segments_within_chunk_size():
+    texts = [f"segment number {i} says something" for i in range(40)]
+    docs = chunk_segments(segments(texts), "vid", chunk_size=120, chunk_overlap=40)
+    assert len(docs) > 1
+    for doc in docs:
+        assert len(doc.page_content) <= 120
+        # Never cut inside a segment
+        assert doc.page_content.startswith("segment number")
+        assert doc.page_content.endswith("says something")
+    # Every segment is covered, in order
+    assert docs[0].page_content.startswith(texts[0])
+    assert docs[-1].page_content.endswith(texts[-1])
+
+
+def test_next_chunk_starts_with_overlapping_segments():
+    texts = [f"s{i:02d} " + "x" * 15 for i in range(30)]
+    docs = chunk_segments(segments(texts), "vid", chunk_size=100, chunk_overlap=40)
+    for previous, current in zip(docs, docs[1:]):
+        first_segment = current.page_content[:18]
+        assert first_segment in previous.page_content
+        assert current.metadata["start"] < previous.metadata["end"]
+
+
+def test_metadata_records_video_and_time_span():
+    docs = chunk_segments(segments(["a b c", "d e f", "g h i"], duration=2.5), "abc123", chunk_size=1000)
+    assert len(docs) == 1
+    assert docs[0].metadata == {"video_id": "abc123", "start": 0.0, "end": 7.5}
+
+
+def test_long_segment_is_split_and_its_duration_shared():
+    long_text = " ".join(["word"] * 100)  # 499 characters
+    docs = chunk_segments([{"text": long_text, "start": 10.0, "duration": 50.0}], "vid", chunk_size=100, chunk_overlap=0)
+    assert len(docs) >= 5
+    assert all(len(doc.page_content) <= 100 for doc in docs)
+    assert " ".join(doc.page_content for doc in docs) == long_text
+    assert docs[0].metadata["start"] == 10.0
+    assert docs[-1].metadata["end"] == 60.0
+    starts = [doc.metadata["start"] for doc in docs]
+    assert starts == sorted(starts)
+
+
+def test_no_segments_no_chunks():
+    assert chunk_segments([], "vid") == []
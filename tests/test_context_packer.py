@@ -0,0 +1,86 @@
+import pytest
+from langchain_core.documents import Document
+
+from src import context_packer
+from src.context_packer import pack_context
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # Count tokens as chars / 4 so the tests don't depend on downloading tiktoken
+    monkeypatch.setattr(context_packer, "_encoding", None)
+    monkeypatch.setattr(context_packer, "_encoding_failed", True)
+
+
+def chunk(text: str, video_id: str = "vid", start: float | None = None, end: float | None = None) -> Document:
+    metadata = {"video_id": video_id}
+    if start is not None:
+        metadata.update(start=start, end=end)
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_overlapping_chunks_of_a_video_are_merged_in_video_order():
+    shared = "the shared overlap between both chunks"
+    first = chunk("opening words of the video and then " + shared, start=0.0, end=30.0)
+    second = chunk(shared + " followed by what comes next", start=25.0, end=55.0)
+    # The later chunk ranks higher; the merge still reads in video order
+    packed, stats = pack_context([second, first], token_budget=1000)
+    assert stats["merged"] == 1
+    assert len(packed) == 1
+    assert packed[0].page_content == "opening words of the video and then " + shared + " followed by what comes next"
+    assert packed[0].metadata["start"] == 0.0
+    assert packed[0].metadata["end"] == 55.0
+
+
+def test_adjacent_chunks_are_joined_but_other_videos_are_not():
+    a = chunk("first part of the talk", start=0.0, end=10.0)
+    b = chunk("second part of the talk", start=10.5, end=20.0)
+    other = chunk("second part of the talk", video_id="other", start=10.5, end=20.0)
+    packed, stats = pack_context([a, other, b], token_budget=1000, dedup_threshold=1.1)
+    assert stats["merged"] == 1
+    assert [doc.page_content for doc in packed] == [
+        "first part of the talk second part of the talk",
+        "second part of the talk",
+    ]
+
+
+def test_near_duplicates_keep_the_more_relevant_chunk():
+    text = "a speaker repeats the same long sentence about vector search again and again"
+    best = chunk(text, video_id="a")
+    repeat = chunk(text + " today", video_id="b")
+    packed, stats = pack_context([best, repeat], token_budget=1000)
+    assert packed == [best]
+    assert stats["duplicates_dropped"] == 1
+
+
+def test_budget_is_filled_in_relevance_order_and_the_last_chunk_truncated():
+    docs = [chunk(f"chunk {i} " + "word " * 100, video_id=f"v{i}") for i in range(3)]
+    # Each chunk is ~127 estimated tokens; 200 fits one whole chunk plus a partial one
+    packed, stats = pack_context(docs, token_budget=200, dedup_threshold=1.1)
+    assert [doc.page_content.split()[1] for doc in packed] == ["0", "1"]
+    assert packed[1].metadata["truncated"] is True
+    assert "truncated" not in packed[0].metadata
+    assert stats["truncated"] == 1
+    assert stats["dropped_for_budget"] == 1
+    assert stats["tokens_after"] <= 200
+    assert stats["tokens_saved"] == stats["tokens_before"] - stats["tokens_after"]
+
+
+def test_small_leftover_room_is_not_used():
+    docs = [chunk("word " * 150, video_id="a"), chunk("other " * 150, video_id="b")]
+    packed, stats = pack_context(docs, token_budget=200, dedup_threshold=1.1)
+    assert len(packed) == 1
+    assert stats["truncated"] == 0
+
+
+def test_a_single_oversized_chunk_is_truncated_rather_than_dropped():
+    packed, stats = pack_context([chunk("word " * 1000)], token_budget=100)
+    assert len(packed) == 1
+    assert context_packer.count_tokens(packed[0].page_content) <= 100
+    assert not packed[0].page_content.endswith(" ")
+
+
+def test_empty_input():
+    packed, stats = pack_context([], token_budget=100)
+    assert packed == []
+    assert stats["tokens_before"] == stats["tokens_after"] == 0
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+
+from src import embedding_pipeline
+from src.embedding_pipeline import run_embedding_pipeline
+
+
+class FakeEmbeddings:
+    """
+    Returns [len(text)] per text; the call numbered `fail_on` raises.
+    """
+
+    def __init__(self, fail_on: int | None = None):
+        self.calls = 0
+        self.fail_on = fail_on
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(0.001)
+        if call == self.fail_on:
+            raise RuntimeError("embed failed")
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    fake = FakeEmbeddings()
+    monkeypatch.setattr(embedding_pipeline, "get_embeddings", lambda: fake)
+    return fake
+
+
+def documents(count: int) -> list[Document]:
+    return [Document(page_content="x" * (i + 1)) for i in range(count)]
+
+
+def test_every_document_reaches_the_sink_with_its_vector(embeddings):
+    received = []
+
+    async def sink(batch, vectors):
+        received.extend(zip(batch, vectors))
+
+    docs = documents(95)
+    stats = asyncio.run(run_embedding_pipeline(docs, sink, batch_size=10, concurrency=4, use_cache=False))
+    assert sorted(len(doc.page_content) for doc, _ in received) == list(range(1, 96))
+    assert all(vector == [float(len(doc.page_content))] for doc, vector in received)
+    assert stats["batches"] == embeddings.calls == 10
+    assert stats["cache_misses"] == 95
+
+
+def test_failed_embed_batch_stops_every_stage(embeddings):
+    embeddings.fail_on = 2
+
+    async def slow_sink(batch, vectors):
+        await asyncio.sleep(0.01)
+
+    async def scenario():
+        with pytest.raises(RuntimeError, match="embed failed"):
+            await run_embedding_pipeline(documents(2000), slow_sink, batch_size=10, concurrency=4, use_cache=False)
+        calls_when_raised = embeddings.calls
+        await asyncio.sleep(0.1)
+        leftover = asyncio.all_tasks() - {asyncio.current_task()}
+        return calls_when_raised, leftover
+
+    calls_when_raised, leftover = asyncio.run(scenario())
+    assert leftover == set()
+    assert embeddings.calls == calls_when_raised
+
+
+def test_failed_sink_stops_the_embed_workers(embeddings):
+    async def failing_sink(batch, vectors):
+        raise RuntimeError("insert failed")
+
+    async def scenario():
+        with pytest.raises(RuntimeError, match="insert failed"):
+            await run_embedding_pipeline(documents(2000), failing_sink, batch_size=10, concurrency=4, use_cache=False)
+        calls_when_raised = embeddings.calls
+        await asyncio.sleep(0.1)
+        return calls_when_raised, asyncio.all_tasks() - {asyncio.current_task()}
+
+    calls_when_raised, leftover = asyncio.run(scenario())
+    assert leftover == set()
+    assert embeddings.calls == calls_when_raised
@@ -0,0 +1,87 @@
+import asyncio
+import random
+from types import SimpleNamespace
+import pytest
+from src import jobs
+
+
+@pytest.fixture(autouse=True)
+def backoff(monkeypatch):
+    monkeypatch.setattr(jobs, "INGEST_RETRY_BASE_SECONDS", 10.0)
+    monkeypatch.setattr(jobs, "INGEST_RETRY_MAX_SECONDS", 600.0)
+
+
+def test_retry_delay_doubles_per_attempt_within_jitter():
+    random.seed(0)
+    for attempts, full_delay in [(1, 10), (2, 20), (3, 40), (4, 80)]:
+        delays = [jobs.retry_delay(attempts) for _ in range(200)]
+        # Jitter scales the delay by 0.5-1.0
+        assert all(full_delay * 0.5 <= delay <= full_delay for delay in delays)
+        assert max(delays) - min(delays) > full_delay * 0.3
+
+
+def test_retry_delay_is_capped():
+    random.seed(0)
+    delays = [jobs.retry_delay(attempts) for attempts in range(7, 30) for _ in range(20)]
+    assert all(300 <= delay <= 600 for delay in delays)
+
+
+def test_lost_lease_cancels_the_running_ingestion(monkeypatch):
+    updates = []
+    cancelled = asyncio.Event()
+
+    async def update_item(item, sql, params=None):
+        updates.append(sql)
+        # Lease renewals find the claim taken over by another worker
+        return "lease_expires_at = now() +" not in sql
+
+    async def ingest_video(video_id, on_stage):
+        await on_stage("embedding")
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    monkeypatch.setattr(jobs, "INGEST_LEASE_SECONDS", 0.03)
+    monkeypatch.setattr(jobs, "_update_item", update_item)
+    monkeypatch.setattr(jobs, "ingest_video", ingest_video)
+    item = SimpleNamespace(job_id=1, position=0, video_id="vid", attempts=1, claim_id="claim")
+
+    asyncio.run(asyncio.wait_for(jobs._process_item(item), timeout=5))
+    assert cancelled.is_set()
+    # Neither the retry, the failure nor the result was recorded over the new owner's claim
+    assert len(updates) == 2
+    assert "stage = :stage" in updates[0]
+
+
+def test_shutdown_hands_the_video_back_to_the_queue(monkeypatch):
+    updates = []
+    cancelled = asyncio.Event()
+
+    async def update_item(item, sql, params=None):
+        updates.append(sql)
+        return True
+
+    async def ingest_video(video_id, on_stage):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def scenario():
+        worker = asyncio.create_task(jobs._process_item(item))
+        await asyncio.sleep(0.05)
+        worker.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await worker
+
+    monkeypatch.setattr(jobs, "INGEST_LEASE_SECONDS", 0.03)
+    monkeypatch.setattr(jobs, "_update_item", update_item)
+    monkeypatch.setattr(jobs, "ingest_video", ingest_video)
+    item = SimpleNamespace(job_id=1, position=0, video_id="vid", attempts=1, claim_id="claim")
+
+    asyncio.run(scenario())
+    assert cancelled.is_set()
+    assert "status = 'pending'" in updates[-1]
@@ -0,0 +1,214 @@
+import asyncio
+
+import pytest
+
+from src.llm_scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INGEST,
+    PRIORITY_INTERACTIVE,
+    LLMOverloadedError,
+    LLMScheduler,
+)
+
+
+async def settle() -> None:
+    # Let queued tasks run up to their next wait
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def hold_slot(scheduler: LLMScheduler, priority: int, release: asyncio.Event) -> None:
+    async with scheduler.slot(priority):
+        await release.wait()
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, reserved=0, max_queue=10, queue_timeout=5)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold_slot(scheduler, PRIORITY_BACKGROUND, release))
+        await settle()
+
+        order = []
+
+        async def record(name):
+            order.append(name)
+
+        arrivals = [
+            ("background", PRIORITY_BACKGROUND),
+            ("ingest-1", PRIORITY_INGEST),
+            ("interactive", PRIORITY_INTERACTIVE),
+            ("ingest-2", PRIORITY_INGEST),
+        ]
+        waiters = []
+        for name, priority in arrivals:
+            waiters.append(asyncio.create_task(scheduler.run(priority, lambda name=name: record(name))))
+            await settle()
+        assert scheduler.stats()["queued"] == {"interactive": 1, "ingest": 2, "background": 1}
+
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return order, scheduler
+
+    order, scheduler = asyncio.run(scenario())
+    assert order == ["interactive", "ingest-1", "ingest-2", "background"]
+    assert sum(scheduler.active.values()) == 0
+
+
+def test_reserved_slots_are_kept_for_interactive_calls():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=2, reserved=1, max_queue=10, queue_timeout=5)
+        release = asyncio.Event()
+        first = asyncio.create_task(hold_slot(scheduler, PRIORITY_INGEST, release))
+        await settle()
+        second = asyncio.create_task(hold_slot(scheduler, PRIORITY_INGEST, release))
+        await settle()
+        ingest_queued = scheduler.queued[PRIORITY_INGEST]
+        # The reserved slot is free for /ask without waiting
+        answer = await asyncio.wait_for(scheduler.run(PRIORITY_INTERACTIVE, lambda: asyncio.sleep(0, "answer")), 1)
+        release.set()
+        await asyncio.gather(first, second)
+        return ingest_queued, answer
+
+    assert asyncio.run(scenario()) == (1, "answer")
+
+
+def test_interactive_calls_beyond_max_queue_are_rejected():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, reserved=0, max_queue=1, queue_timeout=5)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold_slot(scheduler, PRIORITY_INTERACTIVE, release))
+        await settle()
+        waiter = asyncio.create_task(hold_slot(scheduler, PRIORITY_INTERACTIVE, release))
+        await settle()
+        with pytest.raises(LLMOverloadedError) as rejected:
+            scheduler.check_admission(PRIORITY_INTERACTIVE)
+        with pytest.raises(LLMOverloadedError):
+            await scheduler.run(PRIORITY_INTERACTIVE, lambda: asyncio.sleep(0))
+        # Background work is never rejected, only queued
+        background = asyncio.create_task(scheduler.run(PRIORITY_BACKGROUND, lambda: asyncio.sleep(0, "done")))
+        await settle()
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return rejected.value, await background, scheduler
+
+    error, background_result, scheduler = asyncio.run(scenario())
+    assert error.retry_after >= 1
+    assert background_result == "done"
+    assert scheduler.rejected == {"queue_full": 2, "timeout": 0}
+
+
+def test_interactive_wait_times_out_and_frees_its_place():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, reserved=0, max_queue=10, queue_timeout=0.05)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold_slot(scheduler, PRIORITY_INGEST, release))
+        await settle()
+        with pytest.raises(LLMOverloadedError):
+            await scheduler.run(PRIORITY_INTERACTIVE, lambda: asyncio.sleep(0))
+        queued = dict(scheduler.queued)
+        release.set()
+        await holder
+        # The slot is usable again once released
+        await asyncio.wait_for(scheduler.run(PRIORITY_INTERACTIVE, lambda: asyncio.sleep(0)), 1)
+        return queued, scheduler
+
+    queued, scheduler = asyncio.run(scenario())
+    assert all(count == 0 for count in queued.values())
+    assert scheduler.rejected["timeout"] == 1
+
+
+def test_identical_calls_in_flight_share_one_completion():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=4, reserved=0)
+        calls = []
+
+        async def complete(prompt):
+            calls.append(prompt)
+            await asyncio.sleep(0.01)
+            return prompt.upper()
+
+        results = await asyncio.gather(
+            scheduler.run(PRIORITY_INTERACTIVE, lambda: complete("a"), coalesce_key="a"),
+            scheduler.run(PRIORITY_INTERACTIVE, lambda: complete("a"), coalesce_key="a"),
+            scheduler.run(PRIORITY_INTERACTIVE, lambda: complete("b"), coalesce_key="b"),
+        )
+        # Once finished, the same prompt is completed again
+        results.append(await scheduler.run(PRIORITY_INTERACTIVE, lambda: complete("a"), coalesce_key="a"))
+        return results, calls, scheduler
+
+    results, calls, scheduler = asyncio.run(scenario())
+    assert results == ["A", "A", "B", "A"]
+    assert calls == ["a", "b", "a"]
+    assert scheduler.coalesced == 1
+
+
+def test_coalescing_can_be_turned_off():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=4, reserved=0, coalesce=False)
+        calls = []
+
+        async def complete():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(scheduler.run(PRIORITY_INGEST, complete, coalesce_key="same") for _ in range(3)))
+        return calls
+
+    assert len(asyncio.run(scenario())) == 3
+
+
+def test_interactive_call_does_not_join_a_queued_background_call():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=2, reserved=1, max_queue=10, queue_timeout=0.5)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold_slot(scheduler, PRIORITY_BACKGROUND, release))
+        await settle()
+        calls = []
+
+        async def complete(priority):
+            calls.append(priority)
+            return "answer"
+
+        # e.g. a precomputed suggested answer, queued behind the held background slot
+        background = asyncio.create_task(
+            scheduler.run(PRIORITY_BACKGROUND, lambda: complete(PRIORITY_BACKGROUND), coalesce_key="same prompt")
+        )
+        await settle()
+        assert scheduler.queued[PRIORITY_BACKGROUND] == 1
+        # The same prompt from /ask takes the reserved slot instead of waiting
+        answer = await asyncio.wait_for(
+            scheduler.run(PRIORITY_INTERACTIVE, lambda: complete(PRIORITY_INTERACTIVE), coalesce_key="same prompt"),
+            0.2,
+        )
+        release.set()
+        await asyncio.gather(holder, background)
+        return answer, calls, scheduler
+
+    answer, calls, scheduler = asyncio.run(scenario())
+    assert answer == "answer"
+    assert calls == [PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND]
+    assert scheduler.coalesced == 0
+    assert scheduler._inflight == {}
+
+
+def test_background_call_joins_an_interactive_one_in_flight():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=2, reserved=0)
+        calls = []
+
+        async def complete():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        results = await asyncio.gather(
+            scheduler.run(PRIORITY_INTERACTIVE, complete, coalesce_key="same prompt"),
+            scheduler.run(PRIORITY_BACKGROUND, complete, coalesce_key="same prompt"),
+        )
+        return results, calls, scheduler
+
+    results, calls, scheduler = asyncio.run(scenario())
+    assert results == ["answer", "answer"]
+    assert len(calls) == 1
+    assert scheduler.coalesced == 1
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from src import query_embeddings
+from src.query_embeddings import QueryEmbedder
+
+
+class FakeEmbeddings:
+    """
+    Records each batch call and returns [len(text)] as the vector.
+    """
+
+    def __init__(self, fail: bool = False):
+        self.calls: list[list[str]] = []
+        self.fail = fail
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("ollama down")
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    fake = FakeEmbeddings()
+    monkeypatch.setattr(query_embeddings, "get_embeddings", lambda: fake)
+    return fake
+
+
+def test_questions_within_the_window_share_one_call(embeddings):
+    async def scenario():
+        embedder = QueryEmbedder(batch_window_ms=20, max_batch=32)
+        return embedder, await asyncio.gather(*(embedder.embed(q) for q in ["a", "bb", "ccc"]))
+
+    embedder, vectors = asyncio.run(scenario())
+    assert vectors == [[1.0], [2.0], [3.0]]
+    assert embeddings.calls == [["a", "bb", "ccc"]]
+    assert embedder.stats()["max_batch_size"] == 3
+
+
+def test_full_batch_is_sent_without_waiting_for_the_window(embeddings):
+    async def scenario():
+        embedder = QueryEmbedder(batch_window_ms=60_000, max_batch=2)
+        return await asyncio.wait_for(asyncio.gather(embedder.embed("a"), embedder.embed("bb")), timeout=5)
+
+    assert asyncio.run(scenario()) == [[1.0], [2.0]]
+    assert embeddings.calls == [["a", "bb"]]
+
+
+def test_identical_questions_are_coalesced_then_cached(embeddings):
+    async def scenario():
+        embedder = QueryEmbedder(batch_window_ms=5)
+        await asyncio.gather(embedder.embed("What is RAG?"), embedder.embed("  what is rag? "))
+        await embedder.embed("What is RAG?")
+        return embedder
+
+    embedder = asyncio.run(scenario())
+    assert embeddings.calls == [["What is RAG?"]]
+    stats = embedder.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 1, 1)
+
+
+def test_zero_window_embeds_immediately_and_cache_is_bounded(embeddings):
+    async def scenario():
+        embedder = QueryEmbedder(batch_window_ms=0, max_entries=2)
+        for question in ["a", "bb", "ccc"]:
+            await embedder.embed(question)
+        await embedder.embed("a")
+        return embedder
+
+    embedder = asyncio.run(scenario())
+    assert embeddings.calls == [["a"], ["bb"], ["ccc"], ["a"]]
+    assert embedder.stats()["entries"] == 2
+
+
+def test_failed_batch_fails_every_waiter_and_is_retried(monkeypatch):
+    fake = FakeEmbeddings(fail=True)
+    monkeypatch.setattr(query_embeddings, "get_embeddings", lambda: fake)
+
+    async def scenario():
+        embedder = QueryEmbedder(batch_window_ms=5)
+        results = await asyncio.gather(embedder.embed("a"), embedder.embed("bb"), return_exceptions=True)
+        fake.fail = False
+        return results, await embedder.embed("a")
+
+    results, retried = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == [1.0]
+    assert fake.calls == [["a", "bb"], ["a"]]
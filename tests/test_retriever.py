@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from src.retriever import reciprocal_rank_fusion
+
+
+def rows(*uuids: str) -> list:
+    return [SimpleNamespace(uuid=uuid) for uuid in uuids]
+
+
+def uuids(fused: list) -> list[str]:
+    return [row.uuid for row in fused]
+
+
+def test_rows_found_by_both_rankings_come_first():
+    vector = rows("a", "b", "c")
+    lexical = rows("c", "d", "a")
+    fused = reciprocal_rank_fusion([(vector, 1.0), (lexical, 1.0)], top_k=None, k=60)
+    assert uuids(fused) == ["a", "c", "b", "d"]
+
+
+def test_weights_shift_the_order():
+    vector = rows("a", "b")
+    lexical = rows("b", "a")
+    assert uuids(reciprocal_rank_fusion([(vector, 0.7), (lexical, 0.3)], top_k=None)) == ["a", "b"]
+    assert uuids(reciprocal_rank_fusion([(vector, 0.3), (lexical, 0.7)], top_k=None)) == ["b", "a"]
+
+
+def test_zero_weight_ranking_only_adds_rows():
+    fused = reciprocal_rank_fusion([(rows("a", "b"), 1.0), (rows("b", "c"), 0.0)], top_k=None)
+    assert uuids(fused) == ["a", "b", "c"]
+
+
+def test_top_k_and_first_row_object_kept():
+    first = rows("a", "b", "c")
+    fused = reciprocal_rank_fusion([(first, 1.0), (rows("a", "c"), 1.0)], top_k=2)
+    assert uuids(fused) == ["a", "c"]
+    assert fused[0] is first[0]
+
+
+def test_empty_rankings():
+    assert reciprocal_rank_fusion([([], 1.0), ([], 1.0)], top_k=5) == []
@@ -0,0 +1,65 @@
+import pytest
+
+from src.generator import parse_video_summary
+from src.summarizer import split_sections
+
+
+def segments(count: int, text: str = "x" * 99, duration: float = 5.0) -> list[dict]:
+    # Each segment counts as len(text) + 1 = 100 characters
+    return [{"text": text, "start": i * duration, "duration": duration} for i in range(count)]
+
+
+def test_sections_follow_segment_boundaries_and_timings():
+    sections = split_sections(segments(9), section_chars=300, max_sections=12)
+    assert [len(section["text"].split()) for section in sections] == [3, 3, 3]
+    assert [(section["start"], section["end"]) for section in sections] == [(0.0, 15.0), (15.0, 30.0), (30.0, 45.0)]
+
+
+def test_short_tail_is_folded_into_the_last_section():
+    # A 100-character tail is under a quarter of the 500-character target
+    sections = split_sections(segments(11), section_chars=500, max_sections=12)
+    assert len(sections) == 2
+    assert len(sections[-1]["text"].split()) == 6
+    assert sections[-1]["end"] == 55.0
+
+
+def test_longer_tail_becomes_its_own_section():
+    sections = split_sections(segments(8), section_chars=300, max_sections=12)
+    assert [len(section["text"].split()) for section in sections] == [3, 3, 2]
+
+
+def test_sections_grow_to_stay_within_max_sections():
+    sections = split_sections(segments(100), section_chars=300, max_sections=4)
+    assert len(sections) == 4
+    assert all(len(section["text"].split()) == 25 for section in sections)
+
+
+def test_short_transcript_is_one_section():
+    sections = split_sections(segments(2), section_chars=6000)
+    assert sections == [{"text": "x" * 99 + " " + "x" * 99, "start": 0.0, "end": 10.0}]
+    assert split_sections([]) == []
+
+
+def test_parse_plain_json():
+    raw = '{"title": "Intro to RAG", "suggested_questions": ["What?", "Why?", "How?", "When?"]}'
+    assert parse_video_summary(raw) == {
+        "title": "Intro to RAG",
+        "suggested_questions": ["What?", "Why?", "How?"],
+    }
+
+
+def test_parse_json_in_code_fence_with_prose():
+    raw = 'Here you go:\n```json\n{"title": "Talk", "suggested_questions": ["Q1", 2, "Q2"]}\n```\nEnjoy!'
+    assert parse_video_summary(raw) == {"title": "Talk", "suggested_questions": ["Q1", "Q2"]}
+
+
+def test_parse_fills_defaults_and_truncates_title():
+    summary = parse_video_summary('{"title": "' + "t" * 100 + '"}')
+    assert summary == {"title": "t" * 60, "suggested_questions": []}
+    assert parse_video_summary("{}")["title"] == "Untitled Video"
+
+
+@pytest.mark.parametrize("raw", ["not json", "[1, 2, 3]", "```\nnothing here\n```"])
+def test_parse_rejects_replies_without_a_json_object(raw):
+    with pytest.raises(ValueError):
+        parse_video_summary(raw)